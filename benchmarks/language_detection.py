@@ -0,0 +1,63 @@
+"""
+Compares the cost of language detection before and after sampling.
+
+Before: langdetect over the whole content, or its first 500k characters for larger documents.
+After: langdetect over a few fixed-size windows spread across the content (detect_language).
+
+Run with: python benchmarks/language_detection.py
+"""
+
+import time
+
+from langdetect import DetectorFactory, detect
+from wasabi import msg
+
+from goldenverba.components.document import detect_language
+
+SIZES = [10_000, 100_000, 500_000, 1_000_000, 5_000_000]
+REPEATS = 3
+SENTENCE = "The quick brown fox jumps over the lazy dog while the cat sleeps. "
+
+
+def full_detection(text: str) -> str:
+    return detect(text[:500000])
+
+
+def measure(func, text: str) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    DetectorFactory.seed = 0
+    # Load the langdetect profiles before measuring
+    detect(SENTENCE)
+
+    rows = []
+    for size in SIZES:
+        text = (SENTENCE * (size // len(SENTENCE) + 1))[:size]
+        before = measure(full_detection, text)
+        after = measure(detect_language, text)
+        rows.append(
+            (
+                f"{size:,}",
+                f"{before * 1000:.1f} ms",
+                f"{after * 1000:.1f} ms",
+                f"{before / after:.1f}x",
+            )
+        )
+
+    msg.table(
+        rows,
+        header=("Characters", "Full", "Sampled", "Speedup"),
+        divider=True,
+        aligns=("r", "r", "r", "r"),
+    )
+
+
+if __name__ == "__main__":
+    main()
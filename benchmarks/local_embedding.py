@@ -0,0 +1,86 @@
+"""
+Compares the throughput of the local embedding backends on CPU.
+
+Every backend of the SentenceTransformersEmbedder (torch, int8, onnx) encodes the same chunks,
+once with a plain model.encode call and once with the length-sorted, token-budgeted batches of encode_batched.
+The onnx backend is skipped when sentence-transformers[onnx] is not installed.
+
+Run with: python benchmarks/local_embedding.py [model] [chunks]
+Thread counts and batch budgets are read from VERBA_EMBEDDING_THREADS, VERBA_EMBEDDING_BATCH_TOKENS
+and VERBA_EMBEDDING_MAX_BATCH like in Verba.
+"""
+
+import random
+import sys
+import time
+
+from wasabi import msg
+
+from goldenverba.components.embedding.SentenceTransformersEmbedder import (
+    BACKENDS,
+    encode_batched,
+    load_sentence_transformer,
+)
+
+MODEL = "all-MiniLM-L6-v2"
+CHUNKS = 2000
+REPEATS = 2
+SENTENCE = "Verba imports documents, splits them into chunks and embeds every chunk. "
+
+
+def make_chunks(count: int) -> list[str]:
+    """Chunks of very different lengths, like the chunks of a mixed import"""
+    random.seed(0)
+    return [SENTENCE * random.choice([1, 2, 4, 8, 16, 32]) for _ in range(count)]
+
+
+def measure(func, chunks: list[str]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else MODEL
+    chunks = make_chunks(int(sys.argv[2]) if len(sys.argv) > 2 else CHUNKS)
+
+    rows = []
+    baseline = None
+    for backend in BACKENDS:
+        try:
+            model = load_sentence_transformer((model_name, backend))
+        except Exception as e:
+            msg.warn(f"Skipping {backend}: {str(e)}")
+            continue
+        # Load the weights and kernels before measuring
+        model.encode(chunks[:8])
+
+        for batching, func in [
+            ("encode", lambda chunks: model.encode(chunks)),
+            ("length-sorted", lambda chunks: encode_batched(model, chunks)),
+        ]:
+            seconds = measure(func, chunks)
+            baseline = baseline or seconds
+            rows.append(
+                (
+                    backend,
+                    batching,
+                    f"{seconds:.2f} s",
+                    f"{len(chunks) / seconds:.0f}",
+                    f"{baseline / seconds:.1f}x",
+                )
+            )
+
+    msg.table(
+        rows,
+        header=("Backend", "Batching", "Time", "Chunks/s", "Speedup"),
+        divider=True,
+        aligns=("l", "l", "r", "r", "r"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ import {
   UserConfig,
   LabelsResponse,
   Themes,
+  UploadPayload,
 } from "./types";
 
 const checkUrl = async (url: string): Promise<boolean> => {
@@ -533,6 +534,27 @@ export const deleteDocument = async (
   }
 };
 
+// Endpoint /api/upload
+export const uploadFile = async (
+  content: Blob
+): Promise<UploadPayload | null> => {
+  try {
+    const host = await detectHost();
+    const response = await fetch(`${host}/api/upload`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/octet-stream",
+      },
+      body: content,
+    });
+    const data: UploadPayload = await response.json();
+    return data;
+  } catch (error) {
+    console.error("Error uploading file", error);
+    return null;
+  }
+};
+
 // Endpoint /api/reset
 export const deleteAllDocuments = async (
   resetMode: string,
@@ -12,6 +12,7 @@ import {
 } from "@/app/types";
 import { RAGConfig } from "@/app/types";
 import { getImportWebSocketApiHost } from "@/app/util";
+import { uploadFile } from "@/app/api";
 
 interface IngestionViewProps {
   credentials: Credentials;
@@ -181,10 +182,7 @@ const IngestionView: React.FC<IngestionViewProps> = ({
       ["READY", "DONE", "ERROR"].includes(fileMap[selectedFileData].status) &&
       !fileMap[selectedFileData].block
     ) {
-      sendDataBatches(
-        JSON.stringify(fileMap[selectedFileData]),
-        selectedFileData
-      );
+      sendFile(selectedFileData);
     }
   };
 
@@ -195,11 +193,36 @@ const IngestionView: React.FC<IngestionViewProps> = ({
         ["READY", "DONE", "ERROR"].includes(fileMap[fileID].status) &&
         !fileMap[fileID].block
       ) {
-        sendDataBatches(JSON.stringify(fileMap[fileID]), fileID);
+        sendFile(fileID);
       }
     }
   };
 
+  // Files are uploaded as raw bytes, the server streams them to disk
+  const sendFile = async (fileID: string) => {
+    const fileData = fileMap[fileID];
+    if (fileData.isURL || !fileData.content) {
+      sendDataBatches(JSON.stringify(fileData), fileID);
+      return;
+    }
+    setInitialStatus(fileID);
+    const blob = await (
+      await fetch(`data:application/octet-stream;base64,${fileData.content}`)
+    ).blob();
+    const upload = await uploadFile(blob);
+    if (!upload || upload.error !== "") {
+      addStatusMessage(
+        `Failed to upload ${fileData.filename}: ${upload?.error}`,
+        "ERROR"
+      );
+      return;
+    }
+    sendDataBatches(
+      JSON.stringify({ ...fileData, content: "", upload_id: upload.upload_id }),
+      fileID
+    );
+  };
+
   const sendDataBatches = (data: string, fileID: string) => {
     if (socket?.readyState === WebSocket.OPEN) {
       setInitialStatus(fileID);
@@ -158,6 +158,12 @@ export type RAGSetting = {
   [key: string]: ConfigSetting;
 };
 
+export type UploadPayload = {
+  upload_id: string;
+  file_size: number;
+  error: string;
+};
+
 export type FileData = {
   fileID: string;
   filename: string;
@@ -169,6 +175,7 @@ export type FileData = {
   labels: string[];
   metadata: string;
   file_size: number;
+  upload_id?: string;
   block?: boolean;
   status_report: StatusReportMap;
   status:
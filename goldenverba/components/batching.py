@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+from wasabi import msg
+
+# How inputs longer than the context of the embedding model are sent:
+# "truncate" embeds their first tokens, "average" embeds all windows of the context size and averages their vectors
+OVERSIZED_MODES = ["truncate", "average"]
+
+# Used when the tiktoken encoding can't be loaded (e.g. offline), most tokenizers average 4 characters per token
+CHARS_PER_TOKEN = 4
+
+encoding = None
+encoding_loaded = False
+
+
+def get_encoding():
+    """The tiktoken cl100k_base encoding of the OpenAI embedding models, None if unavailable"""
+    global encoding, encoding_loaded
+    if not encoding_loaded:
+        encoding_loaded = True
+        try:
+            import tiktoken
+
+            encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            msg.warn(f"Could not load tiktoken, estimating token counts: {str(e)}")
+    return encoding
+
+
+def count_tokens(content: list[str]) -> list[int]:
+    encoder = get_encoding()
+    if encoder is None:
+        return [-(-len(text) // CHARS_PER_TOKEN) for text in content]
+    return [len(tokens) for tokens in encoder.encode_ordinary_batch(content)]
+
+
+def split_tokens(text: str, max_tokens: int, max_windows: int = None) -> list[str]:
+    """Cut a text into windows of at most max_tokens tokens, only the first max_windows are returned"""
+    encoder = get_encoding()
+    if encoder is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        starts = range(0, len(text), size)[:max_windows]
+        return [text[i : i + size] for i in starts]
+    tokens = encoder.encode_ordinary(text)
+    starts = range(0, len(tokens), max_tokens)[:max_windows]
+    return [encoder.decode(tokens[i : i + max_tokens]) for i in starts]
+
+
+def get_oversized_mode() -> str:
+    mode = os.getenv("VERBA_EMBED_OVERSIZED", "truncate").lower()
+    if mode not in OVERSIZED_MODES:
+        msg.warn(f"Unknown VERBA_EMBED_OVERSIZED {mode}, using truncate")
+        return "truncate"
+    return mode
+
+
+def fit_inputs(
+    content: list[str], max_tokens: int | None, mode: str = "truncate"
+) -> tuple[list[str], list[int], list[int]]:
+    """Count the tokens of every text and cut texts longer than max_tokens.
+    Runs on the CPU executor.
+    @returns tuple[list[str], list[int], list[int]] - Inputs for the embedder, index in content of every input and its token count
+    """
+    counts = count_tokens(content)
+    inputs, owners, input_counts = [], [], []
+    for i, (text, count) in enumerate(zip(content, counts)):
+        if max_tokens is None or count <= max_tokens:
+            parts, part_counts = [text], [count]
+        else:
+            parts = split_tokens(
+                text, max_tokens, max_windows=1 if mode == "truncate" else None
+            )
+            part_counts = count_tokens(parts)
+        inputs.extend(parts)
+        owners.extend([i] * len(parts))
+        input_counts.extend(part_counts)
+    return inputs, owners, input_counts
+
+
+def pack_batches(
+    token_counts: list[int], max_tokens: int | None, max_items: int
+) -> list[list[int]]:
+    """Fill batches in order until the next input would exceed max_tokens or max_items
+    @returns list[list[int]] - Indices of the inputs of every batch
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for i, count in enumerate(token_counts):
+        if batch and (
+            len(batch) >= max_items
+            or (max_tokens is not None and batch_tokens + count > max_tokens)
+        ):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(i)
+        batch_tokens += count
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def combine_vectors(
+    vectors: list[list[float]], owners: list[int], token_counts: list[int], size: int
+) -> list[list[float]]:
+    """One vector per content: the vector of its input, or the token-weighted average of its windows
+    scaled to the average length of their vectors
+    """
+    parts: list[list[int]] = [[] for _ in range(size)]
+    for i, owner in enumerate(owners):
+        parts[owner].append(i)
+
+    combined = []
+    for indices in parts:
+        if len(indices) == 1:
+            combined.append(vectors[indices[0]])
+            continue
+        window_vectors = np.array([vectors[i] for i in indices], dtype=np.float64)
+        weights = np.array([max(token_counts[i], 1) for i in indices], dtype=np.float64)
+        average = np.average(window_vectors, axis=0, weights=weights)
+        norm = np.linalg.norm(average)
+        if norm > 0:
+            average *= np.linalg.norm(window_vectors, axis=1).mean() / norm
+        combined.append(average.tolist())
+    return combined
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from wasabi import msg
+
+from goldenverba.components.util import get_data_dir
+
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed cache for embeddings stored in SQLite.
+    Vectors are keyed by (embedder, model, normalized text), stored as float32 and evicted least-recently-used once the cache exceeds max_size_mb.
+    """
+
+    def __init__(self, path: str = None, max_size_mb: float = 1024):
+        self.path = path or os.path.join(get_data_dir(), "embedding_cache.sqlite")
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = None
+        # Running size of the stored vectors, summed once when the cache is opened
+        self.total_size = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            )
+            self.connection.commit()
+            self.total_size = self.stored_size(self.connection)
+        return self.connection
+
+    @staticmethod
+    def stored_size(connection: sqlite3.Connection) -> int:
+        return connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    @staticmethod
+    def make_key(embedder: str, model: str, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(
+            f"{embedder}\x00{model}\x00{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Return the cached vectors for the given keys and mark them as recently used"""
+        found = {}
+        with self.lock:
+            connection = self.connect()
+            unique_keys = list(dict.fromkeys(keys))
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i : i + 500]
+                rows = connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                connection.commit()
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        """Store vectors and evict the least recently used ones if the cache grew too large"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self.lock:
+            connection = self.connect()
+            # Replaced vectors no longer count towards the total
+            replaced = 0
+            keys = [row[0] for row in rows]
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                replaced += connection.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchone()[0]
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            connection.commit()
+            self.total_size += sum(row[2] for row in rows) - replaced
+            self.evict(connection)
+
+    def evict(self, connection: sqlite3.Connection):
+        if self.total_size <= self.max_bytes:
+            return
+        # Other processes may share the file, count again before evicting
+        total = self.stored_size(connection)
+        self.total_size = total
+        if total <= self.max_bytes:
+            return
+        # Free up some headroom so we don't evict on every insert
+        to_free = total - int(self.max_bytes * 0.9)
+        freed = 0
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_access ASC"
+        ):
+            evicted.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+        connection.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        connection.commit()
+        self.total_size -= freed
+        msg.info(f"Evicted {len(evicted)} embeddings from cache")
+
+    def stats(self) -> dict:
+        with self.lock:
+            connection = self.connect()
+            count, size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": count,
+            "size_bytes": size,
+        }
+
+    async def lookup(
+        self, embedder: str, model: str, content: list[str]
+    ) -> list[list[float] | None]:
+        """Returns the cached vector for every string in content, None for misses"""
+        keys = [self.make_key(embedder, model, text) for text in content]
+        found = await asyncio.to_thread(self.get_many, keys)
+        vectors = [found.get(key) for key in keys]
+        hits = sum(1 for vector in vectors if vector is not None)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+        return vectors
+
+    async def store(
+        self, embedder: str, model: str, content: list[str], vectors: list[list[float]]
+    ):
+        items = {
+            self.make_key(embedder, model, text): vector
+            for text, vector in zip(content, vectors)
+        }
+        await asyncio.to_thread(self.put_many, items)
+
+
+class PageCache:
+    """
+    Validators of fetched web pages stored in SQLite, so recrawls can send conditional requests.
+    Every URL keeps its ETag, Last-Modified, the hash of its HTML and its links, unchanged pages are neither downloaded nor parsed again.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_data_dir(), "page_cache.sqlite")
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, title TEXT NOT NULL, etag TEXT NOT NULL, last_modified TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, links TEXT NOT NULL, fetched REAL NOT NULL)"
+            )
+            self.connection.commit()
+        return self.connection
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def get(self, url: str) -> dict | None:
+        with self.lock:
+            row = (
+                self.connect()
+                .execute(
+                    "SELECT title, etag, last_modified, content_hash, links FROM pages WHERE url = ?",
+                    (url,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        title, etag, last_modified, content_hash, links = row
+        return {
+            "title": title,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "links": json.loads(links),
+        }
+
+    def put(self, url: str, page: dict):
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO pages (url, title, etag, last_modified, content_hash, links, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    page["title"],
+                    page["etag"],
+                    page["last_modified"],
+                    page["content_hash"],
+                    json.dumps(page["links"]),
+                    time.time(),
+                ),
+            )
+            connection.commit()
+
+    async def lookup(self, url: str) -> dict | None:
+        """Returns the cached page of a normalized URL, None if it was never fetched"""
+        return await asyncio.to_thread(self.get, url)
+
+    async def store(self, url: str, page: dict):
+        await asyncio.to_thread(self.put, url, page)
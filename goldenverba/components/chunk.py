@@ -14,6 +14,7 @@ class Chunk:
         self.title = ""
         self.chunk_id = chunk_id
         self.vector = None
+        self.uuid = None
         self.doc_uuid = None
         self.pca = [0, 0, 0]
         self.start_i = start_i
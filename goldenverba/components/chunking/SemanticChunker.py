@@ -26,6 +26,8 @@ class SemanticChunker(Chunker):
         self.description = (
             "Split documents based on semantic similarity or max sentences"
         )
+        self.cpu_bound = False
+        self.requires_spacy = True
         self.config = {
             "Breakpoint Percentile Threshold": InputConfig(
                 type="number",
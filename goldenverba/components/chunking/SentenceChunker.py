@@ -16,6 +16,7 @@ class SentenceChunker(Chunker):
         super().__init__()
         self.name = "Sentence"
         self.description = "Splits documents based on word tokens"
+        self.requires_spacy = True
         self.config = {
             "Sentences": InputConfig(
                 type="number",
@@ -44,68 +45,89 @@ class SentenceChunker(Chunker):
 
         for document in documents:
 
-            doc = document.spacy_doc
-
             # Skip if document already contains chunks
             if len(document.chunks) > 0:
                 continue
 
-            sentences = [sent.text for sent in doc.sents]
-
-            # If Split Size is higher than actual Token Count or if Split Size is Zero
-            if units > len(sentences) or units == 0:
-                document.chunks.append(
-                    Chunk(
-                        content=document.content,
-                        chunk_id=0,
-                        start_i=0,
-                        end_i=len(document.content),
-                        content_without_overlap=document.content,
-                    )
-                )
-                continue
-
-            if overlap >= units:
-                msg.warn(
-                    f"Overlap value is greater than unit (Units {config['Sentences'].value}/ Overlap {config['Overlap'].value})"
-                )
-                overlap = units - 1
-
-            i = 0
-            split_id_counter = 0
-            char_end_i = -1
-            while i < len(sentences):
-
-                # index at the sentence level
-                start_i = i
-                end_i = min(i + units, len(sentences))
-
-                overlap_start = max(0, end_i - overlap)
-                chunk_text = " ".join(sentences[start_i:end_i])
-                chunk_text_without_overlap = " ".join(sentences[start_i:overlap_start])
-
-                # need to convert to index at the character level
-                char_start_i = char_end_i + 1
-                if i > 0:
-                    char_start_i -= sum([len(s) for s in sentences[start_i:(start_i + overlap)]]) + 1
-                char_end_i = char_start_i + len(chunk_text)
-
-
-                doc_chunk = Chunk(
-                    content=chunk_text,
-                    chunk_id=split_id_counter,
-                    start_i=char_start_i,
-                    end_i=char_end_i,
-                    content_without_overlap=chunk_text_without_overlap,
-                )
+            document.chunks.extend(self.split(document, units, overlap))
 
-                document.chunks.append(doc_chunk)
-                split_id_counter += 1
-
-                # Exit loop if this was the last possible chunk
-                if end_i == len(sentences):
-                    break
+        return documents
 
-                i += units - overlap  # Step forward, considering overlap
+    async def chunk_stream(
+        self,
+        config: dict,
+        document: Document,
+        embedder: Embedding | None = None,
+        embedder_config: dict | None = None,
+        batch_size: int = 128,
+    ):
+        units = int(config["Sentences"].value)
+        overlap = int(config["Overlap"].value)
 
-        return documents
+        batch = []
+        for chunk in self.split(document, units, overlap):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def split(self, document: Document, units: int, overlap: int):
+        """Yield the chunks of a document one by one"""
+        doc = document.spacy_doc
+
+        sentences = [sent.text for sent in doc.sents]
+
+        # If Split Size is higher than actual Token Count or if Split Size is Zero
+        if units > len(sentences) or units == 0:
+            yield Chunk(
+                content=document.content,
+                chunk_id=0,
+                start_i=0,
+                end_i=len(document.content),
+                content_without_overlap=document.content,
+            )
+            return
+
+        if overlap >= units:
+            msg.warn(
+                f"Overlap value is greater than unit (Units {units}/ Overlap {overlap})"
+            )
+            overlap = units - 1
+
+        i = 0
+        split_id_counter = 0
+        char_end_i = -1
+        while i < len(sentences):
+
+            # index at the sentence level
+            start_i = i
+            end_i = min(i + units, len(sentences))
+
+            overlap_start = max(0, end_i - overlap)
+            chunk_text = " ".join(sentences[start_i:end_i])
+            chunk_text_without_overlap = " ".join(sentences[start_i:overlap_start])
+
+            # need to convert to index at the character level
+            char_start_i = char_end_i + 1
+            if i > 0:
+                char_start_i -= (
+                    sum([len(s) for s in sentences[start_i : (start_i + overlap)]]) + 1
+                )
+            char_end_i = char_start_i + len(chunk_text)
+
+            yield Chunk(
+                content=chunk_text,
+                chunk_id=split_id_counter,
+                start_i=char_start_i,
+                end_i=char_end_i,
+                content_without_overlap=chunk_text_without_overlap,
+            )
+            split_id_counter += 1
+
+            # Exit loop if this was the last possible chunk
+            if end_i == len(sentences):
+                break
+
+            i += units - overlap  # Step forward, considering overlap
@@ -16,6 +16,7 @@ class TokenChunker(Chunker):
         super().__init__()
         self.name = "Token"
         self.description = "Splits documents based on word tokens"
+        self.requires_spacy = True
         self.config = {
             "Tokens": InputConfig(
                 type="number",
@@ -44,65 +45,85 @@ class TokenChunker(Chunker):
 
         for document in documents:
 
-            doc = document.spacy_doc
-
             # Skip if document already contains chunks
             if len(document.chunks) > 0:
                 continue
 
-            # If Split Size is higher than actual Token Count or if Split Size is Zero
-            if units > len(doc) or units == 0:
-                document.chunks.append(
-                    Chunk(
-                        content=document.content,
-                        chunk_id=0,
-                        start_i=0,
-                        end_i=len(document.content),
-                        content_without_overlap=document.content,
-                    )
-                )
-                continue
-
-            if overlap >= units:
-                msg.warn(
-                    f"Overlap value is greater than unit (Units {config['Tokens'].value}/ Overlap {config['Overlap'].value})"
-                )
-                overlap = units - 1
-
-            i = 0
-            split_id_counter = 0
-            while i < len(doc):
-                start_i = i
-                end_i = min(i + units + overlap, len(doc))
-                if end_i == len(doc):
-                    overlap_start = end_i
-                else:
-                    overlap_start = min(i + units, end_i)
-
-                chunk_text = doc[start_i:end_i].text
-                chunk_text_without_overlap = doc[start_i:overlap_start].text
-
-                # char_start_i = doc[start_i].idx
-                if end_i == len(doc):
-                    char_end_i = doc[-1].idx + 1
-                else:
-                    char_end_i = doc[end_i].idx
-
-                doc_chunk = Chunk(
-                    content=chunk_text,
-                    chunk_id=split_id_counter,
-                    start_i=doc[start_i].idx,
-                    end_i=char_end_i,
-                    content_without_overlap=chunk_text_without_overlap,
-                )
-
-                document.chunks.append(doc_chunk)
-                split_id_counter += 1
-
-                # Exit loop if this was the last possible chunk
-                if end_i == len(doc):
-                    break
-
-                i += units  # Step forward, considering overlap
+            document.chunks.extend(self.split(document, units, overlap))
 
         return documents
+
+    async def chunk_stream(
+        self,
+        config: dict[str, InputConfig],
+        document: Document,
+        embedder: Embedding | None = None,
+        embedder_config: dict | None = None,
+        batch_size: int = 128,
+    ):
+        units = int(config["Tokens"].value)
+        overlap = int(config["Overlap"].value)
+
+        batch = []
+        for chunk in self.split(document, units, overlap):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def split(self, document: Document, units: int, overlap: int):
+        """Yield the chunks of a document one by one"""
+        doc = document.spacy_doc
+
+        # If Split Size is higher than actual Token Count or if Split Size is Zero
+        if units > len(doc) or units == 0:
+            yield Chunk(
+                content=document.content,
+                chunk_id=0,
+                start_i=0,
+                end_i=len(document.content),
+                content_without_overlap=document.content,
+            )
+            return
+
+        if overlap >= units:
+            msg.warn(
+                f"Overlap value is greater than unit (Units {units}/ Overlap {overlap})"
+            )
+            overlap = units - 1
+
+        i = 0
+        split_id_counter = 0
+        while i < len(doc):
+            start_i = i
+            end_i = min(i + units + overlap, len(doc))
+            if end_i == len(doc):
+                overlap_start = end_i
+            else:
+                overlap_start = min(i + units, end_i)
+
+            chunk_text = doc[start_i:end_i].text
+            chunk_text_without_overlap = doc[start_i:overlap_start].text
+
+            # char_start_i = doc[start_i].idx
+            if end_i == len(doc):
+                char_end_i = doc[-1].idx + 1
+            else:
+                char_end_i = doc[end_i].idx
+
+            yield Chunk(
+                content=chunk_text,
+                chunk_id=split_id_counter,
+                start_i=doc[start_i].idx,
+                end_i=char_end_i,
+                content_without_overlap=chunk_text_without_overlap,
+            )
+            split_id_counter += 1
+
+            # Exit loop if this was the last possible chunk
+            if end_i == len(doc):
+                break
+
+            i += units  # Step forward, considering overlap
@@ -3,37 +3,64 @@ from goldenverba.components.chunk import Chunk
 from spacy.tokens import Doc
 from spacy.language import Language
 import spacy
+import hashlib
 import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterator
 
 from langdetect import detect
 
 
-def load_nlp_for_language(language: str):
-    """Load SpaCy models based on language"""
-    if language == "en":
-        nlp = spacy.blank("en")
-    elif language == "zh":
-        nlp = spacy.blank("zh")
-    elif language == "zh-hant":
-        nlp = spacy.blank("zh-hant")
-    elif language == "fr":
-        nlp = spacy.blank("fr")
-    elif language == "de":
-        nlp = spacy.blank("de")
-    elif language == "nl":
-        nlp = spacy.blank("nl")
-    else:
-        nlp = spacy.blank("en")
-
-    nlp.add_pipe("sentencizer")
+# Languages with their own spaCy tokenizer, everything else is parsed as English
+SPACY_LANGUAGES = {
+    "en": "en",
+    "zh": "zh",
+    "zh-hant": "zh",
+    "fr": "fr",
+    "de": "de",
+    "nl": "nl",
+}
 
+# Longer contents are parsed in segments, cut at whitespace
+MAX_SEGMENT_LENGTH = 100000
+
+spacy_batch_size = int(os.getenv("VERBA_SPACY_BATCH_SIZE", 32))
+spacy_processes = int(os.getenv("VERBA_SPACY_PROCESSES", 1))
+
+# Language detection samples a few windows of long contents
+LANGUAGE_SAMPLE_WINDOWS = 5
+LANGUAGE_SAMPLE_SIZE = 1000
+
+# Detected languages of the most recent sources and sampled texts
+LANGUAGE_CACHE_SIZE = 1024
+language_cache: OrderedDict[str, str] = OrderedDict()
+
+# Process-wide spaCy pipelines per language, built once on first use
+nlp_pipelines: dict[str, Language] = {}
+nlp_lock = threading.Lock()
+
+
+def load_nlp_for_language(language: str) -> Language:
+    """Return the shared SpaCy pipeline for a language"""
+    language = SPACY_LANGUAGES.get(language, "en")
+    nlp = nlp_pipelines.get(language)
+    if nlp is None:
+        with nlp_lock:
+            nlp = nlp_pipelines.get(language)
+            if nlp is None:
+                nlp = spacy.blank(language)
+                nlp.add_pipe("sentencizer")
+                nlp_pipelines[language] = nlp
     return nlp
 
 
 def detect_language(text: str) -> str:
-    """Automatically detect language"""
+    """Automatically detect language from a sample of the text"""
     try:
-        detected_lang = detect(text)
+        detected_lang = detect(sample_text(text))
         if detected_lang == "zh-cn":
             return "zh"
         elif detected_lang == "zh-tw" or detected_lang == "zh-hk":
@@ -43,6 +70,128 @@ def detect_language(text: str) -> str:
         return "unknown"
 
 
+def sample_text(
+    text: str,
+    windows: int = LANGUAGE_SAMPLE_WINDOWS,
+    window_size: int = LANGUAGE_SAMPLE_SIZE,
+) -> str:
+    """Return a few fixed-size windows spread evenly across the text, so detection cost doesn't grow with its length"""
+    if len(text) <= windows * window_size:
+        return text
+    step = (len(text) - window_size) / (windows - 1)
+    return "\n".join(
+        text[int(i * step) : int(i * step) + window_size] for i in range(windows)
+    )
+
+
+def language_from_labels(labels: list[str]) -> str:
+    """Return the language of a lang:xx label, if any"""
+    for label in labels:
+        if label.lower().startswith("lang:"):
+            return label[5:].strip().lower()
+    return ""
+
+
+def resolve_language(content: str, language: str = "", source: str = "") -> str:
+    """Return the given language or detect it, detected languages are cached per source and sampled text"""
+    if language:
+        return language
+    if not source:
+        return detect_language(content)
+    key = source + ":" + hashlib.sha256(sample_text(content).encode()).hexdigest()
+    with nlp_lock:
+        if key in language_cache:
+            language_cache.move_to_end(key)
+            return language_cache[key]
+    language = detect_language(content)
+    with nlp_lock:
+        language_cache[key] = language
+        while len(language_cache) > LANGUAGE_CACHE_SIZE:
+            language_cache.popitem(last=False)
+    return language
+
+
+def segment_content(content: str, max_length: int = MAX_SEGMENT_LENGTH):
+    """Yield consecutive segments of at most max_length characters, cut after whitespace so no token is split"""
+    start = 0
+    while start < len(content):
+        end = min(start + max_length, len(content))
+        if end < len(content):
+            cut = max(content.rfind(char, start, end) for char in " \n\t")
+            if cut > start:
+                end = cut + 1
+        yield content[start:end]
+        start = end
+
+
+def parse_content(content: str, language: str = "", source: str = "") -> Doc:
+    """Parse the content with the spaCy pipeline of its language, detected unless given"""
+    nlp = load_nlp_for_language(resolve_language(content, language, source))
+    if len(content) <= MAX_SEGMENT_LENGTH:
+        return nlp(content)
+    # Long contents are parsed in segments below the max_length of the pipeline and merged,
+    # chunkers need the whole doc so all segment docs are held until the merge
+    return Doc.from_docs([nlp(segment) for segment in segment_content(content)])
+
+
+def parse_contents(
+    contents: list[str], languages: list[str] = None, sources: list[str] = None
+) -> list[Doc]:
+    """Parse many contents at once, grouped by language and batched through nlp.pipe
+    @parameter: contents : list[str] - Contents to parse
+    @parameter: languages : list[str] - Language per content, empty to detect it
+    @parameter: sources : list[str] - Source per content, used to cache detected languages
+    @returns list[Doc] - One spaCy doc per content, in order
+    """
+    languages = languages or [""] * len(contents)
+    sources = sources or [""] * len(contents)
+    docs: list[Doc | None] = [None] * len(contents)
+    groups: dict[str, list[int]] = {}
+    for index, content in enumerate(contents):
+        if len(content) > MAX_SEGMENT_LENGTH:
+            docs[index] = parse_content(content, languages[index], sources[index])
+        else:
+            language = SPACY_LANGUAGES.get(
+                resolve_language(content, languages[index], sources[index]), "en"
+            )
+            groups.setdefault(language, []).append(index)
+
+    # Worker processes (e.g. of the process executor) can't start processes of their own
+    n_process = 1 if multiprocessing.current_process().daemon else spacy_processes
+    for language, indices in groups.items():
+        nlp = load_nlp_for_language(language)
+        parsed = nlp.pipe(
+            (contents[index] for index in indices),
+            batch_size=spacy_batch_size,
+            n_process=n_process if len(indices) > spacy_batch_size else 1,
+        )
+        for index, doc in zip(indices, parsed):
+            docs[index] = doc
+    return docs
+
+
+def language_inputs(
+    documents: list["Document"],
+) -> tuple[list[str], list[str], list[str]]:
+    """Arguments of parse_contents for the given documents"""
+    return (
+        [document.content for document in documents],
+        [document.language for document in documents],
+        [document.source for document in documents],
+    )
+
+
+def parse_documents(documents: list["Document"]):
+    """Parse all documents that are not chunked or parsed yet in one batch"""
+    pending = [
+        document
+        for document in documents
+        if not document.chunks and not document.is_parsed
+    ]
+    for document, doc in zip(pending, parse_contents(*language_inputs(pending))):
+        document.spacy_doc = doc
+
+
 class Document:
     def __init__(
         self,
@@ -54,6 +203,7 @@ class Document:
         source: str = "",
         meta: dict = {},
         metadata: str = "",
+        language: str = "",
     ):
         self.title = title
         self.content = content
@@ -63,28 +213,41 @@ class Document:
         self.source = source
         self.meta = meta
         self.metadata = metadata
+        # Language override for spaCy, detected from the content when empty
+        self.language = language or language_from_labels(labels)
         self.chunks: list[Chunk] = []
+        # Fingerprints used to skip re-importing unchanged documents
+        self.content_hash = ""
+        self.config_hash = ""
+        # Source of an incremental sync (e.g. a Git branch) and the version of the document in it
+        self.sync_key = ""
+        self.sync_version = ""
+        # Picklable callable returning the chunk contents of documents their reader splits itself,
+        # e.g. row batches of large tables, so the content never has to be held as one string
+        self.chunk_source: Callable[[], Iterator[str]] | None = None
+        self._spacy_doc: Doc | None = None
 
-        MAX_BATCH_SIZE = 500000
-
-        if len(content) > MAX_BATCH_SIZE:
-            # Process content in batches
-            docs = []
-            detected_language = detect_language(content[0:MAX_BATCH_SIZE])
-            nlp = load_nlp_for_language(detected_language)
+    @property
+    def spacy_doc(self) -> Doc:
+        """spaCy parse of the content, computed on first access so only chunkers that require spaCy pay for it"""
+        if self._spacy_doc is None:
+            self._spacy_doc = parse_content(self.content, self.language, self.source)
+        return self._spacy_doc
 
-            for i in range(0, len(content), MAX_BATCH_SIZE):
-                docs.append(nlp(content[i : i + MAX_BATCH_SIZE]))
+    @spacy_doc.setter
+    def spacy_doc(self, doc: Doc | None):
+        # Setting None drops the parse, it is recomputed on the next access
+        self._spacy_doc = doc
 
-            # Merged all processed docs
-            doc = Doc.from_docs(docs)
-        else:
-            # Process smaller content, directly based on language
-            detected_language = detect_language(content)
-            nlp = load_nlp_for_language(detected_language)
-            doc = nlp(content)
+    @property
+    def is_parsed(self) -> bool:
+        return self._spacy_doc is not None
 
-        self.spacy_doc = doc
+    def __getstate__(self) -> dict:
+        # The parse is expensive to pickle and can always be recomputed
+        state = self.__dict__.copy()
+        state["_spacy_doc"] = None
+        return state
 
     @staticmethod
     def to_json(document) -> dict:
@@ -98,6 +261,10 @@ class Document:
             "source": document.source,
             "meta": json.dumps(document.meta),
             "metadata": document.metadata,
+            "content_hash": document.content_hash,
+            "config_hash": document.config_hash,
+            "sync_key": document.sync_key,
+            "sync_version": document.sync_version,
         }
         return doc_dict
 
@@ -125,6 +292,10 @@ class Document:
                 meta=doc_dict.get("meta", {}),
                 metadata=doc_dict.get("metadata", ""),
             )
+            document.content_hash = doc_dict.get("content_hash", "")
+            document.config_hash = doc_dict.get("config_hash", "")
+            document.sync_key = doc_dict.get("sync_key", "")
+            document.sync_version = doc_dict.get("sync_version", "")
             return document
         else:
             return None
@@ -141,4 +312,5 @@ def create_document(content: str, fileConfig: FileConfig) -> Document:
         fileSize=fileConfig.file_size,
         metadata=fileConfig.metadata,
         meta={},
+        language=fileConfig.language,
     )
@@ -8,6 +8,8 @@ from wasabi import msg
 import asyncio
 
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.retry import wrap_client_error
+from goldenverba.components.sessions import http_session
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment, get_token
 
@@ -19,6 +21,8 @@ class AzureOpenAIEmbedder(Embedding):
         super().__init__()
         self.name = "AzureOpenAI"
         self.description = "Vectorizes documents and queries using Azure OpenAI"
+        self.max_batch_tokens = 300000
+        self.max_tokens = 8191
 
         # Fetch available models
         api_key = get_token("AZURE_OPENAI_API_KEY")
@@ -83,7 +87,7 @@ class AzureOpenAIEmbedder(Embedding):
         }
         payload = {"input": content}
         
-        async with aiohttp.ClientSession() as session:
+        async with http_session(base_url) as session:
             try:
                 async with session.post(
                     f"{base_url}/openai/deployments/{model}/embeddings?api-version={version}",
@@ -104,9 +108,8 @@ class AzureOpenAIEmbedder(Embedding):
                         )
                     return embeddings
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
-                raise Exception(f"API request failed: {str(e)}")
+                # Throttled and failed batches are retried by EmbeddingManager.batch_vectorize
+                raise wrap_client_error(e, f"API request failed: {str(e)}")
 
             except Exception as e:
                 msg.fail(f"Unexpected error: {type(e).__name__} - {str(e)}")
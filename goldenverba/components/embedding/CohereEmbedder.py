@@ -1,9 +1,9 @@
 import os
 import requests
-import aiohttp
 import json
 
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.sessions import http_session
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment, get_token
 
@@ -19,6 +19,8 @@ class CohereEmbedder(Embedding):
         super().__init__()
         self.name = "Cohere"
         self.description = "Vectorizes documents and queries using Cohere"
+        # Texts of one request to the embed endpoint
+        self.max_batch_size = 96
         self.url = os.getenv("COHERE_BASE_URL", "https://api.cohere.com/v1")
         models = get_models(self.url, get_token("COHERE_API_KEY", None), "embed")
 
@@ -55,7 +57,7 @@ class CohereEmbedder(Embedding):
 
         all_embeddings = []
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session(self.url) as session:
             for chunk in chunks(content, 96):
                 data = {"texts": chunk, "model": model, "input_type": "search_document"}
                 async with session.post(
@@ -7,6 +7,8 @@ import aiohttp
 from wasabi import msg
 
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.retry import wrap_client_error
+from goldenverba.components.sessions import http_session
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment, get_token
 
@@ -18,6 +20,10 @@ class OpenAIEmbedder(Embedding):
         super().__init__()
         self.name = "OpenAI"
         self.description = "Vectorizes documents and queries using OpenAI"
+        # Request limits of the OpenAI embeddings API, inputs are limited to the 8191 tokens of the model
+        self.max_batch_size = 2048
+        self.max_batch_tokens = 300000
+        self.max_tokens = 8191
 
         # Fetch available models
         api_key = get_token("OPENAI_API_KEY")
@@ -70,13 +76,13 @@ class OpenAIEmbedder(Embedding):
         payload_bytes = json.dumps(payload).encode("utf-8")
         payload_io = io.BytesIO(payload_bytes)
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session(base_url) as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
                     headers=headers,
                     data=payload_io,
-                    timeout=30,
+                    timeout=120,
                 ) as response:
                     response.raise_for_status()
                     data = await response.json()
@@ -93,9 +99,8 @@ class OpenAIEmbedder(Embedding):
                     return embeddings
 
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
-                raise Exception(f"API request failed: {str(e)}")
+                # Throttled and failed batches are retried by EmbeddingManager.batch_vectorize
+                raise wrap_client_error(e, f"API request failed: {str(e)}")
 
             except Exception as e:
                 msg.fail(f"Unexpected error: {type(e).__name__} - {str(e)}")
@@ -1,10 +1,112 @@
+import os
+
+from wasabi import msg
+
+from goldenverba.components.executor import run_embedding
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.models import ModelRegistry, length_sorted_batches
 from goldenverba.components.types import InputConfig
 
 try:
     from sentence_transformers import SentenceTransformer
 except Exception as e:
-    pass
+    SentenceTransformer = None
+
+# torch: the model as published, int8: Linear layers dynamically quantized to int8 on CPU,
+# onnx: ONNX Runtime on CPU (requires sentence-transformers>=3.2 with optimum[onnxruntime])
+BACKENDS = ["torch", "int8", "onnx"]
+
+# Rough token estimate, it only has to group texts of similar length
+CHARS_PER_TOKEN = 4
+
+
+def get_default_backend() -> str:
+    backend = os.getenv("VERBA_EMBEDDING_BACKEND", "torch").lower()
+    if backend not in BACKENDS:
+        msg.warn(f"Unknown VERBA_EMBEDDING_BACKEND {backend}, using torch")
+        return "torch"
+    return backend
+
+
+def load_sentence_transformer(key: tuple[str, str]):
+    """Load a model for one of the BACKENDS, key is (model name, backend)"""
+    model_name, backend = key
+    if SentenceTransformer is None:
+        raise Exception("sentence_transformers is not installed")
+
+    threads = int(os.getenv("VERBA_EMBEDDING_THREADS", 0))
+    if backend == "onnx":
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if threads:
+            import onnxruntime
+
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs["session_options"] = session_options
+        try:
+            return SentenceTransformer(
+                model_name, backend="onnx", model_kwargs=model_kwargs
+            )
+        except TypeError:
+            raise Exception(
+                "The onnx backend requires sentence-transformers>=3.2, install goldenverba[onnx]"
+            )
+
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    if backend == "int8":
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return SentenceTransformer(model_name)
+
+
+# Every model is loaded once per process and backend and shared by all imports and queries
+model_registry = ModelRegistry(
+    load_sentence_transformer,
+    max_size_mb=float(os.getenv("VERBA_MODEL_MEMORY_MB", 0)),
+)
+
+
+def encode_batched(model, content: list[str]) -> list[list[float]]:
+    """Encode texts in length-sorted batches of at most VERBA_EMBEDDING_BATCH_TOKENS padded tokens,
+    the vectors are returned in the order of content.
+    """
+    max_tokens = int(os.getenv("VERBA_EMBEDDING_BATCH_TOKENS", 8192))
+    max_batch_size = int(os.getenv("VERBA_EMBEDDING_MAX_BATCH", 128))
+    max_length = getattr(model, "max_seq_length", None) or 512
+    lengths = [min(len(text) // CHARS_PER_TOKEN + 2, max_length) for text in content]
+
+    vectors = [None] * len(content)
+    for batch in length_sorted_batches(lengths, max_tokens, max_batch_size):
+        embeddings = model.encode(
+            [content[i] for i in batch], batch_size=len(batch), convert_to_numpy=True
+        )
+        for i, embedding in zip(batch, embeddings.tolist()):
+            vectors[i] = embedding
+    return vectors
+
+
+def encode(model_name: str, backend: str, content: list[str]) -> list[list[float]]:
+    with model_registry.use((model_name, backend)) as model:
+        return encode_batched(model, content)
+
+
+def warm_up(model_names: list[str]):
+    """Load the models and run one encoding, so the first query doesn't pay for it"""
+    if SentenceTransformer is None:
+        msg.warn("sentence_transformers is not installed, skipping model warm up")
+        return
+    backend = get_default_backend()
+    for model_name in model_names:
+        try:
+            encode(model_name, backend, ["Warm up"])
+            msg.good(f"Warmed up {model_name} ({backend})")
+        except Exception as e:
+            msg.warn(f"Failed to warm up {model_name}: {str(e)}")
 
 
 class SentenceTransformersEmbedder(Embedding):
@@ -31,13 +133,18 @@ class SentenceTransformersEmbedder(Embedding):
                     "paraphrase-MiniLM-L6-v2",
                 ],
             ),
+            "Backend": InputConfig(
+                type="dropdown",
+                value=get_default_backend(),
+                description="Run the model with torch, int8-quantized on CPU or with ONNX Runtime",
+                values=BACKENDS,
+            ),
         }
 
     async def vectorize(self, config: dict, content: list[str]) -> list[float]:
         try:
             model_name = config.get("Model").value
-            model = SentenceTransformer(model_name)
-            embeddings = model.encode(content).tolist()
-            return embeddings
+            backend = config["Backend"].value if "Backend" in config else "torch"
+            return await run_embedding(encode, model_name, backend, content)
         except Exception as e:
             raise Exception(f"Failed to vectorize chunks: {str(e)}")
@@ -7,6 +7,8 @@ import aiohttp
 from wasabi import msg
 
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.retry import wrap_client_error
+from goldenverba.components.sessions import http_session
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment, get_token
 
@@ -21,6 +23,8 @@ class UpstageEmbedder(Embedding):
             "Vectorizes documents and queries using Upstage Solar Embeddings"
         )
         self.max_batch_size = 100
+        self.max_batch_tokens = 204800
+        self.max_tokens = 4000
 
         # Fetch available models
         api_key = get_token("UPSTAGE_API_KEY")
@@ -72,7 +76,7 @@ class UpstageEmbedder(Embedding):
         payload_bytes = json.dumps(payload).encode("utf-8")
         payload_io = io.BytesIO(payload_bytes)
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session(base_url) as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -95,9 +99,8 @@ class UpstageEmbedder(Embedding):
                     return embeddings
 
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
-                raise Exception(f"API request failed: {str(e)}")
+                # Throttled and failed batches are retried by EmbeddingManager.batch_vectorize
+                raise wrap_client_error(e, f"API request failed: {str(e)}")
 
             except Exception as e:
                 msg.fail(f"Unexpected error: {type(e).__name__} - {str(e)}")
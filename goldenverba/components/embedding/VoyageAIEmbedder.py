@@ -7,6 +7,8 @@ import aiohttp
 from wasabi import msg
 
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.retry import wrap_client_error
+from goldenverba.components.sessions import http_session
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment
 
@@ -18,6 +20,8 @@ class VoyageAIEmbedder(Embedding):
         super().__init__()
         self.name = "VoyageAI"
         self.description = "Vectorizes documents and queries using VoyageAI"
+        # Token limit of a request to voyage-3, the API truncates long inputs itself
+        self.max_batch_tokens = 120000
 
         # Fetch available models
         api_key = os.getenv("VOYAGE_API_KEY")
@@ -66,7 +70,7 @@ class VoyageAIEmbedder(Embedding):
         }
         payload = {"input": content, "model": model}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session(base_url) as session:
             try:
                 async with session.post(
                     f"{base_url}/embeddings",
@@ -92,9 +96,8 @@ class VoyageAIEmbedder(Embedding):
                     return embeddings
 
             except aiohttp.ClientError as e:
-                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
-                    raise Exception("Rate limit exceeded. Waiting before retrying...")
-                raise Exception(f"API request failed: {str(e)}")
+                # Throttled and failed batches are retried by EmbeddingManager.batch_vectorize
+                raise wrap_client_error(e, f"API request failed: {str(e)}")
 
             except Exception as e:
                 msg.fail(f"Unexpected error: {type(e).__name__} - {str(e)}")
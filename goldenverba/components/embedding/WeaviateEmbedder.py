@@ -1,9 +1,9 @@
 import os
 import requests
 from wasabi import msg
-import aiohttp
 
 from goldenverba.components.interfaces import Embedding
+from goldenverba.components.sessions import http_session
 from goldenverba.components.types import InputConfig
 from goldenverba.components.util import get_environment
 
@@ -64,7 +64,7 @@ class WeaviateEmbedder(Embedding):
 
         data = {"is_search_query": False, "texts": content}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session(base_url) as session:
             async with session.post(
                 base_url + path, json=data, headers={"Authorization": f"{api_key}"}
             ) as response:
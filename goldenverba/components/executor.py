@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from wasabi import msg
+
+# Where CPU-bound reading and chunking runs: "thread", "process" or "none" (on the event loop)
+EXECUTOR_TYPES = ["thread", "process", "none"]
+
+executor_type = os.getenv("VERBA_CPU_EXECUTOR", "thread").lower()
+if executor_type not in EXECUTOR_TYPES:
+    msg.warn(f"Unknown VERBA_CPU_EXECUTOR {executor_type}, using thread")
+    executor_type = "thread"
+
+cpu_workers = int(os.getenv("VERBA_CPU_WORKERS", 0)) or (os.cpu_count() or 1)
+
+executor: Executor | None = None
+# Used by run_process when the shared executor is not a process pool
+process_executor: ProcessPoolExecutor | None = None
+# Runs local embedding models, separate from the CPU executor so imports don't queue behind queries
+embedding_executor: ThreadPoolExecutor | None = None
+
+
+def cpu_offload_enabled() -> bool:
+    return executor_type != "none"
+
+
+def process_offload_enabled() -> bool:
+    return executor_type == "process"
+
+
+def get_executor() -> Executor | None:
+    """Returns the shared executor for CPU-bound work, created on first use"""
+    global executor
+    if executor is None and executor_type == "thread":
+        executor = ThreadPoolExecutor(
+            max_workers=cpu_workers, thread_name_prefix="verba-cpu"
+        )
+    elif executor is None and executor_type == "process":
+        executor = ProcessPoolExecutor(
+            max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return executor
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Run a CPU-bound function without blocking the event loop.
+    With the process executor, func must be a module-level function and its arguments and result must be picklable.
+    @parameter: func : Callable - Synchronous function to run
+    @returns the result of func
+    """
+    pool = get_executor()
+    if pool is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+
+async def run_process(func, *args, **kwargs):
+    """Run a CPU-bound function in a worker process, for libraries that are not thread-safe (e.g. PyMuPDF).
+    Uses the shared executor if it is a process pool, otherwise a separate pool of VERBA_CPU_WORKERS processes.
+    func must be a module-level function and its arguments and result must be picklable.
+    """
+    global process_executor
+    if executor_type == "none":
+        return func(*args, **kwargs)
+    pool = get_executor()
+    if not isinstance(pool, ProcessPoolExecutor):
+        if process_executor is None:
+            process_executor = ProcessPoolExecutor(
+                max_workers=cpu_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        pool = process_executor
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+
+async def run_embedding(func, *args, **kwargs):
+    """Run local model inference on a dedicated pool of VERBA_EMBEDDING_WORKERS threads.
+    Models stay loaded in this process and torch or ONNX Runtime release the GIL while they compute.
+    """
+    global embedding_executor
+    if embedding_executor is None:
+        embedding_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("VERBA_EMBEDDING_WORKERS", 1)),
+            thread_name_prefix="verba-embed",
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        embedding_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executor():
+    global executor, process_executor, embedding_executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+    if process_executor is not None:
+        process_executor.shutdown(wait=False, cancel_futures=True)
+        process_executor = None
+    if embedding_executor is not None:
+        embedding_executor.shutdown(wait=False, cancel_futures=True)
+        embedding_executor = None
@@ -52,6 +52,44 @@ class VerbaComponent:
         return True
 
 
+class SyncState:
+    """
+    Documents stored by a previous import of the same source, so readers only load what changed.
+    Readers call is_unchanged for every document of the source, the ones never seen were removed from it.
+    Versions include a fingerprint of the import settings, so changing e.g. the Chunker loads every document again.
+    """
+
+    def __init__(
+        self, key: str, versions: dict[str, str] = None, fingerprint: str = ""
+    ):
+        self.key = key
+        self.versions = versions or {}
+        self.fingerprint = fingerprint
+        self.seen: set[str] = set()
+
+    def version(self, version: str) -> str:
+        return f"{version}@{self.fingerprint}" if self.fingerprint else version
+
+    def is_current(self, title: str, version: str) -> bool:
+        """Whether the stored document has the given version, without marking it as seen"""
+        return self.versions.get(title) == self.version(version)
+
+    def is_unchanged(self, title: str, version: str) -> bool:
+        self.seen.add(title)
+        return self.is_current(title, version)
+
+    def keep(self, title: str):
+        """Keep a document the reader couldn't check, e.g. because its source failed to load"""
+        self.seen.add(title)
+
+    def track(self, document: Document, version: str):
+        document.sync_key = self.key
+        document.sync_version = self.version(version)
+
+    def removed(self) -> list[str]:
+        return [title for title in self.versions if title not in self.seen]
+
+
 class Reader(VerbaComponent):
     """
     Interface for Verba Readers.
@@ -69,6 +107,23 @@ class Reader(VerbaComponent):
         """
         raise NotImplementedError("load method must be implemented by a subclass.")
 
+    async def load_stream(
+        self, config: dict, fileConfig: FileConfig, sync: SyncState = None
+    ):
+        """Yield Verba Documents as soon as they are available. Readers that can produce documents incrementally should override this.
+        @parameter: fileConfig: FileConfig - FileConfiguration sent by the frontend
+        @parameter: sync: SyncState - Previously imported documents, only given if get_sync_key returns a key
+        @returns AsyncIterator[Document] - Verba documents
+        """
+        for document in await self.load(config, fileConfig):
+            yield document
+
+    def get_sync_key(self, config: dict, fileConfig: FileConfig) -> str:
+        """Key of the source for incremental syncs, readers that support them set it as sync_key on their documents
+        @returns str - Key of the source, empty if the reader doesn't support incremental syncs
+        """
+        return ""
+
 
 class Embedding(VerbaComponent):
     """
@@ -78,6 +133,9 @@ class Embedding(VerbaComponent):
     def __init__(self):
         super().__init__()
         self.max_batch_size = 128
+        # Tokens of one request and of one input, None for embedders without limits (or that truncate themselves)
+        self.max_batch_tokens: int | None = None
+        self.max_tokens: int | None = None
 
     async def vectorize(self, config: dict, content: list[str]) -> list[float]:
         """Embed verba documents and its chunks to Weaviate
@@ -96,6 +154,10 @@ class Chunker(VerbaComponent):
     def __init__(self):
         super().__init__()
         self.config = {}
+        # CPU-bound chunkers run on the CPU executor, chunkers that await I/O (e.g. an embedder) stay on the event loop
+        self.cpu_bound = True
+        # Chunkers that use document.spacy_doc, documents are only parsed by spaCy for them
+        self.requires_spacy = False
 
     async def chunk(
         self,
@@ -113,6 +175,29 @@ class Chunker(VerbaComponent):
         """
         raise NotImplementedError("chunk method must be implemented by a subclass.")
 
+    async def chunk_stream(
+        self,
+        config: dict,
+        document: Document,
+        embedder: Embedding | None = None,
+        embedder_config: dict | None = None,
+        batch_size: int = 128,
+    ):
+        """Yield the chunks of a single Verba document in batches, without storing them on the document. Chunkers that can split incrementally should override this,
+        the ChunkerManager runs CPU-bound chunkers that don't on the CPU executor instead of this default.
+        @parameter: config : dict - Chunker Configuration
+        @parameter: document : Document - Verba document to chunk
+        @parameter: embedder : Embedding | None - (Optional) Selected Embedder if the Chunker requires vectorization
+        @parameter: embedder_config : dict | None - (Optional) Embedder Configuration
+        @parameter: batch_size : int - Maximum number of chunks per yielded batch
+        @returns AsyncIterator[list[Chunk]]
+        """
+        documents = await self.chunk(config, [document], embedder, embedder_config)
+        chunks = documents[0].chunks
+        documents[0].chunks = []
+        for i in range(0, len(chunks), batch_size):
+            yield chunks[i : i + batch_size]
+
 
 class Retriever(VerbaComponent):
     """
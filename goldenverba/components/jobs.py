@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from goldenverba.components.util import get_data_dir
+
+
+class JobStatus:
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class DocumentStage:
+    CHUNKED = "CHUNKED"
+    VECTORIZED = "VECTORIZED"
+    INGESTED = "INGESTED"
+
+
+def hash_key(key: str) -> str:
+    return hashlib.sha256((key or "").encode("utf-8")).hexdigest()
+
+
+def job_credentials(credentials: dict) -> dict:
+    """Credentials stored with a job: the deployment and URL, but only a hash of the API key"""
+    if "key_hash" in credentials:
+        return credentials
+    return {
+        "deployment": credentials.get("deployment", ""),
+        "url": credentials.get("url", ""),
+        "key_hash": hash_key(credentials.get("key", "")),
+    }
+
+
+def credentials_match(stored: dict, credentials: dict) -> bool:
+    """Whether credentials (with their API key) belong to the stored credentials of a job"""
+    return job_credentials(stored) == job_credentials(credentials)
+
+
+def strip_secrets(rag_config: dict) -> dict[tuple[str, str, str], str]:
+    """Blank every password setting of a RAG config (e.g. API keys of Embedders, Generators and Readers)
+    @parameter: rag_config : dict[str, RAGComponentClass] - Config of a FileConfig, changed in place
+    @returns dict[tuple[str, str, str], str] - Removed values by component type, component and setting
+    """
+    secrets = {}
+    for component_type, component_class in rag_config.items():
+        for name, component in component_class.components.items():
+            for setting_name, setting in component.config.items():
+                if setting.type == "password" and setting.value:
+                    secrets[(component_type, name, setting_name)] = setting.value
+                    setting.value = ""
+    return secrets
+
+
+def restore_secrets(rag_config: dict, secrets: dict[tuple[str, str, str], str]):
+    """Put the values of blanked password settings back, settings that are set are kept"""
+    for (component_type, name, setting_name), value in secrets.items():
+        component_class = rag_config.get(component_type)
+        if component_class is None or name not in component_class.components:
+            continue
+        setting = component_class.components[name].config.get(setting_name)
+        if setting is not None and setting.type == "password" and not setting.value:
+            setting.value = value
+
+
+def config_secrets(config: dict) -> dict[tuple[str, str, str], str]:
+    """Password settings of a stored RAG config (as JSON)"""
+    return {
+        (component_type, name, setting_name): setting["value"]
+        for component_type, component_class in config.items()
+        for name, component in component_class.get("components", {}).items()
+        for setting_name, setting in component.get("config", {}).items()
+        if setting.get("type") == "password" and setting.get("value")
+    }
+
+
+class JobStore:
+    """
+    Persistent store for import jobs, backed by SQLite inside the Verba data dir.
+    Records every imported file with its FileConfig, the pipeline stage of each of its documents and the latest status report per file,
+    so imports survive closed browser tabs and server restarts. API keys are never stored, jobs only keep a hash to recognize them
+    and the password settings of their FileConfig are blanked.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_data_dir(), "jobs.sqlite")
+        self.content_dir = os.path.join(os.path.dirname(self.path), "jobs")
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            os.makedirs(self.content_dir, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    credentials TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS documents (
+                    job_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (job_id, title)
+                );
+                CREATE TABLE IF NOT EXISTS reports (
+                    job_id TEXT NOT NULL,
+                    file_id TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    took REAL NOT NULL,
+                    PRIMARY KEY (job_id, file_id)
+                );
+                """
+            )
+            # Jobs of earlier versions stored the API key itself
+            for job_id, credentials in self.connection.execute(
+                "SELECT job_id, credentials FROM jobs WHERE credentials NOT LIKE '%key_hash%'"
+            ).fetchall():
+                self.connection.execute(
+                    "UPDATE jobs SET credentials = ? WHERE job_id = ?",
+                    (json.dumps(job_credentials(json.loads(credentials))), job_id),
+                )
+            self.connection.commit()
+        return self.connection
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def content_path(self, job_id: str) -> str:
+        # Job ids are chosen by the client, never use them as a path directly
+        name = hashlib.sha256(job_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.content_dir, f"{name}.json")
+
+    def add_job(self, job_id: str, filename: str, file_config: str, credentials: dict):
+        """Persist a new job, the serialized FileConfig is written next to the database.
+        The API key of the credentials is only stored as hash, it has to be given again to resume the job after a restart
+        """
+        with self.lock:
+            connection = self.connect()
+            with open(self.content_path(job_id), "w", encoding="utf-8") as f:
+                f.write(file_config)
+            now = time.time()
+            connection.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, filename, status, credentials, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    filename,
+                    JobStatus.QUEUED,
+                    json.dumps(job_credentials(credentials)),
+                    now,
+                    now,
+                ),
+            )
+            connection.execute("DELETE FROM documents WHERE job_id = ?", (job_id,))
+            connection.execute("DELETE FROM reports WHERE job_id = ?", (job_id,))
+            connection.commit()
+
+    def get_file_config(self, job_id: str) -> str | None:
+        path = self.content_path(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def get_job(self, job_id: str) -> dict | None:
+        jobs = [job for job in self.get_jobs() if job["job_id"] == job_id]
+        return jobs[0] if jobs else None
+
+    def set_job_status(self, job_id: str, status: str):
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE job_id = ?",
+                (status, time.time(), job_id),
+            )
+            connection.commit()
+            if status in (JobStatus.DONE, JobStatus.FAILED):
+                # The uploaded content is only needed to resume the job
+                path = self.content_path(job_id)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def get_jobs(self, statuses: list[str] = None) -> list[dict]:
+        with self.lock:
+            connection = self.connect()
+            query = "SELECT job_id, filename, status, credentials, created, updated FROM jobs"
+            params = []
+            if statuses:
+                query += f" WHERE status IN ({','.join('?' * len(statuses))})"
+                params = statuses
+            rows = connection.execute(
+                query + " ORDER BY created ASC", params
+            ).fetchall()
+        return [
+            {
+                "job_id": job_id,
+                "filename": filename,
+                "status": status,
+                "credentials": json.loads(credentials),
+                "created": created,
+                "updated": updated,
+            }
+            for job_id, filename, status, credentials, created, updated in rows
+        ]
+
+    def set_document_stage(self, job_id: str, title: str, stage: str):
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO documents (job_id, title, stage, updated) VALUES (?, ?, ?, ?)",
+                (job_id, title, stage, time.time()),
+            )
+            connection.commit()
+
+    def get_document_stages(self, job_id: str) -> dict[str, str]:
+        with self.lock:
+            connection = self.connect()
+            rows = connection.execute(
+                "SELECT title, stage FROM documents WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {title: stage for title, stage in rows}
+
+    def set_report(
+        self,
+        job_id: str,
+        file_id: str,
+        filename: str,
+        status: str,
+        message: str,
+        took: float,
+    ):
+        """Keep the latest status report of every file of a job"""
+        with self.lock:
+            connection = self.connect()
+            connection.execute(
+                "INSERT INTO reports (job_id, file_id, filename, status, message, took) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, file_id) DO UPDATE SET status = excluded.status, message = excluded.message, took = excluded.took",
+                (job_id, file_id, filename, status, message, took),
+            )
+            connection.commit()
+
+    def get_reports(self, job_id: str) -> list[dict]:
+        with self.lock:
+            connection = self.connect()
+            rows = connection.execute(
+                "SELECT file_id, filename, status, message, took FROM reports WHERE job_id = ?",
+                (job_id,),
+            ).fetchall()
+        return [
+            {
+                "fileID": file_id,
+                "filename": filename,
+                "status": status,
+                "message": message,
+                "took": took,
+            }
+            for file_id, filename, status, message, took in rows
+        ]
+
+    def delete_finished_jobs(self, older_than: float):
+        """Remove finished jobs last updated before the given timestamp"""
+        with self.lock:
+            connection = self.connect()
+            finished = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT job_id FROM jobs WHERE status IN (?, ?) AND updated < ?",
+                    (JobStatus.DONE, JobStatus.FAILED, older_than),
+                )
+            ]
+            for job_id in finished:
+                connection.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                connection.execute("DELETE FROM documents WHERE job_id = ?", (job_id,))
+                connection.execute("DELETE FROM reports WHERE job_id = ?", (job_id,))
+            connection.commit()
@@ -12,15 +12,39 @@ import os
 import asyncio
 import json
 import re
+import itertools
+from typing import Iterable
+from uuid import uuid4
 from urllib.parse import urlparse
 from datetime import datetime
 
 from sklearn.decomposition import PCA
 
 
-from goldenverba.components.document import Document
+from goldenverba.components.document import (
+    Document,
+    language_inputs,
+    parse_contents,
+    parse_documents,
+)
+from goldenverba.components.chunk import Chunk
+from goldenverba.components.batching import (
+    combine_vectors,
+    fit_inputs,
+    get_oversized_mode,
+    pack_batches,
+)
+from goldenverba.components.cache import EmbeddingCache
+from goldenverba.components.executor import run_cpu, cpu_offload_enabled
+from goldenverba.components.retry import (
+    RetryBudget,
+    get_backoff,
+    get_retry_after,
+    is_retryable,
+)
 from goldenverba.components.interfaces import (
     Reader,
+    SyncState,
     Chunker,
     Embedding,
     Retriever,
@@ -171,6 +195,8 @@ class WeaviateManager:
         self.config_collection_name = "VERBA_CONFIGURATION"
         self.suggestion_collection_name = "VERBA_SUGGESTIONS"
         self.embedding_table = {}
+        # Default QUERY_MAXIMUM_RESULTS of Weaviate, offset and limit of a query can't exceed it
+        self.query_maximum_results = 10000
 
     ### Connection Handling
 
@@ -401,57 +427,160 @@ class WeaviateManager:
     async def import_document(
         self, client: WeaviateAsyncClient, document: Document, embedder: str
     ):
+        doc_uuid = await self.insert_document_object(client, document, embedder)
+        try:
+            await self.insert_chunks(
+                client, document, document.chunks, doc_uuid, embedder
+            )
+            await self.verify_chunk_count(
+                client, doc_uuid, len(document.chunks), embedder
+            )
+            await self.set_document_hashes(client, doc_uuid, document)
+        except Exception as e:
+            if doc_uuid:
+                await self.delete_document(client, doc_uuid)
+            raise Exception(f"Chunk import failed with : {str(e)}")
+
+    async def update_document(
+        self,
+        client: WeaviateAsyncClient,
+        doc_uuid: str,
+        document: Document,
+        embedder: str,
+        removed_chunks: list[str],
+    ):
+        """Replace a stored document in place. Chunks with a uuid overwrite the stored chunk, new chunks are inserted and removed chunks are deleted.
+        New chunks are written first, if that fails they are deleted again and the previous version stays untouched.
+        """
         if await self.verify_collection(
             client, self.document_collection_name
         ) and await self.verify_embedding_collection(client, embedder):
             document_collection = client.collections.get(self.document_collection_name)
             embedder_collection = client.collections.get(self.embedding_table[embedder])
+            reused_chunks = [chunk for chunk in document.chunks if chunk.uuid]
+            new_chunks = [chunk for chunk in document.chunks if not chunk.uuid]
+            # Known uuids, so partially inserted chunks can be deleted
+            for chunk in new_chunks:
+                chunk.uuid = str(uuid4())
+            try:
+                if new_chunks:
+                    await self.insert_chunks(
+                        client, document, new_chunks, doc_uuid, embedder
+                    )
+                await self.verify_chunk_count(
+                    client,
+                    doc_uuid,
+                    len(reused_chunks) + len(removed_chunks) + len(new_chunks),
+                    embedder,
+                )
+            except Exception as e:
+                new_uuids = [chunk.uuid for chunk in new_chunks]
+                for i in range(0, len(new_uuids), 1000):
+                    await embedder_collection.data.delete_many(
+                        where=Filter.by_id().contains_any(new_uuids[i : i + 1000])
+                    )
+                raise Exception(f"Chunk import failed with : {str(e)}")
 
-            ### Import Document
             document_obj = Document.to_json(document)
-            doc_uuid = await document_collection.data.insert(document_obj)
-
-            chunk_ids = []
-
+            # Without hashes a document that fails from here on is imported again by the next import
+            document_obj["content_hash"] = ""
+            document_obj["config_hash"] = ""
             try:
-                for chunk in document.chunks:
-                    chunk.doc_uuid = doc_uuid
-                    chunk.labels = document.labels
-                    chunk.title = document.title
-
-                chunk_response = await embedder_collection.data.insert_many(
-                    [
-                        DataObject(properties=chunk.to_json(), vector=chunk.vector)
-                        for chunk in document.chunks
-                    ]
+                await document_collection.data.replace(
+                    uuid=doc_uuid, properties=document_obj
                 )
-                chunk_ids = [
-                    chunk_response.uuids[uuid] for uuid in chunk_response.uuids
-                ]
-
-                if chunk_response.has_errors:
-                    raise Exception(
-                        f"Failed to ingest chunks into Weaviate: {chunk_response.errors}"
+                for i in range(0, len(removed_chunks), 1000):
+                    await embedder_collection.data.delete_many(
+                        where=Filter.by_id().contains_any(removed_chunks[i : i + 1000])
                     )
-
-                if doc_uuid and chunk_response:
-                    response = await embedder_collection.aggregate.over_all(
-                        filters=Filter.by_property("doc_uuid").equal(doc_uuid),
-                        total_count=True,
+                if reused_chunks:
+                    # Updates the chunk ids, labels and title of the unchanged chunks
+                    await self.insert_chunks(
+                        client, document, reused_chunks, doc_uuid, embedder
                     )
-                    if response.total_count != len(document.chunks):
-                        await document_collection.data.delete_by_id(doc_uuid)
-                        for _id in chunk_ids:
-                            await embedder_collection.data.delete_by_id(_id)
-                        raise Exception(
-                            f"Chunk Mismatch detected after importing: Imported:{response.total_count} | Existing: {len(document.chunks)}"
-                        )
-
+                await self.verify_chunk_count(
+                    client, doc_uuid, len(document.chunks), embedder
+                )
+                await self.set_document_hashes(client, doc_uuid, document)
             except Exception as e:
-                if doc_uuid:
-                    await self.delete_document(client, doc_uuid)
                 raise Exception(f"Chunk import failed with : {str(e)}")
 
+    async def insert_document_object(
+        self, client: WeaviateAsyncClient, document: Document, embedder: str
+    ) -> str:
+        """Insert the document object without its chunks, returns the document uuid"""
+        if await self.verify_collection(
+            client, self.document_collection_name
+        ) and await self.verify_embedding_collection(client, embedder):
+            document_collection = client.collections.get(self.document_collection_name)
+            document_obj = Document.to_json(document)
+            # Hashes are only written once all chunks are stored, so an interrupted import is never treated as unchanged
+            document_obj["content_hash"] = ""
+            document_obj["config_hash"] = ""
+            return await document_collection.data.insert(document_obj)
+
+    async def set_document_hashes(
+        self, client: WeaviateAsyncClient, doc_uuid: str, document: Document
+    ):
+        """Mark a document as completely imported by storing its content and config hashes"""
+        if document.content_hash or document.config_hash:
+            document_collection = client.collections.get(self.document_collection_name)
+            await document_collection.data.update(
+                uuid=doc_uuid,
+                properties={
+                    "content_hash": document.content_hash,
+                    "config_hash": document.config_hash,
+                },
+            )
+
+    async def insert_chunks(
+        self,
+        client: WeaviateAsyncClient,
+        document: Document,
+        chunks: list,
+        doc_uuid: str,
+        embedder: str,
+    ) -> list[str]:
+        """Insert vectorized chunks of a document, returns the uuids of the inserted chunks"""
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+
+            for chunk in chunks:
+                chunk.doc_uuid = doc_uuid
+                chunk.labels = document.labels
+                chunk.title = document.title
+
+            chunk_response = await embedder_collection.data.insert_many(
+                [
+                    DataObject(
+                        properties=chunk.to_json(), vector=chunk.vector, uuid=chunk.uuid
+                    )
+                    for chunk in chunks
+                ]
+            )
+
+            if chunk_response.has_errors:
+                raise Exception(
+                    f"Failed to ingest chunks into Weaviate: {chunk_response.errors}"
+                )
+
+            return [chunk_response.uuids[uuid] for uuid in chunk_response.uuids]
+
+    async def verify_chunk_count(
+        self, client: WeaviateAsyncClient, doc_uuid: str, expected: int, embedder: str
+    ):
+        """Raise if the number of stored chunks of a document does not match the expected count"""
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            response = await embedder_collection.aggregate.over_all(
+                filters=Filter.by_property("doc_uuid").equal(doc_uuid),
+                total_count=True,
+            )
+            if response.total_count != expected:
+                raise Exception(
+                    f"Chunk Mismatch detected after importing: Imported:{response.total_count} | Existing: {expected}"
+                )
+
     ### Document CRUD
 
     async def exist_document_name(self, client: WeaviateAsyncClient, name: str) -> str:
@@ -470,6 +599,98 @@ class WeaviateManager:
 
             return None
 
+    async def get_document_by_name(self, client: WeaviateAsyncClient, name: str):
+        """Returns the stored document object with the given title or None"""
+        if await self.verify_collection(client, self.document_collection_name):
+            document_collection = client.collections.get(self.document_collection_name)
+            aggregation = await document_collection.aggregate.over_all(total_count=True)
+            if aggregation.total_count == 0:
+                return None
+            # Collections created before hashes and sync keys were stored don't know the properties yet
+            for return_properties in [
+                ["title", "content_hash", "config_hash", "sync_key"],
+                ["title", "content_hash", "config_hash"],
+                ["title"],
+            ]:
+                try:
+                    documents = await document_collection.query.fetch_objects(
+                        filters=Filter.by_property("title").equal(name),
+                        return_properties=return_properties,
+                        limit=1,
+                    )
+                    break
+                except Exception:
+                    if return_properties == ["title"]:
+                        raise
+            if len(documents.objects) > 0:
+                return documents.objects[0]
+            return None
+
+    async def get_synced_documents(
+        self, client: WeaviateAsyncClient, sync_key: str, page_size: int = 1000
+    ) -> dict[str, tuple[str, str]]:
+        """Returns uuid and sync_version by title of the completely imported documents of a sync source"""
+        documents = {}
+        if await self.verify_collection(client, self.document_collection_name):
+            document_collection = client.collections.get(self.document_collection_name)
+            collection_config = await document_collection.config.get()
+            properties = {prop.name for prop in collection_config.properties}
+            if not {"sync_key", "sync_version", "content_hash"} <= properties:
+                # Collections without synced documents don't know the properties yet
+                return documents
+            return_properties = ["title", "sync_key", "sync_version", "content_hash"]
+            source = Filter.by_property("sync_key").equal(sync_key)
+            aggregation = await document_collection.aggregate.over_all(
+                filters=source, total_count=True
+            )
+            if aggregation.total_count > self.query_maximum_results:
+                # Offset paging is capped by the query limit of Weaviate, the cursor API is not but can't filter
+                documents_of_source = document_collection.iterator(
+                    return_properties=return_properties, cache_size=page_size
+                )
+            else:
+                documents_of_source = self.fetch_pages(
+                    document_collection,
+                    source,
+                    return_properties,
+                    page_size,
+                    aggregation.total_count,
+                )
+            async for document in documents_of_source:
+                # sync_key is a text property with word tokenization, the filter also matches other sources
+                if document.properties.get("sync_key") != sync_key:
+                    continue
+                # Interrupted imports have no hashes and are loaded again
+                if document.properties.get("content_hash"):
+                    documents[document.properties["title"]] = (
+                        str(document.uuid),
+                        document.properties.get("sync_version", ""),
+                    )
+        return documents
+
+    async def fetch_pages(
+        self,
+        collection,
+        filters,
+        return_properties: list[str],
+        page_size: int,
+        total_count: int,
+    ):
+        """Yields the objects matching the filters, fetched with offset paging up to their counted total"""
+        offset = 0
+        while offset < total_count:
+            response = await collection.query.fetch_objects(
+                filters=filters,
+                limit=min(page_size, total_count - offset),
+                offset=offset,
+                return_properties=return_properties,
+            )
+            for obj in response.objects:
+                yield obj
+            if not response.objects:
+                return
+            offset += len(response.objects)
+
     async def delete_document(self, client: WeaviateAsyncClient, uuid: str):
         if await self.verify_collection(client, self.document_collection_name):
             document_collection = client.collections.get(self.document_collection_name)
@@ -637,6 +858,34 @@ class WeaviateManager:
                     chunk["doc_uuid"] = str(chunk["doc_uuid"])
                 return chunks
 
+    async def get_chunk_vectors(
+        self,
+        client: WeaviateAsyncClient,
+        doc_uuid: str,
+        embedder: str,
+        page_size: int = 1000,
+    ) -> list:
+        """Returns all stored chunks of a document with their content and vector, ordered by chunk_id"""
+        if await self.verify_embedding_collection(client, embedder):
+            embedder_collection = client.collections.get(self.embedding_table[embedder])
+            chunks = []
+            last_chunk_id = -1
+            while True:
+                # Page by chunk_id, offset based paging is capped by the query limit of Weaviate
+                response = await embedder_collection.query.fetch_objects(
+                    filters=Filter.by_property("doc_uuid").equal(doc_uuid)
+                    & Filter.by_property("chunk_id").greater_than(last_chunk_id),
+                    sort=Sort.by_property("chunk_id", ascending=True),
+                    limit=page_size,
+                    include_vector=True,
+                    return_properties=["content", "chunk_id"],
+                )
+                chunks.extend(response.objects)
+                if len(response.objects) < page_size:
+                    return chunks
+                last_chunk_id = response.objects[-1].properties["chunk_id"]
+        return []
+
     async def get_vectors(
         self, client: WeaviateAsyncClient, uuid: str, showAll: bool
     ) -> dict:
@@ -962,20 +1211,32 @@ class ReaderManager:
         self.readers: dict[str, Reader] = {reader.name: reader for reader in readers}
 
     async def load(
-        self, reader: str, fileConfig: FileConfig, logger: LoggerManager
+        self,
+        reader: str,
+        fileConfig: FileConfig,
+        logger: LoggerManager,
+        file_source: str | bytes = None,
     ) -> list[Document]:
+        """Load the documents of a file
+        @parameter: file_source : str | bytes - Path or raw bytes of the file, read by the Default reader instead of the content of the fileConfig
+        """
         try:
             loop = asyncio.get_running_loop()
             start_time = loop.time()
             if reader in self.readers:
                 config = fileConfig.rag_config["Reader"].components[reader].config
-                documents: list[Document] = await self.readers[reader].load(
-                    config, fileConfig
-                )
+                if file_source is not None:
+                    documents: list[Document] = await self.readers[reader].load_source(
+                        config, fileConfig, file_source
+                    )
+                else:
+                    documents = await self.readers[reader].load(config, fileConfig)
                 for document in documents:
                     document.meta["Reader"] = (
                         fileConfig.rag_config["Reader"].components[reader].model_dump()
                     )
+                    if fileConfig.language:
+                        document.language = fileConfig.language
                 elapsed_time = round(loop.time() - start_time, 2)
                 if len(documents) == 1:
                     await logger.send_report(
@@ -1001,6 +1262,118 @@ class ReaderManager:
         except Exception as e:
             raise Exception(f"Reader {reader} failed with: {str(e)}")
 
+    def get_sync_key(self, reader: str, fileConfig: FileConfig) -> str:
+        if reader not in self.readers:
+            return ""
+        config = fileConfig.rag_config["Reader"].components[reader].config
+        return self.readers[reader].get_sync_key(config, fileConfig)
+
+    async def load_stream(
+        self,
+        reader: str,
+        fileConfig: FileConfig,
+        logger: LoggerManager,
+        sync: SyncState = None,
+    ):
+        """Yield documents of a reader as they are loaded. Readers without their own load_stream are loaded completely first, so their status reports keep their order."""
+        if reader not in self.readers:
+            raise Exception(f"{reader} Reader not found")
+
+        if type(self.readers[reader]).load_stream is Reader.load_stream:
+            for document in await self.load(reader, fileConfig, logger):
+                yield document
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+            start_time = loop.time()
+            config = fileConfig.rag_config["Reader"].components[reader].config
+            reader_meta = (
+                fileConfig.rag_config["Reader"].components[reader].model_dump()
+            )
+            count = 0
+            async for document in self.readers[reader].load_stream(
+                config, fileConfig, sync
+            ):
+                document.meta["Reader"] = reader_meta
+                if fileConfig.language:
+                    document.language = fileConfig.language
+                count += 1
+                yield document
+            await logger.send_report(
+                fileConfig.fileID,
+                FileStatus.LOADING,
+                f"Loaded {fileConfig.filename} with {count} documents",
+                took=round(loop.time() - start_time, 2),
+            )
+            await logger.send_report(fileConfig.fileID, FileStatus.CHUNKING, "", took=0)
+        except Exception as e:
+            raise Exception(f"Reader {reader} failed with: {str(e)}")
+
+
+def run_chunker(
+    chunker: Chunker, config: dict, documents: list[Document]
+) -> list[Document]:
+    """Runs a CPU-bound chunker to completion, executed on the CPU executor"""
+    if chunker.requires_spacy:
+        parse_documents(documents)
+    return asyncio.run(chunker.chunk(config=config, documents=documents))
+
+
+def make_chunks(
+    contents: Iterable[str], chunk_id: int = 0, offset: int = 0
+) -> list[Chunk]:
+    """Chunks of documents their reader splits itself, numbered from chunk_id and offset"""
+    chunks = []
+    for content in contents:
+        chunks.append(
+            Chunk(
+                content=content,
+                chunk_id=chunk_id,
+                start_i=offset,
+                end_i=offset + len(content),
+                content_without_overlap=content,
+            )
+        )
+        chunk_id += 1
+        offset += len(content)
+    return chunks
+
+
+def read_source_chunks(chunk_source) -> list[Chunk]:
+    """Reads all chunks of a chunk source, executed on the CPU executor"""
+    return make_chunks(chunk_source())
+
+
+async def stream_source_chunks(document: Document, batch_size: int):
+    """Yield the chunks of a document's chunk source in batches, only one batch is read at a time"""
+    contents = document.chunk_source()
+    chunk_id = 0
+    offset = 0
+    try:
+        while True:
+            batch = await asyncio.to_thread(
+                list, itertools.islice(contents, batch_size)
+            )
+            if not batch:
+                return
+            chunks = make_chunks(batch, chunk_id, offset)
+            chunk_id += len(chunks)
+            offset = chunks[-1].end_i
+            yield chunks
+    finally:
+        contents.close()
+
+
+async def stream_chunked_document(
+    chunker: Chunker, config: dict, document: Document, batch_size: int
+):
+    """Yield the chunks of a chunker that can't split incrementally in batches, the document is chunked on the CPU executor"""
+    chunked_documents = await run_cpu(run_chunker, chunker, config, [document])
+    chunks = chunked_documents[0].chunks
+    for i in range(0, len(chunks), batch_size):
+        yield chunks[i : i + batch_size]
+
 
 class ChunkerManager:
     def __init__(self):
@@ -1020,16 +1393,38 @@ class ChunkerManager:
             loop = asyncio.get_running_loop()
             start_time = loop.time()
             if chunker in self.chunkers:
+                for document in documents:
+                    # Split by their reader, the chunker skips documents that have chunks
+                    if document.chunk_source is not None and not document.chunks:
+                        document.chunks = await run_cpu(
+                            read_source_chunks, document.chunk_source
+                        )
                 config = fileConfig.rag_config["Chunker"].components[chunker].config
                 embedder_config = (
                     fileConfig.rag_config["Embedder"].components[embedder.name].config
                 )
-                chunked_documents = await self.chunkers[chunker].chunk(
-                    config=config,
-                    documents=documents,
-                    embedder=embedder,
-                    embedder_config=embedder_config,
-                )
+                if self.chunkers[chunker].cpu_bound and cpu_offload_enabled():
+                    chunked_documents = await run_cpu(
+                        run_chunker, self.chunkers[chunker], config, documents
+                    )
+                else:
+                    if self.chunkers[chunker].requires_spacy:
+                        pending = [
+                            document
+                            for document in documents
+                            if not document.chunks and not document.is_parsed
+                        ]
+                        spacy_docs = await run_cpu(
+                            parse_contents, *language_inputs(pending)
+                        )
+                        for document, spacy_doc in zip(pending, spacy_docs):
+                            document.spacy_doc = spacy_doc
+                    chunked_documents = await self.chunkers[chunker].chunk(
+                        config=config,
+                        documents=documents,
+                        embedder=embedder,
+                        embedder_config=embedder_config,
+                    )
                 for chunked_document in chunked_documents:
                     chunked_document.meta["Chunker"] = (
                         fileConfig.rag_config["Chunker"]
@@ -1061,12 +1456,60 @@ class ChunkerManager:
         except Exception as e:
             raise e
 
+    def chunk_stream(
+        self,
+        chunker: str,
+        fileConfig: FileConfig,
+        document: Document,
+        embedder: Embedding,
+        batch_size: int = 128,
+    ):
+        """Returns an async iterator over the chunks of a single document, in batches as the chunker produces them"""
+        if chunker not in self.chunkers:
+            raise Exception(f"{chunker} Chunker not found")
+        config = fileConfig.rag_config["Chunker"].components[chunker].config
+        embedder_config = (
+            fileConfig.rag_config["Embedder"].components[embedder.name].config
+        )
+        document.meta["Chunker"] = (
+            fileConfig.rag_config["Chunker"].components[chunker].model_dump()
+        )
+        if document.chunk_source is not None:
+            return stream_source_chunks(document, batch_size)
+        if (
+            type(self.chunkers[chunker]).chunk_stream is Chunker.chunk_stream
+            and self.chunkers[chunker].cpu_bound
+            and cpu_offload_enabled()
+        ):
+            # The default chunk_stream would chunk the whole document on the event loop
+            return stream_chunked_document(
+                self.chunkers[chunker], config, document, batch_size
+            )
+        return self.chunkers[chunker].chunk_stream(
+            config=config,
+            document=document,
+            embedder=embedder,
+            embedder_config=embedder_config,
+            batch_size=batch_size,
+        )
+
 
 class EmbeddingManager:
     def __init__(self):
         self.embedders: dict[str, Embedding] = {
             embedder.name: embedder for embedder in embedders
         }
+        self.max_concurrent_batches = int(os.getenv("VERBA_EMBED_CONCURRENCY", 4))
+        self.semaphores: dict[str, asyncio.Semaphore] = {}
+        self.max_retries = int(os.getenv("VERBA_EMBED_MAX_RETRIES", 5))
+        self.retry_budget = float(os.getenv("VERBA_EMBED_RETRY_BUDGET", 0.5))
+        # Loop time until which no batch is sent to a throttled embedder
+        self.cooldowns: dict[str, float] = {}
+        self.cache: EmbeddingCache | None = None
+        if os.getenv("VERBA_EMBEDDING_CACHE", "True").lower() not in ("false", "0"):
+            self.cache = EmbeddingCache(
+                max_size_mb=float(os.getenv("VERBA_EMBEDDING_CACHE_SIZE_MB", 1024))
+            )
 
     async def vectorize(
         self,
@@ -1086,11 +1529,19 @@ class EmbeddingManager:
                 config = fileConfig.rag_config["Embedder"].components[embedder].config
 
                 for document in documents:
-                    content = [
-                        document.metadata + "\n" + chunk.content
-                        for chunk in document.chunks
+                    # Chunks kept from a previous import already have their vector
+                    missing = [
+                        chunk for chunk in document.chunks if chunk.vector is None
                     ]
-                    embeddings = await self.batch_vectorize(embedder, config, content)
+                    if missing:
+                        content = [
+                            document.metadata + "\n" + chunk.content
+                            for chunk in missing
+                        ]
+                        vectors = await self.batch_vectorize(embedder, config, content)
+                        for vector, chunk in zip(vectors, missing):
+                            chunk.vector = vector
+                    embeddings = [chunk.vector for chunk in document.chunks]
 
                     if len(embeddings) >= 3:
                         pca = PCA(n_components=3)
@@ -1101,10 +1552,7 @@ class EmbeddingManager:
                     else:
                         pca_embeddings = [embedding[0:3] for embedding in embeddings]
 
-                    for vector, chunk, pca_ in zip(
-                        embeddings, document.chunks, pca_embeddings
-                    ):
-                        chunk.vector = vector
+                    for chunk, pca_ in zip(document.chunks, pca_embeddings):
                         chunk.pca = pca_
 
                     document.meta["Embedder"] = (
@@ -1129,19 +1577,177 @@ class EmbeddingManager:
         except Exception as e:
             raise e
 
+    def vectorize_stream(
+        self,
+        embedder: str,
+        fileConfig: FileConfig,
+        document: Document,
+        chunk_batches,
+        max_pending: int = 4,
+    ):
+        """Vectorize chunks while they are still being produced. Batches are dispatched as soon as max_batch_size chunks are available
+        and yielded in order once their vectors are ready. PCA is fitted on the first batch and applied to all following batches.
+        @parameter: chunk_batches : AsyncIterator[list[Chunk]] - Chunks of the document
+        @parameter: max_pending : int - Number of batches that can be embedding at the same time
+        @returns AsyncIterator[list[Chunk]] - Vectorized chunks
+        """
+        if embedder not in self.embedders:
+            raise Exception(f"{embedder} Embedder not found")
+
+        config = fileConfig.rag_config["Embedder"].components[embedder].config
+        document.meta["Embedder"] = (
+            fileConfig.rag_config["Embedder"].components[embedder].model_dump()
+        )
+        return self.stream_batches(
+            embedder, config, document, chunk_batches, max_pending
+        )
+
+    async def stream_batches(
+        self,
+        embedder: str,
+        config: dict,
+        document: Document,
+        chunk_batches,
+        max_pending: int,
+    ):
+        batch_size = self.embedders[embedder].max_batch_size
+        pending = asyncio.Queue(maxsize=max_pending)
+
+        async def dispatch(chunks):
+            content = [document.metadata + "\n" + chunk.content for chunk in chunks]
+            task = asyncio.create_task(self.batch_vectorize(embedder, config, content))
+            await pending.put((chunks, task))
+            # Let the embedding request start before producing the next batch
+            await asyncio.sleep(0)
+
+        async def produce():
+            try:
+                buffer = []
+                async for chunks in chunk_batches:
+                    buffer.extend(chunks)
+                    while len(buffer) >= batch_size:
+                        await dispatch(buffer[:batch_size])
+                        buffer = buffer[batch_size:]
+                if buffer:
+                    await dispatch(buffer)
+            except Exception:
+                await pending.put(None)
+                raise
+            await pending.put(None)
+
+        producer = asyncio.create_task(produce())
+        pca = None
+        try:
+            while True:
+                entry = await pending.get()
+                if entry is None:
+                    break
+                chunks, task = entry
+                embeddings = await task
+
+                if pca is None and len(embeddings) >= 3:
+                    pca = PCA(n_components=3)
+                    pca.fit(embeddings)
+                if pca is not None:
+                    pca_embeddings = [
+                        pca_.tolist() for pca_ in pca.transform(embeddings)
+                    ]
+                else:
+                    pca_embeddings = [embedding[0:3] for embedding in embeddings]
+
+                for vector, chunk, pca_ in zip(embeddings, chunks, pca_embeddings):
+                    chunk.vector = vector
+                    chunk.pca = pca_
+                yield chunks
+
+            # Surface chunker errors
+            await producer
+        finally:
+            producer.cancel()
+            while not pending.empty():
+                entry = pending.get_nowait()
+                if entry is not None:
+                    entry[1].cancel()
+
+    def get_semaphore(self, embedder: str) -> asyncio.Semaphore:
+        """Limits the number of batches sent to an embedder at the same time, shared by all imports"""
+        if embedder not in self.semaphores:
+            self.semaphores[embedder] = asyncio.Semaphore(self.max_concurrent_batches)
+        return self.semaphores[embedder]
+
     async def batch_vectorize(
         self, embedder: str, config: dict, content: list[str]
     ) -> list[list[float]]:
-        """Vectorize content in batches"""
+        """Vectorize content in batches, only content missing from the embedding cache is sent to the embedder"""
         try:
+            model = config["Model"].value if "Model" in config else ""
+            if "Backend" in config:
+                # Quantized and exported models return different vectors than the original
+                model = f"{model}:{config['Backend'].value}"
+            embedding = self.embedders[embedder]
+            max_tokens = getattr(embedding, "max_tokens", None)
+            max_batch_tokens = getattr(embedding, "max_batch_tokens", None)
+            # Inputs longer than the model's context are truncated or split into windows before they are sent
+            inputs, owners, token_counts = content, None, [0] * len(content)
+            if max_tokens is not None or max_batch_tokens is not None:
+                inputs, owners, token_counts = await run_cpu(
+                    fit_inputs, content, max_tokens, get_oversized_mode()
+                )
+
+            def combine(input_vectors: list[list[float]]) -> list[list[float]]:
+                if owners is None:
+                    return input_vectors
+                return combine_vectors(
+                    input_vectors, owners, token_counts, len(content)
+                )
+
+            vectors = [None] * len(inputs)
+            if self.cache is not None:
+                try:
+                    vectors = await self.cache.lookup(embedder, model, inputs)
+                except Exception as e:
+                    msg.warn(f"Could not read from the embedding cache: {str(e)}")
+
+            # Identical content is only embedded once
+            missing_tokens = {
+                text: count
+                for text, count, vector in zip(inputs, token_counts, vectors)
+                if vector is None
+            }
+            missing = list(missing_tokens)
+            if not missing:
+                msg.info(f"Loaded all {len(content)} vectors from the embedding cache")
+                return combine(vectors)
+
+            # Batches are filled up to the token and item budget of the embedder
             batches = [
-                content[i : i + self.embedders[embedder].max_batch_size]
-                for i in range(0, len(content), self.embedders[embedder].max_batch_size)
-            ]
-            msg.info(f"Vectorizing {len(content)} chunks in {len(batches)} batches")
-            tasks = [
-                self.embedders[embedder].vectorize(config, batch) for batch in batches
+                [missing[i] for i in batch]
+                for batch in pack_batches(
+                    list(missing_tokens.values()),
+                    max_batch_tokens,
+                    embedding.max_batch_size,
+                )
             ]
+            msg.info(
+                f"Vectorizing {len(missing)} chunks in {len(batches)} batches ({len(content) - len(missing)} cached)"
+            )
+            budget = RetryBudget(
+                max(self.max_retries, int(len(batches) * self.retry_budget))
+            )
+
+            async def vectorize_batch(batch: list[str]) -> list[list[float]]:
+                vectors = await self.vectorize_with_retry(
+                    embedder, config, batch, budget
+                )
+                if len(vectors) != len(batch):
+                    raise Exception(
+                        f"Mismatch in vectorization results: expected {len(batch)} vectors, got {len(vectors)}"
+                    )
+                # Stored per batch, a failed import only resends the batches that failed
+                await self.store_vectors(embedder, model, batch, vectors)
+                return vectors
+
+            tasks = [vectorize_batch(batch) for batch in batches]
             results = await asyncio.gather(*tasks, return_exceptions=True)
 
             # Check if all tasks were successful
@@ -1156,15 +1762,68 @@ class EmbeddingManager:
             flattened_results = [item for sublist in results for item in sublist]
 
             # Verify the number of vectors matches the input content
-            if len(flattened_results) != len(content):
+            if len(flattened_results) != len(missing):
                 raise Exception(
-                    f"Mismatch in vectorization results: expected {len(content)} vectors, got {len(flattened_results)}"
+                    f"Mismatch in vectorization results: expected {len(missing)} vectors, got {len(flattened_results)}"
                 )
 
-            return flattened_results
+            embedded = dict(zip(missing, flattened_results))
+            return combine(
+                [
+                    vector if vector is not None else embedded[text]
+                    for text, vector in zip(inputs, vectors)
+                ]
+            )
         except Exception as e:
             raise Exception(f"Batch vectorization failed: {str(e)}")
 
+    async def vectorize_with_retry(
+        self, embedder: str, config: dict, batch: list[str], budget: RetryBudget
+    ) -> list[list[float]]:
+        """Send one batch to the embedder, retrying throttled and transient failures with jittered exponential backoff.
+        A Retry-After of the provider pauses all batches sent to the embedder.
+        @parameter: budget : RetryBudget - Retries shared by all batches of the import
+        @returns list[list[float]] - Vectors of the batch
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self.get_semaphore(embedder)
+        attempt = 0
+        while True:
+            cooldown = self.cooldowns.get(embedder, 0) - loop.time()
+            if cooldown > 0:
+                await asyncio.sleep(cooldown)
+            try:
+                async with semaphore:
+                    return await self.embedders[embedder].vectorize(config, batch)
+            except Exception as e:
+                if (
+                    not is_retryable(e)
+                    or attempt >= self.max_retries
+                    or not budget.spend()
+                ):
+                    raise
+                retry_after = get_retry_after(e)
+                delay = get_backoff(attempt, retry_after)
+                if retry_after is not None:
+                    self.cooldowns[embedder] = max(
+                        self.cooldowns.get(embedder, 0), loop.time() + retry_after
+                    )
+                attempt += 1
+                msg.warn(
+                    f"Retrying batch of {len(batch)} chunks in {delay:.1f}s (attempt {attempt}/{self.max_retries}): {str(e)}"
+                )
+                await asyncio.sleep(delay)
+
+    async def store_vectors(
+        self, embedder: str, model: str, content: list[str], vectors: list[list[float]]
+    ):
+        if self.cache is None:
+            return
+        try:
+            await self.cache.store(embedder, model, content, vectors)
+        except Exception as e:
+            msg.warn(f"Could not write to the embedding cache: {str(e)}")
+
     async def vectorize_query(
         self, embedder: str, content: str, rag_config: dict
     ) -> list[float]:
@@ -0,0 +1,152 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator
+
+from wasabi import msg
+
+
+def get_tensor_size(value: Any) -> int:
+    if hasattr(value, "numel") and hasattr(value, "element_size"):
+        return value.numel() * value.element_size()
+    # Dynamically quantized layers store their packed weights as tuples
+    if isinstance(value, (tuple, list)):
+        return sum(get_tensor_size(item) for item in value)
+    return 0
+
+
+def get_model_size(model: Any) -> int:
+    """Bytes of the weights of a torch module, including quantized weights, 0 for other objects"""
+    if not hasattr(model, "state_dict"):
+        return 0
+    return sum(get_tensor_size(value) for value in model.state_dict().values())
+
+
+class LoadedModel:
+    def __init__(self, model: Any, size: int):
+        self.model = model
+        self.size = size
+        # Models are not shared between threads while in use, e.g. HuggingFace fast tokenizers
+        # fail with "Already borrowed" when two threads encode at the same time
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of local models. Every model is loaded once and shared by all requests.
+    Models that are not in use are evicted least-recently-used once their total size exceeds max_size_mb.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[Hashable], Any],
+        max_size_mb: float = 0,
+        size_of: Callable[[Any], int] = get_model_size,
+    ):
+        self.loader = loader
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.size_of = size_of
+        self.models: OrderedDict[Hashable, LoadedModel] = OrderedDict()
+        self.lock = threading.Lock()
+        # One lock per model name, so a model is loaded once even if many requests need it at the same time
+        self.loading: dict[Hashable, threading.Lock] = {}
+
+    def get(self, name: Hashable) -> LoadedModel:
+        with self.lock:
+            loaded = self.models.get(name)
+            if loaded is not None:
+                self.models.move_to_end(name)
+                loaded.users += 1
+                return loaded
+            loading = self.loading.setdefault(name, threading.Lock())
+
+        with loading:
+            with self.lock:
+                loaded = self.models.get(name)
+                if loaded is not None:
+                    self.models.move_to_end(name)
+                    loaded.users += 1
+                    return loaded
+            msg.info(f"Loading model {name}")
+            model = self.loader(name)
+            loaded = LoadedModel(model, self.size_of(model))
+            with self.lock:
+                loaded.users += 1
+                self.models[name] = loaded
+                self.loading.pop(name, None)
+                self.evict()
+            return loaded
+
+    def release(self, loaded: LoadedModel):
+        with self.lock:
+            loaded.users -= 1
+            self.evict()
+
+    @contextmanager
+    def use(self, name: Hashable) -> Iterator[Any]:
+        """Borrow a model, it is used by one thread at a time and never evicted while borrowed"""
+        loaded = self.get(name)
+        try:
+            with loaded.lock:
+                yield loaded.model
+        finally:
+            self.release(loaded)
+
+    def evict(self):
+        """Drop idle models, least recently used first, until the registry fits max_size_mb"""
+        if not self.max_bytes:
+            return
+        total = sum(loaded.size for loaded in self.models.values())
+        for name, loaded in list(self.models.items()):
+            if total <= self.max_bytes:
+                break
+            if loaded.users == 0:
+                msg.info(f"Unloading model {name}")
+                del self.models[name]
+                total -= loaded.size
+
+    def loaded(self) -> list[Hashable]:
+        with self.lock:
+            return list(self.models)
+
+    def clear(self):
+        with self.lock:
+            for name, loaded in list(self.models.items()):
+                if loaded.users == 0:
+                    del self.models[name]
+
+
+def get_warm_models() -> list[str]:
+    """Models listed in VERBA_WARM_MODELS, loaded when the server starts"""
+    return [
+        name.strip()
+        for name in os.getenv("VERBA_WARM_MODELS", "").split(",")
+        if name.strip()
+    ]
+
+
+def length_sorted_batches(
+    lengths: list[int], max_tokens: int, max_batch_size: int
+) -> list[list[int]]:
+    """Group indices into batches of similar length, longest first.
+    Every text of a batch is padded to the longest one, so a batch holds at most max_tokens padded tokens:
+    many short texts or few long ones.
+    @returns list[list[int]] - Indices of the texts of every batch
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    batch = []
+    for i in order:
+        # The first text of a batch is its longest
+        if batch and (
+            len(batch) >= max_batch_size
+            or (len(batch) + 1) * lengths[batch[0]] > max_tokens
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
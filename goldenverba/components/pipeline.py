@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
+
+from wasabi import msg
+
+
+class PipelineStage:
+    """
+    A single stage of an IngestionPipeline.
+    @parameter: name : str - Name of the stage, used for logging
+    @parameter: handler : Callable - Coroutine that receives an item and returns the item for the next stage. Returning None finishes the item early.
+    @parameter: workers : int - Number of concurrent workers for this stage
+    @parameter: batch_size : int - Above 1, the handler receives a list of up to batch_size items that are already queued and returns a list with one result (or Exception) per item
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        batch_size: int = 1,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+
+
+class IngestionPipeline:
+    """
+    Runs items through a chain of stages connected by bounded queues.
+    Every stage has its own pool of workers. When a queue is full, the stage in front of it
+    blocks, so a slow stage throttles all stages before it (including the source) and the
+    number of items in flight never exceeds the sum of queue sizes and workers.
+    """
+
+    _DONE = object()
+
+    def __init__(self, stages: list[PipelineStage], queue_size: int = 4):
+        if not stages:
+            raise ValueError("IngestionPipeline requires at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+
+    async def run(self, source: AsyncIterable | Iterable) -> list:
+        """Feed all items of source through the stages.
+        @parameter: source : AsyncIterable | Iterable - Items to process
+        @returns list - One entry per item in source order, either the value returned by the last stage that handled it or the Exception it failed with
+        """
+        # Batched stages can queue a full batch
+        queues = [
+            asyncio.Queue(maxsize=max(self.queue_size, stage.batch_size))
+            for stage in self.stages
+        ]
+        results: dict[int, Any] = {}
+        remaining_workers = [stage.workers for stage in self.stages]
+        total = 0
+
+        async def feed():
+            nonlocal total
+            if hasattr(source, "__aiter__"):
+                async for item in source:
+                    await queues[0].put((total, item))
+                    total += 1
+            else:
+                for item in source:
+                    await queues[0].put((total, item))
+                    total += 1
+
+        async def work(stage_index: int):
+            stage = self.stages[stage_index]
+            queue = queues[stage_index]
+            is_last = stage_index == len(self.stages) - 1
+            done = False
+            while not done:
+                entry = await queue.get()
+                if entry is self._DONE:
+                    break
+                entries = [entry]
+                # A batch never waits for more items, it takes what is queued
+                while len(entries) < stage.batch_size and not queue.empty():
+                    entry = queue.get_nowait()
+                    if entry is self._DONE:
+                        done = True
+                        break
+                    entries.append(entry)
+
+                try:
+                    if stage.batch_size > 1:
+                        outcomes = await stage.handler([item for _, item in entries])
+                    else:
+                        outcomes = [await stage.handler(entries[0][1])]
+                except Exception as e:
+                    outcomes = [e] * len(entries)
+                for (index, _), result in zip(entries, outcomes):
+                    if isinstance(result, Exception):
+                        msg.warn(f"Pipeline stage {stage.name} failed: {str(result)}")
+                        results[index] = result
+                    elif result is None or is_last:
+                        results[index] = result
+                    else:
+                        await queues[stage_index + 1].put((index, result))
+
+            remaining_workers[stage_index] -= 1
+            if remaining_workers[stage_index] == 0 and not is_last:
+                for _ in range(self.stages[stage_index + 1].workers):
+                    await queues[stage_index + 1].put(self._DONE)
+
+        workers = [
+            asyncio.create_task(work(stage_index))
+            for stage_index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+
+        try:
+            await feed()
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+        for _ in range(self.stages[0].workers):
+            await queues[0].put(self._DONE)
+
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+
+        return [results.get(index) for index in range(total)]
@@ -1,17 +1,18 @@
-import base64
-import io
+import asyncio
 import os
+import time
 
-import requests
 from wasabi import msg
 import aiohttp
-import assemblyai as aai
 
 from goldenverba.components.document import Document, create_document
 from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
 from goldenverba.components.util import get_environment
 from goldenverba.components.types import InputConfig
+from goldenverba.components.uploads import open_file
+
+ASSEMBLYAI_API_URL = "https://api.assemblyai.com"
 
 
 class AssemblyAIReader(Reader):
@@ -82,11 +83,16 @@ class AssemblyAIReader(Reader):
                 values=[],
             )
 
+        # Limits the transcriptions running at the same time, created on first load
+        self.semaphore: asyncio.Semaphore = None
+
     async def load(
         self, config: dict[str, InputConfig], fileConfig: FileConfig
     ) -> list[Document]:
         """
         Load and process a file using the AssemblyAI API.
+        The file is uploaded, a transcription is submitted and polled until it finishes,
+        the event loop is never blocked while AssemblyAI transcribes.
         """
         # Validate and get API credentials
         token = get_environment(
@@ -95,43 +101,90 @@ class AssemblyAIReader(Reader):
             "ASSEMBLYAI_API_KEY",
             "No AssemblyAI API Key detected",
         )
-        aai.settings.api_key = token
 
         # Validate quality
         quality = config["Quality"].value
         if quality not in ["nano", "best"]:
             raise ValueError(f"Invalid quality: {quality}")
 
-        aaiConfig = aai.TranscriptionConfig(speech_model=aai.SpeechModel.nano)
-        if quality == "best":
-            aaiConfig = aai.TranscriptionConfig(speech_model=aai.SpeechModel.best)
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(
+                int(os.getenv("VERBA_ASSEMBLYAI_CONCURRENCY", 4))
+            )
 
-        msg.info(f"Loading {fileConfig.filename}")
-
-        file_data = aiohttp.FormData()
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
-        file_data.add_field(
-            "files",
-            file_bytes,
-            filename=f"{fileConfig.filename}.{fileConfig.extension}",
-        )
+        api_url = os.getenv("ASSEMBLYAI_API_URL", ASSEMBLYAI_API_URL).rstrip("/")
+        headers = {"authorization": token}
 
         try:
-            transcriber = aai.Transcriber(config=aaiConfig)
-            transcript = transcriber.transcribe(file_bytes)
-            if transcript.error:
+            async with self.semaphore:
+                msg.info(f"Transcribing {fileConfig.filename}")
+                async with aiohttp.ClientSession(headers=headers) as session:
+                    audio_url = await self.upload(session, api_url, fileConfig)
+                    async with session.post(
+                        f"{api_url}/v2/transcript",
+                        json={"audio_url": audio_url, "speech_model": quality},
+                    ) as response:
+                        response.raise_for_status()
+                        transcript = await response.json()
+                    transcript = await self.wait_for_transcript(
+                        session, api_url, transcript
+                    )
+
+            if transcript["status"] == "error":
                 raise Exception(
-                    f"AssemblyAI API failed to transcribe {fileConfig.filename}: {transcript.error}"
+                    f"AssemblyAI API failed to transcribe {fileConfig.filename}: {transcript.get('error')}"
                 )
-            if transcript.text is None:
+            if transcript.get("text") is None:
                 raise Exception(
                     f"AssemblyAI API failed to transcribe {fileConfig.filename}, no text returned"
                 )
-            return [create_document(transcript.text, fileConfig)]
+            return [create_document(transcript["text"], fileConfig)]
 
-        except requests.RequestException as e:
+        except aiohttp.ClientError as e:
             raise Exception(
                 f"AssemblyAI API request failed for {fileConfig.filename}: {str(e)}"
             )
         except Exception as e:
             raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
+
+    async def upload(
+        self, session: aiohttp.ClientSession, api_url: str, fileConfig: FileConfig
+    ) -> str:
+        """Stream the file to AssemblyAI, uploads are read from disk in chunks
+        @returns str - URL of the uploaded audio
+        """
+        with open_file(fileConfig) as file:
+            async with session.post(
+                f"{api_url}/v2/upload",
+                data=file,
+                headers={"Content-Type": "application/octet-stream"},
+            ) as response:
+                response.raise_for_status()
+                return (await response.json())["upload_url"]
+
+    async def wait_for_transcript(
+        self, session: aiohttp.ClientSession, api_url: str, transcript: dict
+    ) -> dict:
+        """Poll a transcript until it is completed or failed.
+        The poll interval grows from VERBA_ASSEMBLYAI_POLL_INTERVAL up to VERBA_ASSEMBLYAI_MAX_POLL_INTERVAL,
+        short clips finish after few polls and long recordings aren't polled every second for minutes.
+        @returns dict - The finished transcript
+        """
+        interval = float(os.getenv("VERBA_ASSEMBLYAI_POLL_INTERVAL", 1))
+        max_interval = float(os.getenv("VERBA_ASSEMBLYAI_MAX_POLL_INTERVAL", 15))
+        timeout = float(os.getenv("VERBA_ASSEMBLYAI_TIMEOUT", 3600))
+        deadline = time.monotonic() + timeout
+
+        while transcript["status"] not in ["completed", "error"]:
+            if time.monotonic() > deadline:
+                raise Exception(
+                    f"Transcript {transcript['id']} not finished after {timeout:.0f}s"
+                )
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, max_interval)
+            async with session.get(
+                f"{api_url}/v2/transcript/{transcript['id']}"
+            ) as response:
+                response.raise_for_status()
+                transcript = await response.json()
+        return transcript
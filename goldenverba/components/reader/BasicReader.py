@@ -1,16 +1,29 @@
+import asyncio
 import base64
+import functools
+import hashlib
 import json
 import io
-import fitz  # PyMuPDF
-from typing import List, Tuple
-from PIL import Image
-import base64
-import uuid
+import tempfile
 import os
 from wasabi import msg
 
 from goldenverba.components.document import Document, create_document
 from goldenverba.components.interfaces import Reader
+from goldenverba.components.executor import run_cpu, run_process
+from goldenverba.components.reader.pdf import (
+    count_pdf_pages,
+    extract_pdf_pages,
+    extract_pdf_text,
+)
+from goldenverba.components.reader.tables import (
+    TABLE_EXTENSIONS,
+    hash_file,
+    iter_table_chunks,
+    preview_table,
+)
+from goldenverba.components.types import InputConfig
+from goldenverba.components.uploads import get_file_source, read_file
 from goldenverba.server.types import FileConfig
 
 # Optional imports with error handling
@@ -39,6 +52,14 @@ except ImportError:
     msg.warn("openpyxl not installed, XLSX functionality will be limited.")
     load_workbook = None
 
+# PDFs with at least this many pages are extracted in parallel worker processes
+PDF_PARALLEL_PAGES = int(os.getenv("VERBA_PDF_PARALLEL_PAGES", 32))
+# Pages extracted by one worker task
+PDF_PAGES_PER_TASK = int(os.getenv("VERBA_PDF_PAGES_PER_TASK", 16))
+# Rows per chunk of XLSX and CSV files loaded by other readers
+TABLE_ROWS_PER_CHUNK = 50
+
+
 class BasicReader(Reader):
     """
     The BasicReader reads text, code, PDF, and DOCX files.
@@ -81,6 +102,21 @@ class BasicReader(Reader):
             ".hpp",
         ]  # Add supported text extensions
 
+        self.config = {
+            "PDF Images": InputConfig(
+                type="dropdown",
+                value="Store",
+                description="Store the images embedded in PDFs and reference them in the text, or skip them for faster imports",
+                values=["Store", "Skip"],
+            ),
+            "Rows Per Chunk": InputConfig(
+                type="number",
+                value=TABLE_ROWS_PER_CHUNK,
+                description="XLSX and CSV files are streamed row by row into chunks of this many rows with the header repeated. 0 to read them as text and split them with the selected Chunker",
+                values=[],
+            ),
+        }
+
         # Initialize spaCy model if available
         self.nlp = spacy.blank("en") if spacy else None
         if self.nlp:
@@ -90,35 +126,81 @@ class BasicReader(Reader):
         """
         Load and process a file based on its extension.
         """
-        msg.info(f"Loading {fileConfig.filename} ({fileConfig.extension.lower()})")
+        # Path of an uploaded file or the decoded content
+        file_source = get_file_source(fileConfig) if fileConfig.extension != "" else b""
+        return await self.load_source(config, fileConfig, file_source)
+
+    async def load_source(
+        self, config: dict, fileConfig: FileConfig, file_source: str | bytes
+    ) -> list[Document]:
+        """Load a file from a path or raw bytes with the options of the reader config, the content of the fileConfig is ignored"""
+        # Configs saved before the option existed don't have it
+        images = "PDF Images" not in config or config["PDF Images"].value != "Skip"
+        rows_per_chunk = (
+            int(config["Rows Per Chunk"].value)
+            if "Rows Per Chunk" in config
+            else TABLE_ROWS_PER_CHUNK
+        )
+        return await self.load_file(fileConfig, file_source, images, rows_per_chunk)
 
-        if fileConfig.extension != "":
-            decoded_bytes = base64.b64decode(fileConfig.content)
+    async def load_file(
+        self,
+        fileConfig: FileConfig,
+        file_source: str | bytes,
+        images: bool = True,
+        rows_per_chunk: int = TABLE_ROWS_PER_CHUNK,
+    ) -> list[Document]:
+        """
+        Load a file from a path or raw bytes, used by other readers to hand over downloaded files without encoding them.
+        The content of the fileConfig is ignored unless it has no extension.
+        @parameter: images : bool - Store the images embedded in PDFs
+        @parameter: rows_per_chunk : int - Rows per chunk of XLSX and CSV files, 0 to read them as text
+        """
+        msg.info(f"Loading {fileConfig.filename} ({fileConfig.extension.lower()})")
 
         try:
             if fileConfig.extension == "":
                 file_content = fileConfig.content
             elif fileConfig.extension.lower() == "json":
-                return await self.load_json_file(decoded_bytes, fileConfig)
+                return await self.load_json_file(
+                    await asyncio.to_thread(read_file, file_source), fileConfig
+                )
+            elif (
+                fileConfig.extension.lower() in TABLE_EXTENSIONS and rows_per_chunk > 0
+            ):
+                return [
+                    await self.load_table_file(fileConfig, file_source, rows_per_chunk)
+                ]
             elif fileConfig.extension.lower() == "pdf":
-                file_content = await self.load_pdf_file(decoded_bytes)
+                file_content = await self.load_pdf_file(file_source, images)
             elif fileConfig.extension.lower() == "docx":
-                file_content = await self.load_docx_file(decoded_bytes)
+                file_content = await self.load_docx_file(file_source)
             elif fileConfig.extension.lower() == "xlsx":
-                file_content = await self.load_xlsx_file(decoded_bytes)
+                file_content = await self.load_xlsx_file(file_source)
             elif fileConfig.extension.lower() in [
                 ext.lstrip(".") for ext in self.extension
             ]:
-                file_content = await self.load_text_file(decoded_bytes)
+                file_content = await self.load_text_file(
+                    await asyncio.to_thread(read_file, file_source)
+                )
             else:
                 try:
-                    file_content = await self.load_text_file(decoded_bytes)
+                    file_content = await self.load_text_file(
+                        await asyncio.to_thread(read_file, file_source)
+                    )
                 except Exception as e:
                     raise ValueError(
                         f"Unsupported file extension: {fileConfig.extension}"
                     )
 
-            return [create_document(file_content, fileConfig)]
+            return [
+                await run_cpu(
+                    create_document,
+                    file_content,
+                    # The encoded file is not needed to create the document
+                    fileConfig.model_copy(update={"content": ""}),
+                )
+            ]
         except Exception as e:
             msg.fail(f"Failed to load {fileConfig.filename}: {str(e)}")
             raise
@@ -146,107 +228,116 @@ class BasicReader(Reader):
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in {fileConfig.filename}: {str(e)}")
 
-    async def load_pdf_file(self, decoded_bytes: bytes) -> str:
-        
-        if not os.path.exists("img"):
-            os.makedirs("img")
-        pdf_bytes = io.BytesIO(decoded_bytes)
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        full_content = []
-
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-           
-            text_blocks = page.get_text("blocks")
-            valid_text_blocks = []
-            for block in text_blocks:
-                if len(block) >= 5:  
-                    x0, y0, x1, y1, text, *_ = block
-                    if text.strip(): 
-                        valid_text_blocks.append(block)
-
-            image_list = page.get_images(full=True)
-            images_with_coords = []
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                image_ext = base_image["ext"]
+    async def load_pdf_file(self, file_source: str | bytes, images: bool = True) -> str:
+        """Load and extract text and images from a PDF file.
+        Large PDFs are split into page ranges that are extracted in parallel worker processes.
+        """
+        pages = await run_cpu(count_pdf_pages, file_source)
+        if pages < PDF_PARALLEL_PAGES:
+            return await run_cpu(extract_pdf_text, file_source, images)
 
-                try:
-                    image_rect = page.get_image_bbox(img)
-                    if image_rect:  
-                        images_with_coords.append({
-                            "index": img_index,
-                            "rect": image_rect,
-                            "bytes": image_bytes,
-                            "ext": image_ext
-                        })
-                except Exception as e:
-                    print(f"Error al obtener coordenadas de la imagen {img_index}: {e}")
-
-           
-            all_elements = []
-            for block in valid_text_blocks:
-                x0, y0, x1, y1, text, *_ = block
-                all_elements.append(("text", (y0, x0, y1, x1, text)))  
-
-            for img in images_with_coords:
-                rect = img["rect"]
-                all_elements.append(("image", (rect[1], rect[0], rect[3], rect[2], img)))  
-
-            
-            try:
-                all_elements.sort(key=lambda elem: (elem[1][0], elem[1][1]))  # Ordenar por (y0, x0)
-            except Exception as e:
-                print(f"Error al ordenar elementos: {e}")
-                all_elements = []  
-            try:
-                for elem_type, elem in all_elements:
-                    if elem_type == "text":
-                        _, _, _, _, text = elem
-                        if text.strip():  
-                            full_content.append(f" {text}")
-                    elif elem_type == "image":
-                        _, _, _, _, img = elem
-                        img_index = img["index"]
-                        image_bytes = img["bytes"]
-                        image_ext = img["ext"]
-
-                        image_pil = Image.open(io.BytesIO(image_bytes))
-
-                        if image_pil.mode == "RGBA":
-                            image_pil = image_pil.convert("RGB")
-
-                        unique_id = uuid.uuid4().hex 
-                        image_name = f"img/{unique_id}.{image_ext}" 
-
-                        image_pil.save(image_name)
-
-                        full_content.append(f"Imagen {page_num + 1}:\n{image_name}")
-            except Exception as e:
-                print(f"Error al procesar elementos: {e}")
-
-        return "\n\n".join(full_content)
-
-    async def load_docx_file(self, decoded_bytes: bytes) -> str:
+        path = file_source
+        if isinstance(file_source, bytes):
+            # Workers open the file by path instead of receiving a copy of the PDF each
+            path = await asyncio.to_thread(spool_pdf, file_source)
+        try:
+            results = await asyncio.gather(
+                *[
+                    run_process(
+                        extract_pdf_pages,
+                        path,
+                        start,
+                        min(start + PDF_PAGES_PER_TASK, pages),
+                        images,
+                    )
+                    for start in range(0, pages, PDF_PAGES_PER_TASK)
+                ]
+            )
+        finally:
+            if path is not file_source:
+                os.remove(path)
+        return "\n\n".join(element for result in results for element in result)
+
+    async def load_docx_file(self, file_source: str | bytes) -> str:
         """Load and extract text from a DOCX file."""
         if not docx:
             raise ImportError(
                 "python-docx is not installed. Cannot process DOCX files."
             )
-        docx_bytes = io.BytesIO(decoded_bytes)
-        reader = docx.Document(docx_bytes)
-        return "\n".join(paragraph.text for paragraph in reader.paragraphs)
+        return await run_cpu(extract_docx_text, file_source)
+
+    async def load_table_file(
+        self, fileConfig: FileConfig, file_source: str | bytes, rows_per_chunk: int
+    ) -> Document:
+        """Load an XLSX or CSV file as a document whose chunks are batches of rows.
+        The rows are streamed from the file while the document is imported, its content is only the first chunk.
+        """
+        extension = fileConfig.extension.lower()
+        preview = await run_cpu(preview_table, file_source, extension, rows_per_chunk)
+        document = await run_cpu(
+            create_document, preview, fileConfig.model_copy(update={"content": ""})
+        )
+        document.chunk_source = functools.partial(
+            iter_table_chunks, file_source, extension, rows_per_chunk
+        )
+        # The preview doesn't cover the whole file, so the document is fingerprinted by the file itself
+        file_hash = await asyncio.to_thread(hash_file, file_source)
+        document.content_hash = hashlib.sha256(
+            f"{file_hash}:{rows_per_chunk}".encode("utf-8")
+        ).hexdigest()
+        return document
 
-    async def load_xlsx_file(self, decoded_bytes: bytes) -> str:
+    async def load_xlsx_file(self, file_source: str | bytes) -> str:
         """Load and extract text from an XLSX file."""
         if not load_workbook:
             raise ImportError("openpyxl is not installed. Cannot process XLSX files.")
-        xlsx_bytes = io.BytesIO(decoded_bytes)
-        workbook = load_workbook(xlsx_bytes)
-        text_content = []
+        return await run_cpu(extract_xlsx_text, file_source)
+
+
+def file_config_for(
+    fileConfig: FileConfig, filename: str, extension: str, source: str, file_size: int
+) -> FileConfig:
+    """FileConfig of a file downloaded by another reader, shares the rag_config of the original instead of copying it"""
+    return fileConfig.model_copy(
+        update={
+            "filename": filename,
+            "isURL": False,
+            "extension": extension,
+            "source": source,
+            "content": "",
+            "upload_id": "",
+            "file_size": file_size,
+        }
+    )
+
+
+def as_file(file_source: str | bytes) -> str | io.BytesIO:
+    # Paths are opened by the parsers themselves, which read them lazily
+    return file_source if isinstance(file_source, str) else io.BytesIO(file_source)
+
+
+def spool_pdf(content: bytes) -> str:
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(content)
+        return f.name
+
+
+def extract_docx_text(file_source: str | bytes) -> str:
+    """Extract text from a DOCX file (path or bytes), runs on the CPU executor"""
+    reader = docx.Document(as_file(file_source))
+    return "\n".join(paragraph.text for paragraph in reader.paragraphs)
+
+
+def extract_xlsx_text(file_source: str | bytes) -> str:
+    """Extract text from an XLSX file (path or bytes), runs on the CPU executor"""
+    workbook = load_workbook(as_file(file_source), read_only=True)
+    text_content = []
+    try:
         for sheet in workbook:
             for row in sheet.iter_rows(values_only=True):
-                text_content.append("\t".join(str(cell) if cell is not None else "" for cell in row))
-        return "\n".join(text_content)
\ No newline at end of file
+                text_content.append(
+                    "\t".join(str(cell) if cell is not None else "" for cell in row)
+                )
+    finally:
+        workbook.close()
+    return "\n".join(text_content)
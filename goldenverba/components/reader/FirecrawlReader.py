@@ -1,4 +1,3 @@
-import base64
 import aiohttp
 import asyncio
 import os
@@ -9,7 +8,7 @@ from wasabi import msg
 from goldenverba.components.document import Document
 from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
-from goldenverba.components.reader.BasicReader import BasicReader
+from goldenverba.components.reader.BasicReader import BasicReader, file_config_for
 from goldenverba.components.util import get_environment
 from goldenverba.components.types import InputConfig
 
@@ -66,24 +65,10 @@ class FirecrawlReader(Reader):
 
         for title, content, source_url in raw_documents:
             content_bytes = content.encode("utf-8")
-            base64_content = base64.b64encode(content_bytes).decode("utf-8")
-
-            new_file_config = FileConfig(
-                fileID=fileConfig.fileID,
-                filename=title,
-                isURL=False,
-                overwrite=fileConfig.overwrite,
-                extension="md",
-                source=source_url,
-                content=base64_content,
-                labels=fileConfig.labels,
-                rag_config=fileConfig.rag_config,
-                file_size=len(content_bytes),
-                status=fileConfig.status,
-                status_report=fileConfig.status_report,
-                metadata=fileConfig.metadata,
+            new_file_config = file_config_for(
+                fileConfig, title, "md", source_url, len(content_bytes)
             )
-            document = await reader.load(config, new_file_config)
+            document = await reader.load_file(new_file_config, content_bytes)
             documents.append(document[0])
 
         return documents
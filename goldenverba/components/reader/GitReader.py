@@ -1,18 +1,83 @@
 import aiohttp
+import asyncio
+import contextlib
+import hashlib
 import os
+import tarfile
+import tempfile
+import time
 import urllib
-import base64
 
 from wasabi import msg
 
 from goldenverba.components.document import Document
-from goldenverba.components.interfaces import Reader
+from goldenverba.components.interfaces import Reader, SyncState
 from goldenverba.server.types import FileConfig
-from goldenverba.components.reader.BasicReader import BasicReader
+from goldenverba.components.reader.BasicReader import BasicReader, file_config_for
 from goldenverba.components.util import get_environment
+from goldenverba.components.retry import parse_retry_after
 
 from goldenverba.components.types import InputConfig
 
+# Attempts of a request that was rejected by the rate limit
+MAX_ATTEMPTS = 5
+
+# Syncs download the whole archive once more than this share of files changed
+SYNC_ARCHIVE_RATIO = 0.1
+
+
+class RateLimit:
+    """
+    Rate limit state shared by all requests of an import.
+    Pauses every request once the API reports that no requests are left, or asks to retry later.
+    """
+
+    def __init__(self, max_wait: float = None):
+        self.max_wait = (
+            max_wait
+            if max_wait is not None
+            else float(os.getenv("VERBA_GIT_MAX_RATE_LIMIT_WAIT", 300))
+        )
+        self.resume_at = 0.0
+
+    async def wait(self):
+        delay = self.resume_at - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, delay: float):
+        delay = min(max(delay, 0.0), self.max_wait)
+        self.resume_at = max(self.resume_at, time.time() + delay)
+
+    def update(self, response: aiohttp.ClientResponse) -> bool:
+        """Track the rate limit headers of GitHub (X-RateLimit-*) and GitLab (RateLimit-*)
+        @returns bool - Whether the request was rate limited and should be retried
+        """
+        headers = response.headers
+        remaining = headers.get(
+            "X-RateLimit-Remaining", headers.get("RateLimit-Remaining")
+        )
+        reset = headers.get("X-RateLimit-Reset", headers.get("RateLimit-Reset"))
+        # Seconds or an HTTP date, None if missing or malformed
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+
+        reset_delay = float(reset) - time.time() if reset and remaining == "0" else None
+        if reset_delay is not None:
+            self.pause(reset_delay)
+
+        if response.status not in (403, 429):
+            return False
+        if retry_after is not None:
+            self.pause(retry_after)
+            return True
+        if reset_delay is not None:
+            return True
+        # Secondary rate limits of GitHub come without headers
+        if response.status == 429:
+            self.pause(60)
+            return True
+        return False
+
 
 class GitReader(Reader):
     """
@@ -57,6 +122,12 @@ class GitReader(Reader):
                 description="Enter the path or leave it empty to import all",
                 values=[],
             ),
+            "Download Mode": InputConfig(
+                type="dropdown",
+                value="Archive",
+                description="Download the branch as one archive, or every file on its own through the API",
+                values=["Archive", "Files"],
+            ),
         }
 
         if os.getenv("GITHUB_TOKEN") is None and os.getenv("GITLAB_TOKEN") is None:
@@ -68,62 +139,105 @@ class GitReader(Reader):
             )
 
     async def load(self, config: dict, fileConfig: FileConfig) -> list[Document]:
-        documents = []
+        return [document async for document in self.load_stream(config, fileConfig)]
+
+    async def load_stream(
+        self, config: dict, fileConfig: FileConfig, sync: SyncState = None
+    ):
         platform = config["Platform"].value
         token = self.get_token(config, platform)
+        owner = config["Owner"].value
+        name = config["Name"].value
+        branch = config["Branch"].value
+        path = config["Path"].value
+        mode = config.get("Download Mode")
+        mode = mode.value if mode is not None else "Archive"
 
-        reader = BasicReader()
-
-        if platform == "GitHub":
-            owner = config["Owner"].value
-            name = config["Name"].value
-            branch = config["Branch"].value
-            path = config["Path"].value
-            fetch_url = f"https://api.github.com/repos/{owner}/{name}/git/trees/{branch}?recursive=1"
-            docs = await self.fetch_docs_github(fetch_url, path, token, reader)
-        else:  # GitLab
-            owner = config["Owner"].value
-            name = config["Name"].value
-            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
-            branch = config["Branch"].value
-            path = config["Path"].value
-            fetch_url = f"https://gitlab.com/api/v4/projects/{project_id}/repository/tree?ref={branch}&path={path}&per_page=100"
-            docs = await self.fetch_docs_gitlab(fetch_url, token, reader)
+        sync = sync or SyncState(self.get_sync_key(config, fileConfig))
 
-        msg.info(f"Fetched {len(docs)} document paths from {fetch_url}")
+        reader = BasicReader()
+        rate_limit = RateLimit()
+        semaphore = asyncio.Semaphore(int(os.getenv("VERBA_GIT_CONCURRENCY", 8)))
 
-        for _file in docs:
-            try:
-                if platform == "GitHub":
-                    content, link, size, extension = await self.download_file_github(
-                        owner, name, _file, branch, token
+        # One session and connection pool for all requests of the import
+        async with aiohttp.ClientSession(
+            headers=self.get_headers(token, platform)
+        ) as session:
+            if mode == "Archive" and not sync.versions:
+                files = self.download_archive(
+                    session,
+                    platform,
+                    owner,
+                    name,
+                    branch,
+                    path,
+                    reader,
+                    rate_limit,
+                    sync,
+                )
+            else:
+                # The tree lists the blob SHA of every file, only changed blobs are downloaded
+                docs = await self.fetch_docs(
+                    session,
+                    platform,
+                    owner,
+                    name,
+                    branch,
+                    path,
+                    reader,
+                    rate_limit,
+                    sync,
+                )
+                changed = [
+                    file_path
+                    for file_path, blob_sha in docs.items()
+                    if not sync.is_unchanged(file_path, blob_sha)
+                ]
+                msg.info(
+                    f"{len(changed)} of {len(docs)} files of {owner}/{name}@{branch} changed"
+                )
+                if mode == "Archive" and len(changed) > len(docs) * SYNC_ARCHIVE_RATIO:
+                    files = self.download_archive(
+                        session,
+                        platform,
+                        owner,
+                        name,
+                        branch,
+                        path,
+                        reader,
+                        rate_limit,
+                        sync,
                     )
                 else:
-                    content, link, size, extension = await self.download_file_gitlab(
-                        owner, name, _file, branch, token
+                    files = self.download_files(
+                        session,
+                        platform,
+                        owner,
+                        name,
+                        branch,
+                        {file_path: docs[file_path] for file_path in changed},
+                        rate_limit,
+                        semaphore,
                     )
 
-                if content:
-                    new_file_config = FileConfig(
-                        fileID=fileConfig.fileID,
-                        filename=_file,
-                        isURL=False,
-                        overwrite=fileConfig.overwrite,
-                        extension=extension,
-                        source=link,
-                        content=content,
-                        labels=fileConfig.labels,
-                        rag_config=fileConfig.rag_config,
-                        file_size=size,
-                        status=fileConfig.status,
-                        status_report=fileConfig.status_report,
+            async for file_path, content, blob_sha in files:
+                try:
+                    new_file_config = file_config_for(
+                        fileConfig,
+                        file_path,
+                        os.path.splitext(file_path)[1][1:],
+                        self.get_link(platform, owner, name, branch, file_path),
+                        len(content),
                     )
-                    document = await reader.load(config, new_file_config)
-                    documents.append(document[0])
-            except Exception as e:
-                raise Exception(f"Couldn't load retrieve {_file}: {str(e)}")
+                    document = (await reader.load_file(new_file_config, content))[0]
+                    sync.track(document, blob_sha)
+                    yield document
+                except Exception as e:
+                    raise Exception(f"Couldn't load retrieve {file_path}: {str(e)}")
 
-        return documents
+    def get_sync_key(self, config: dict, fileConfig: FileConfig) -> str:
+        platform = config["Platform"].value
+        return f"{self.get_api_url(platform)}/{config['Owner'].value}/{config['Name'].value}@{config['Branch'].value}:{config['Path'].value}"
 
     def get_token(self, config: dict, platform: str) -> str:
         env_var = "GITHUB_TOKEN" if platform == "GitHub" else "GITLAB_TOKEN"
@@ -131,73 +245,301 @@ class GitReader(Reader):
             config, "Git Token", env_var, f"No {platform} Token detected"
         )
 
+    def get_api_url(self, platform: str) -> str:
+        # Configurable for GitHub Enterprise, self-hosted GitLab and tests
+        if platform == "GitHub":
+            return os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+        return os.getenv("GITLAB_API_URL", "https://gitlab.com/api/v4").rstrip("/")
+
+    def get_link(
+        self, platform: str, owner: str, name: str, branch: str, file_path: str
+    ) -> str:
+        api_url = self.get_api_url(platform)
+        if platform == "GitHub":
+            web_url = (
+                "https://github.com"
+                if api_url == "https://api.github.com"
+                else api_url.removesuffix("/api/v3")
+            )
+            return f"{web_url}/{owner}/{name}/blob/{branch}/{file_path}"
+        web_url = api_url.removesuffix("/api/v4")
+        return f"{web_url}/{owner}/{name}/-/blob/{branch}/{file_path}"
+
+    async def request(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        rate_limit: RateLimit,
+        read,
+        headers: dict = None,
+        semaphore: asyncio.Semaphore = None,
+    ):
+        """GET a url, waiting for and retrying on rate limits
+        @parameter: read : Callable - Async function that consumes the response
+        @returns the result of read
+        """
+        for attempt in range(MAX_ATTEMPTS):
+            await rate_limit.wait()
+            async with semaphore or contextlib.nullcontext():
+                async with session.get(url, headers=headers) as response:
+                    if rate_limit.update(response) and attempt < MAX_ATTEMPTS - 1:
+                        msg.warn(f"Rate limited by {url}, retrying")
+                        continue
+                    if response.status >= 400:
+                        raise Exception(
+                            f"Request to {url} failed: {response.status} {await response.text()}"
+                        )
+                    return await read(response)
+
+    async def download_archive(
+        self,
+        session: aiohttp.ClientSession,
+        platform: str,
+        owner: str,
+        name: str,
+        branch: str,
+        folder: str,
+        reader: Reader,
+        rate_limit: RateLimit,
+        sync: SyncState,
+    ):
+        """Download the branch as one tarball and yield path, content and blob SHA of every matching file that changed"""
+        api_url = self.get_api_url(platform)
+        if platform == "GitHub":
+            url = f"{api_url}/repos/{owner}/{name}/tarball/{urllib.parse.quote(branch, safe='')}"
+        else:
+            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
+            url = f"{api_url}/projects/{project_id}/repository/archive.tar.gz?sha={urllib.parse.quote(branch, safe='')}"
+
+        with tempfile.TemporaryFile() as archive_file:
+
+            async def save(response: aiohttp.ClientResponse):
+                # The archive is spooled to disk, never held in memory
+                archive_file.seek(0)
+                archive_file.truncate()
+                async for chunk in response.content.iter_chunked(1 << 16):
+                    await asyncio.to_thread(archive_file.write, chunk)
+
+            await self.request(session, url, rate_limit, save)
+            msg.info(f"Downloaded archive of {owner}/{name}@{branch}")
+            archive_file.seek(0)
+
+            entries = iterate_archive(archive_file, folder, reader)
+            while True:
+                entry = await asyncio.to_thread(next, entries, None)
+                if entry is None:
+                    break
+                file_path, content = entry
+                blob_sha = get_blob_sha(content)
+                if not sync.is_unchanged(file_path, blob_sha):
+                    yield file_path, content, blob_sha
+
+    async def download_files(
+        self,
+        session: aiohttp.ClientSession,
+        platform: str,
+        owner: str,
+        name: str,
+        branch: str,
+        docs: dict[str, str],
+        rate_limit: RateLimit,
+        semaphore: asyncio.Semaphore,
+    ):
+        """Download files concurrently and yield their path, content and blob SHA as they arrive
+        @parameter: docs : dict[str, str] - Blob SHA by path of the files to download
+        """
+
+        async def download(file_path: str) -> tuple[str, bytes, str]:
+            if platform == "GitHub":
+                content = await self.download_file_github(
+                    session, owner, name, file_path, branch, rate_limit, semaphore
+                )
+            else:
+                content = await self.download_file_gitlab(
+                    session, owner, name, file_path, branch, rate_limit, semaphore
+                )
+            return file_path, content, docs[file_path]
+
+        # Keep every slot of the semaphore busy without downloading ahead of the pipeline
+        window = int(os.getenv("VERBA_GIT_CONCURRENCY", 8)) * 2
+        paths = iter(docs)
+        pending = set()
+        try:
+            while True:
+                while len(pending) < window:
+                    file_path = next(paths, None)
+                    if file_path is None:
+                        break
+                    pending.add(asyncio.create_task(download(file_path)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    file_path, content, blob_sha = task.result()
+                    if content:
+                        yield file_path, content, blob_sha
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_docs(
+        self,
+        session: aiohttp.ClientSession,
+        platform: str,
+        owner: str,
+        name: str,
+        branch: str,
+        folder: str,
+        reader: Reader,
+        rate_limit: RateLimit,
+        sync: SyncState = None,
+    ) -> dict[str, str]:
+        """List the matching files of the branch
+        @parameter: sync : SyncState - Keeps the stored documents of trees that can't be listed completely
+        @returns dict[str, str] - Blob SHA by path
+        """
+        if platform == "GitHub":
+            fetch_url = f"{self.get_api_url(platform)}/repos/{owner}/{name}/git/trees/{branch}?recursive=1"
+            docs = await self.fetch_docs_github(
+                session, fetch_url, folder, reader, rate_limit, sync
+            )
+        else:
+            project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
+            fetch_url = f"{self.get_api_url(platform)}/projects/{project_id}/repository/tree?ref={branch}&path={folder}&recursive=true&per_page=100"
+            docs = await self.fetch_docs_gitlab(session, fetch_url, reader, rate_limit)
+
+        msg.info(f"Fetched {len(docs)} document paths from {fetch_url}")
+        return docs
+
     async def fetch_docs_github(
-        self, url: str, folder: str, token: str, reader: Reader
-    ) -> list[str]:
-        headers = self.get_headers(token, "GitHub")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return [
-                    item["path"]
-                    for item in data["tree"]
-                    if item["path"].startswith(folder)
-                    and any(item["path"].endswith(ext) for ext in reader.extension)
-                ]
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        folder: str,
+        reader: Reader,
+        rate_limit: RateLimit,
+        sync: SyncState = None,
+        prefix: str = "",
+    ) -> dict[str, str]:
+        """List the matching blobs of a tree, GitHub truncates the recursive listing of large trees and their subtrees are then listed one by one
+        @parameter: url : str - Recursive tree API URL of the tree
+        @parameter: prefix : str - Path of the tree in the repository
+        """
+        data = await self.request(
+            session, url, rate_limit, lambda response: response.json()
+        )
+        if not data.get("truncated"):
+            return {
+                prefix + item["path"]: item["sha"]
+                for item in data["tree"]
+                if item["type"] == "blob"
+                and reader_matches(prefix + item["path"], folder, reader)
+            }
 
-    async def fetch_docs_gitlab(self, url: str, token: str, reader: Reader) -> list:
-        headers = self.get_headers(token, "GitLab")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return [
-                    item["path"]
-                    for item in data
-                    if item["type"] == "blob"
-                    and any(item["path"].endswith(ext) for ext in reader.extension)
-                ]
+        msg.warn(f"Tree of {url} is truncated, listing its subtrees one by one")
+        repo_url = url.split("/git/trees/")[0]
+        data = await self.request(
+            session,
+            url.replace("?recursive=1", ""),
+            rate_limit,
+            lambda response: response.json(),
+        )
+        if data.get("truncated") and sync is not None:
+            # Files missing from the listing would be removed by the sync
+            msg.warn(
+                f"Tree of {url} is too large to list, documents in {prefix or '/'} are not removed"
+            )
+            for title in sync.versions:
+                if title.startswith(prefix):
+                    sync.keep(title)
+
+        docs = {}
+        for item in data["tree"]:
+            item_path = prefix + item["path"]
+            if item["type"] == "blob" and reader_matches(item_path, folder, reader):
+                docs[item_path] = item["sha"]
+            elif item["type"] == "tree" and (
+                item_path.startswith(folder) or folder.startswith(item_path)
+            ):
+                docs.update(
+                    await self.fetch_docs_github(
+                        session,
+                        f"{repo_url}/git/trees/{item['sha']}?recursive=1",
+                        folder,
+                        reader,
+                        rate_limit,
+                        sync,
+                        item_path + "/",
+                    )
+                )
+        return docs
+
+    async def fetch_docs_gitlab(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        reader: Reader,
+        rate_limit: RateLimit,
+    ) -> dict[str, str]:
+        paths = {}
+        page = "1"
+        while page:
+
+            async def read(response: aiohttp.ClientResponse):
+                return await response.json(), response.headers.get("X-Next-Page")
+
+            data, page = await self.request(
+                session, f"{url}&page={page}", rate_limit, read
+            )
+            paths.update(
+                (item["path"], item["id"])
+                for item in data
+                if item["type"] == "blob" and reader_matches(item["path"], "", reader)
+            )
+        return paths
 
     async def download_file_github(
-        self, owner: str, name: str, path: str, branch: str, token: str
-    ) -> tuple[str, str, int, str]:
-        url = (
-            f"https://api.github.com/repos/{owner}/{name}/contents/{path}?ref={branch}"
+        self,
+        session: aiohttp.ClientSession,
+        owner: str,
+        name: str,
+        path: str,
+        branch: str,
+        rate_limit: RateLimit,
+        semaphore: asyncio.Semaphore,
+    ) -> bytes:
+        url = f"{self.get_api_url('GitHub')}/repos/{owner}/{name}/contents/{urllib.parse.quote(path)}?ref={branch}"
+        # The raw media type returns the file itself instead of base64 JSON
+        return await self.request(
+            session,
+            url,
+            rate_limit,
+            lambda response: response.read(),
+            headers={"Accept": "application/vnd.github.raw"},
+            semaphore=semaphore,
         )
-        headers = self.get_headers(token, "GitHub")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()
-                content_b64 = data["content"]
-                link = data["html_url"]
-                size = data["size"]
-                extension = os.path.splitext(path)[1][1:]
-                return content_b64, link, size, extension
 
     async def download_file_gitlab(
-        self, owner: str, name: str, file_path: str, branch: str, token: str
-    ) -> tuple[str, str, int, str]:
+        self,
+        session: aiohttp.ClientSession,
+        owner: str,
+        name: str,
+        file_path: str,
+        branch: str,
+        rate_limit: RateLimit,
+        semaphore: asyncio.Semaphore,
+    ) -> bytes:
         project_id = urllib.parse.quote(f"{owner}/{name}", safe="")
-        url = f"https://gitlab.com/api/v4/projects/{project_id}/repository/files/{urllib.parse.quote(file_path, safe='')}/raw?ref={branch}"
-        headers = {"PRIVATE-TOKEN": token}
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    content_b64 = base64.b64encode(content).decode("utf-8")
-                    size = len(content)
-                    extension = os.path.splitext(file_path)[1][1:]
-                    link = (
-                        f"https://gitlab.com/{owner}/{name}/-/blob/{branch}/{file_path}"
-                    )
-                    return content_b64, link, size, extension
-                else:
-                    raise Exception(
-                        f"Failed to download file: {response.status} {await response.text()}"
-                    )
+        url = f"{self.get_api_url('GitLab')}/projects/{project_id}/repository/files/{urllib.parse.quote(file_path, safe='')}/raw?ref={branch}"
+        return await self.request(
+            session,
+            url,
+            rate_limit,
+            lambda response: response.read(),
+            semaphore=semaphore,
+        )
 
     def get_headers(self, token: str, platform: str) -> dict:
         if platform == "GitHub":
@@ -209,3 +551,26 @@ class GitReader(Reader):
             return {
                 "Authorization": f"Bearer {token}",
             }
+
+
+def iterate_archive(archive_file, folder: str, reader: Reader):
+    """Yield path and content of the matching files of a tarball, one member at a time"""
+    with tarfile.open(fileobj=archive_file, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile() or "/" not in member.name:
+                continue
+            # Archives wrap the repository in a <repo>-<ref> directory
+            file_path = member.name.split("/", 1)[1]
+            if reader_matches(file_path, folder, reader):
+                yield file_path, archive.extractfile(member).read()
+
+
+def get_blob_sha(content: bytes) -> str:
+    """SHA git assigns to a file with this content, equal to the sha of the tree APIs"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def reader_matches(file_path: str, folder: str, reader: Reader) -> bool:
+    return file_path.startswith(folder) and any(
+        file_path.endswith(ext) for ext in reader.extension
+    )
@@ -1,15 +1,21 @@
-import base64
 import aiohttp
+import asyncio
+import hashlib
+import os
+import xml.etree.ElementTree as ElementTree
+from collections import deque
 from typing import Tuple, List
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 
 from wasabi import msg
 
 from goldenverba.components.document import Document
-from goldenverba.components.interfaces import Reader
+from goldenverba.components.interfaces import Reader, SyncState
 from goldenverba.server.types import FileConfig
-from goldenverba.components.reader.BasicReader import BasicReader
+from goldenverba.components.reader.BasicReader import BasicReader, file_config_for
+from goldenverba.components.executor import run_cpu
+from goldenverba.components.cache import PageCache
 from goldenverba.components.types import InputConfig
 
 try:
@@ -17,11 +23,105 @@ try:
 except ImportError:
     md = None
 
+# Query parameters that only track visitors and never change the page
+TRACKING_PARAMETERS = ("utm_", "fbclid", "gclid")
+
+# File types that are never HTML pages, skipped without requesting them
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".png", ".jpg", ".jpeg", ".gif", ".svg",
+    ".webp", ".ico", ".css", ".js", ".mp3", ".mp4", ".woff", ".woff2",
+)  # fmt: skip
+
+
+# Uncompressed size limit of the sitemap protocol, larger responses are not parsed
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+
+def parse_sitemap(data: bytes) -> ElementTree.Element:
+    """Parse a sitemap fetched from a remote host. Sitemaps are UTF-8 without a DTD, so documents
+    declaring a DOCTYPE or entities (e.g. entity expansion attacks) or using another encoding are rejected
+    """
+    if len(data) > MAX_SITEMAP_BYTES:
+        raise Exception(f"Sitemap exceeds {MAX_SITEMAP_BYTES} bytes")
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")) or b"\x00" in data:
+        raise Exception("Sitemap is not UTF-8 encoded")
+    lowered = data.lower()
+    if b"<!doctype" in lowered or b"<!entity" in lowered:
+        raise Exception("Sitemap declares a DTD")
+    return ElementTree.fromstring(data)
+
+
+async def read_limited(response: aiohttp.ClientResponse, limit: int) -> bytes:
+    """Body of a response, raises once it exceeds limit bytes instead of reading it to the end"""
+    if response.content_length is not None and response.content_length > limit:
+        raise Exception(f"Response exceeds {limit} bytes")
+    data = bytearray()
+    async for block in response.content.iter_chunked(64 * 1024):
+        data.extend(block)
+        if len(data) > limit:
+            raise Exception(f"Response exceeds {limit} bytes")
+    return bytes(data)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so the same page is crawled once: no fragment, no trailing slash,
+    lowercase scheme and host, no default port and sorted query parameters without tracking parameters
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (
+        scheme == "https" and netloc.endswith(":443")
+    ):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parsed.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not key.lower().startswith(TRACKING_PARAMETERS)
+        )
+    )
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
+
+def extract_links(html_content: str, base_url: str) -> List[str]:
+    """Absolute URLs of the links in the HTML that stay on the host of base_url"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    host = urlparse(base_url).netloc
+    links = []
+    for a_tag in soup.find_all("a", href=True):
+        absolute_url = urljoin(base_url, a_tag["href"])
+        parsed = urlparse(absolute_url)
+        if (
+            parsed.scheme in ("http", "https")
+            and parsed.netloc == host
+            and not parsed.path.lower().endswith(SKIPPED_EXTENSIONS)
+        ):
+            links.append(absolute_url)
+    return links
+
+
+def convert_page(
+    html_content: str, url: str, to_markdown: bool, with_links: bool
+) -> Tuple[bytes, List[str]]:
+    """Runs on the CPU executor: converts a page and extracts its links
+    @returns Tuple[bytes, List[str]] - The encoded content and the links of the page
+    """
+    if to_markdown:
+        if md is None:
+            raise Exception("markdownify is required for Markdown conversion")
+        content = md(html_content).encode("utf-8")
+    else:
+        content = html_content.encode("utf-8")
+    links = extract_links(html_content, url) if with_links else []
+    return content, links
+
 
 class HTMLReader(Reader):
     """
     The HTMLReader downloads HTML content from URLs and ingests it into Weaviate.
-    It can optionally fetch linked pages recursively.
+    It can optionally crawl linked pages breadth-first.
     """
 
     def __init__(self):
@@ -57,126 +157,282 @@ class HTMLReader(Reader):
                 description="Maximum depth for recursive fetching",
                 values=[],
             ),
+            "Max Pages": InputConfig(
+                type="number",
+                value=1000,
+                description="Maximum number of pages to fetch",
+                values=[],
+            ),
+            "Use Sitemap": InputConfig(
+                type="bool",
+                value=False,
+                description="Also fetch the pages listed in the sitemap.xml of each site",
+                values=[],
+            ),
         }
 
     async def load(self, config: dict, fileConfig: FileConfig) -> list[Document]:
+        return [document async for document in self.load_stream(config, fileConfig)]
+
+    async def load_stream(
+        self, config: dict, fileConfig: FileConfig, sync: SyncState = None
+    ):
         reader = BasicReader()
         urls = config["URLs"].values
         to_markdown = config["Convert To Markdown"].value
         recursive = config["Recursive"].value
         max_depth = int(config["Max Depth"].value)
+        # Configs saved before the crawler options existed don't have them
+        max_pages = int(config["Max Pages"].value) if "Max Pages" in config else 0
+        use_sitemap = config["Use Sitemap"].value if "Use Sitemap" in config else False
 
-        documents = []
-        processed_urls = set()
+        sync = sync or SyncState(self.get_sync_key(config, fileConfig))
+        page_cache = None
+        if os.getenv("VERBA_PAGE_CACHE", "True").lower() not in ("false", "0"):
+            page_cache = PageCache()
 
-        async with aiohttp.ClientSession() as session:
-            for url in urls:
-                try:
-                    await self.process_url(
-                        url,
-                        to_markdown,
-                        recursive,
-                        max_depth,
-                        0,
-                        session,
-                        reader,
+        concurrency = int(os.getenv("VERBA_CRAWL_CONCURRENCY", 16))
+        connector = aiohttp.TCPConnector(
+            limit=concurrency,
+            limit_per_host=int(os.getenv("VERBA_CRAWL_HOST_CONCURRENCY", 4)),
+        )
+        timeout = aiohttp.ClientTimeout(total=int(os.getenv("VERBA_CRAWL_TIMEOUT", 30)))
+
+        try:
+            async with aiohttp.ClientSession(
+                connector=connector, timeout=timeout
+            ) as session:
+                seeds = [(url, 0) for url in urls]
+                if use_sitemap:
+                    for url in urls:
+                        sitemap_urls = await self.fetch_sitemap(session, url)
+                        seeds.extend((sitemap_url, 0) for sitemap_url in sitemap_urls)
+
+                async for title, url, content, content_hash in self.crawl(
+                    session,
+                    seeds,
+                    to_markdown,
+                    recursive,
+                    max_depth,
+                    max_pages,
+                    concurrency,
+                    sync,
+                    page_cache,
+                ):
+                    new_file_config = file_config_for(
                         fileConfig,
-                        documents,
-                        processed_urls,
+                        title,
+                        "md" if to_markdown else "html",
+                        url,
+                        len(content),
                     )
-                except Exception as e:
-                    msg.warn(f"Failed to process URL {url}: {str(e)}")
+                    for document in await reader.load_file(new_file_config, content):
+                        sync.track(document, content_hash)
+                        yield document
+        finally:
+            if page_cache is not None:
+                page_cache.close()
 
-        return documents
+    def get_sync_key(self, config: dict, fileConfig: FileConfig) -> str:
+        """One opaque token for the set of start URLs, independent of their order and spelling"""
+        urls = sorted({normalize_url(url) for url in config["URLs"].values})
+        if not urls:
+            return ""
+        return "html:" + hashlib.sha256("\n".join(urls).encode("utf-8")).hexdigest()
 
-    async def process_url(
+    async def crawl(
         self,
-        url: str,
+        session: aiohttp.ClientSession,
+        seeds: list[tuple[str, int]],
         to_markdown: bool,
         recursive: bool,
         max_depth: int,
-        current_depth: int,
-        session: aiohttp.ClientSession,
-        reader: BasicReader,
-        fileConfig: FileConfig,
-        documents: List[Document],
-        processed_urls: set,
+        max_pages: int,
+        concurrency: int,
+        sync: SyncState,
+        page_cache: PageCache = None,
     ):
-        if url in processed_urls or current_depth > max_depth:
-            return
+        """Breadth-first crawl, yields the title, URL, converted content and HTML hash of every new or changed page as it arrives.
+        Pages are titled by their normalized URL, so the title doesn't depend on which link to the page was found first.
+        Pages are fetched concurrently, links are only followed up to max_depth.
+        Pages stored in their cached version are requested conditionally and skipped if the server answers 304 Not Modified.
+        @parameter: seeds : list[tuple[str, int]] - URLs to start from and their depth
+        @parameter: max_pages : int - Maximum number of pages to fetch, 0 for no limit
+        @parameter: page_cache : PageCache - Validators of previously fetched pages, None to fetch every page in full
+        """
+        frontier = deque()
+        queued = set()
+        truncated = False
 
-        processed_urls.add(url)
+        def enqueue(url: str, depth: int):
+            nonlocal truncated
+            normalized = normalize_url(url)
+            if normalized in queued or depth > max_depth:
+                return
+            if max_pages and len(queued) >= max_pages:
+                truncated = True
+                return
+            queued.add(normalized)
+            frontier.append((url, depth))
 
-        try:
-            content, size, _html = await self.fetch_html_and_convert(
-                session, url, to_markdown
-            )
-            new_file_config = FileConfig(
-                fileID=fileConfig.fileID,
-                filename=url,
-                isURL=False,
-                overwrite=fileConfig.overwrite,
-                extension="md" if to_markdown else "html",
-                source=url,
-                content=content,
-                labels=fileConfig.labels,
-                rag_config=fileConfig.rag_config,
-                file_size=size,
-                status=fileConfig.status,
-                status_report=fileConfig.status_report,
-                metadata=fileConfig.metadata,
+        for url, depth in seeds:
+            enqueue(url, depth)
+
+        async def fetch(url: str, depth: int):
+            follow = recursive and depth < max_depth
+            cached = None
+            if page_cache is not None:
+                cached = await page_cache.lookup(normalize_url(url))
+            # Only pages whose document is stored in the cached version may be skipped,
+            # pages stored under a title of earlier versions (not normalized) are loaded again
+            validated = (
+                cached is not None
+                and cached["title"] == normalize_url(cached["title"])
+                and sync.is_current(cached["title"], cached["content_hash"])
             )
-            document = await reader.load(self.config, new_file_config)
-            documents.extend(document)
-
-            if recursive and current_depth < max_depth:
-                linked_urls = self.extract_links(_html, url)
-                for linked_url in linked_urls:
-                    await self.process_url(
-                        linked_url,
+            try:
+                status, html_content, final_url, validators = await self.fetch_html(
+                    session, url, cached if validated else None
+                )
+                if status == 304:
+                    sync.is_unchanged(cached["title"], cached["content_hash"])
+                    links = cached["links"] if follow else []
+                    return cached["title"], url, depth, None, links, ""
+
+                # Pages redirected to a page of the crawl are only imported once
+                title = normalize_url(final_url)
+                if title != normalize_url(url) and title in queued:
+                    return title, final_url, depth, None, [], ""
+                queued.add(title)
+                if html_content is None:
+                    return title, final_url, depth, None, [], ""
+
+                content_hash = hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+                if sync.is_unchanged(title, content_hash):
+                    # Servers without validators still send the same page
+                    content = None
+                    if cached is not None and cached["content_hash"] == content_hash:
+                        links = cached["links"]
+                    else:
+                        links = await run_cpu(extract_links, html_content, final_url)
+                else:
+                    content, links = await run_cpu(
+                        convert_page,
+                        html_content,
+                        final_url,
                         to_markdown,
-                        recursive,
-                        max_depth,
-                        current_depth + 1,
-                        session,
-                        reader,
-                        fileConfig,
-                        documents,
-                        processed_urls,
+                        follow or page_cache is not None,
                     )
-        except Exception as e:
-            msg.warn(f"Failed to process URL {url}: {str(e)}")
+                if page_cache is not None:
+                    await page_cache.store(
+                        normalize_url(url),
+                        {
+                            "title": title,
+                            "content_hash": content_hash,
+                            "links": links,
+                            **validators,
+                        },
+                    )
+                links = links if follow else []
+                return title, final_url, depth, content, links, content_hash
+            except Exception as e:
+                msg.warn(f"Failed to process URL {url}: {str(e)}")
+                # Pages that failed to load are kept instead of removed, also under the title of earlier versions
+                sync.keep(normalize_url(url))
+                sync.keep(url)
+                if cached is not None:
+                    sync.keep(cached["title"])
+                return url, url, depth, None, [], ""
 
-    async def fetch_html_and_convert(
-        self, session: aiohttp.ClientSession, url: str, to_markdown: bool
-    ) -> Tuple[str, int, str]:
-        """
-        Fetches the HTML content of the given URL and optionally converts it to Markdown.
+        # Keep every connection busy without fetching far ahead of the pipeline
+        window = concurrency * 2
+        pending = set()
+        try:
+            while True:
+                while frontier and len(pending) < window:
+                    pending.add(asyncio.create_task(fetch(*frontier.popleft())))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    title, url, depth, content, links, content_hash = task.result()
+                    for link in links:
+                        enqueue(link, depth + 1)
+                    if content is not None:
+                        yield title, url, content, content_hash
+        finally:
+            for task in pending:
+                task.cancel()
 
-        :param session: The aiohttp ClientSession to use for the request.
-        :param url: The URL of the web page to fetch.
-        :param to_markdown: Whether to convert the HTML to Markdown.
-        :return: A tuple containing the base64-encoded content and its size.
+        if truncated:
+            # Pages beyond Max Pages were not checked, so none of them counts as removed
+            for title in sync.versions:
+                sync.keep(title)
+
+    async def fetch_html(
+        self, session: aiohttp.ClientSession, url: str, cached: dict = None
+    ) -> Tuple[int, str | None, str, dict]:
+        """Fetches a page, conditionally if a cached version is given
+        @returns Tuple[int, str | None, str, dict] - The status, the HTML (None for 304 and other content types), the URL after redirects and the validators of the page
         """
+        headers = {}
+        if cached is not None and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached is not None and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
         try:
-            async with session.get(url) as response:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and headers:
+                    return 304, None, str(response.url), {}
                 response.raise_for_status()
-                html_content = await response.text()
-
-            if to_markdown:
-                if md is None:
-                    raise ImportError("markdownify is required for Markdown conversion")
-                content = md(html_content).encode("utf-8")
-            else:
-                content = html_content.encode("utf-8")
-
-            base64_content = base64.b64encode(content).decode("utf-8")
-            return base64_content, len(content), html_content
-
+                validators = {
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                }
+                if "html" not in response.headers.get("Content-Type", "text/html"):
+                    return response.status, None, str(response.url), validators
+                return (
+                    response.status,
+                    await response.text(),
+                    str(response.url),
+                    validators,
+                )
         except aiohttp.ClientError as e:
             raise Exception(f"Failed to fetch HTML content from URL: {str(e)}")
-        except ImportError as e:
-            raise Exception(f"Markdown conversion failed: {str(e)}")
+
+    async def fetch_sitemap(
+        self, session: aiohttp.ClientSession, url: str
+    ) -> List[str]:
+        """URLs listed in the sitemap.xml of the site of url, following one level of sitemap indexes"""
+        parsed = urlparse(url)
+        sitemaps = [
+            urlunparse((parsed.scheme, parsed.netloc, "/sitemap.xml", "", "", ""))
+        ]
+        urls = []
+        for _ in range(2):
+            nested = []
+            for sitemap in sitemaps:
+                try:
+                    async with session.get(sitemap) as response:
+                        response.raise_for_status()
+                        root = parse_sitemap(
+                            await read_limited(response, MAX_SITEMAP_BYTES)
+                        )
+                except Exception as e:
+                    msg.warn(f"Failed to read sitemap {sitemap}: {str(e)}")
+                    continue
+                for loc in root.iter():
+                    if not loc.tag.endswith("loc") or not loc.text:
+                        continue
+                    if root.tag.endswith("sitemapindex"):
+                        nested.append(loc.text.strip())
+                    elif urlparse(loc.text.strip()).netloc == parsed.netloc:
+                        urls.append(loc.text.strip())
+            sitemaps = nested
+        msg.info(f"Found {len(urls)} pages in the sitemap of {parsed.netloc}")
+        return urls
 
     def extract_links(self, html_content: str, base_url: str) -> List[str]:
         """
@@ -186,11 +442,4 @@ class HTMLReader(Reader):
         :param base_url: The base URL to resolve relative links.
         :return: A list of absolute URLs found in the HTML content.
         """
-        soup = BeautifulSoup(html_content, "html.parser")
-        links = []
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"]
-            absolute_url = urljoin(base_url, href)
-            if urlparse(absolute_url).netloc == urlparse(base_url).netloc:
-                links.append(absolute_url)
-        return links
+        return extract_links(html_content, base_url)
@@ -11,6 +11,7 @@ from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
 from goldenverba.components.util import get_environment
 from goldenverba.components.types import InputConfig
+from goldenverba.components.uploads import open_file
 
 
 class UnstructuredReader(Reader):
@@ -79,35 +80,35 @@ class UnstructuredReader(Reader):
 
         msg.info(f"Loading {fileConfig.filename}")
 
-        file_data = aiohttp.FormData()
-        file_data.add_field("strategy", strategy)
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
-        file_data.add_field(
-            "files",
-            file_bytes,
-            filename=f"{fileConfig.filename}.{fileConfig.extension}",
-        )
-
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url, headers=headers, data=file_data
-                ) as response:
-                    response.raise_for_status()  # Raise an exception for bad status codes
-                    json_response = await response.json()
-
-                    if "detail" in json_response:
-                        raise ValueError(f"API error: {json_response['detail']}")
-
-                    file_content = "".join(
-                        chunk.get("text", "") for chunk in json_response
-                    )
-
-                    return [create_document(file_content, fileConfig)]
-
-        except requests.RequestException as e:
-            raise Exception(
-                f"Unstructured API request failed for {fileConfig.filename}: {str(e)}"
+        with open_file(fileConfig) as file_bytes:
+            file_data = aiohttp.FormData()
+            file_data.add_field("strategy", strategy)
+            file_data.add_field(
+                "files",
+                file_bytes,
+                filename=f"{fileConfig.filename}.{fileConfig.extension}",
             )
-        except Exception as e:
-            raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
+
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(
+                        api_url, headers=headers, data=file_data
+                    ) as response:
+                        response.raise_for_status()  # Raise an exception for bad status codes
+                        json_response = await response.json()
+
+                        if "detail" in json_response:
+                            raise ValueError(f"API error: {json_response['detail']}")
+
+                        file_content = "".join(
+                            chunk.get("text", "") for chunk in json_response
+                        )
+
+                        return [create_document(file_content, fileConfig)]
+
+            except requests.RequestException as e:
+                raise Exception(
+                    f"Unstructured API request failed for {fileConfig.filename}: {str(e)}"
+                )
+            except Exception as e:
+                raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
@@ -11,6 +11,7 @@ from goldenverba.components.interfaces import Reader
 from goldenverba.server.types import FileConfig
 from goldenverba.components.util import get_environment
 from goldenverba.components.types import InputConfig
+from goldenverba.components.uploads import open_file
 
 
 class UpstageDocumentParseReader(Reader):
@@ -63,34 +64,34 @@ class UpstageDocumentParseReader(Reader):
 
         msg.info(f"Loading {fileConfig.filename}")
 
-        file_data = aiohttp.FormData()
-        file_bytes = io.BytesIO(base64.b64decode(fileConfig.content))
-        file_data.add_field(
-            "document",
-            file_bytes,
-            filename=f"{fileConfig.filename}.{fileConfig.extension}",
-        )
+        with open_file(fileConfig) as file_bytes:
+            file_data = aiohttp.FormData()
+            file_data.add_field(
+                "document",
+                file_bytes,
+                filename=f"{fileConfig.filename}.{fileConfig.extension}",
+            )
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url, headers=headers, data=file_data
-                ) as response:
-                    response.raise_for_status()
-                    json_response = await response.json()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(
+                        api_url, headers=headers, data=file_data
+                    ) as response:
+                        response.raise_for_status()
+                        json_response = await response.json()
 
-                    if "content" not in json_response:
-                        raise ValueError(f"API error: Invalid response format")
+                        if "content" not in json_response:
+                            raise ValueError(f"API error: Invalid response format")
 
-                    # Extract text content from HTML
-                    html_content = json_response["content"]["html"]
-                    # You might want to add HTML to text conversion here
-                    # For now, we'll use the HTML content directly
-                    return [create_document(html_content, fileConfig)]
+                        # Extract text content from HTML
+                        html_content = json_response["content"]["html"]
+                        # You might want to add HTML to text conversion here
+                        # For now, we'll use the HTML content directly
+                        return [create_document(html_content, fileConfig)]
 
-        except aiohttp.ClientError as e:
-            raise Exception(
-                f"Upstage API request failed for {fileConfig.filename}: {str(e)}"
-            )
-        except Exception as e:
-            raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
+            except aiohttp.ClientError as e:
+                raise Exception(
+                    f"Upstage API request failed for {fileConfig.filename}: {str(e)}"
+                )
+            except Exception as e:
+                raise Exception(f"Failed to process {fileConfig.filename}: {str(e)}")
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import uuid
+
+import fitz  # PyMuPDF
+from wasabi import msg
+
+# Images are served from this folder by the /img/{image_name} endpoint
+IMAGE_DIR = "img"
+
+
+def open_pdf(file_source: str | bytes) -> fitz.Document:
+    if isinstance(file_source, str):
+        return fitz.open(file_source, filetype="pdf")
+    return fitz.open(stream=file_source, filetype="pdf")
+
+
+def count_pdf_pages(file_source: str | bytes) -> int:
+    with open_pdf(file_source) as doc:
+        return len(doc)
+
+
+def store_image(image_bytes: bytes, extension: str) -> str:
+    """Write an image as extracted from the PDF, named by the hash of its bytes.
+    Images repeated on many pages or in many documents (e.g. logos) are written once.
+    @returns str - Path of the image
+    """
+    name = f"{IMAGE_DIR}/{hashlib.sha256(image_bytes).hexdigest()[:32]}.{extension}"
+    if not os.path.exists(name):
+        os.makedirs(IMAGE_DIR, exist_ok=True)
+        # Workers extracting the same image never see a partially written file
+        partial_name = f"{name}.{uuid.uuid4().hex}.part"
+        with open(partial_name, "wb") as f:
+            f.write(image_bytes)
+        os.replace(partial_name, name)
+    return name
+
+
+def extract_pdf_pages(
+    file_source: str | bytes, start: int, end: int, images: bool = True
+) -> list[str]:
+    """Extract the text blocks and images of the pages [start, end) in reading order.
+    Runs in a worker process, every worker opens the PDF itself.
+    @parameter: images : bool - Store embedded images and reference them in the text
+    @returns list[str] - Text blocks and image references
+    """
+    elements = []
+    # Images shared by several pages have one xref and are extracted once
+    stored_images = {}
+    with open_pdf(file_source) as doc:
+        for page_num in range(start, end):
+            page = doc.load_page(page_num)
+            page_elements = []
+            for block in page.get_text("blocks"):
+                if len(block) >= 5 and block[4].strip():
+                    x0, y0, _, _, text = block[:5]
+                    page_elements.append((y0, x0, f" {text}"))
+
+            if images:
+                for image in page.get_images(full=True):
+                    xref = image[0]
+                    try:
+                        rect = page.get_image_bbox(image)
+                    except Exception as e:
+                        msg.warn(
+                            f"Couldn't locate image {xref} on page {page_num + 1}: {str(e)}"
+                        )
+                        continue
+                    if not rect:
+                        continue
+                    if xref not in stored_images:
+                        extracted = doc.extract_image(xref)
+                        stored_images[xref] = store_image(
+                            extracted["image"], extracted["ext"]
+                        )
+                    page_elements.append(
+                        (
+                            rect.y0,
+                            rect.x0,
+                            f"Imagen {page_num + 1}:\n{stored_images[xref]}",
+                        )
+                    )
+
+            page_elements.sort(key=lambda element: (element[0], element[1]))
+            elements.extend(text for _, _, text in page_elements)
+    return elements
+
+
+def extract_pdf_text(file_source: str | bytes, images: bool = True) -> str:
+    """Extract text and images of all pages of a PDF file (path or bytes)"""
+    return "\n\n".join(
+        extract_pdf_pages(file_source, 0, count_pdf_pages(file_source), images)
+    )
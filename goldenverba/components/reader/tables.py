@@ -0,0 +1,104 @@
+import csv
+import hashlib
+import io
+from typing import Iterator, TextIO
+
+from wasabi import msg
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    msg.warn("openpyxl not installed, XLSX functionality will be limited.")
+    load_workbook = None
+
+# Files that are streamed row by row into row-batched chunks
+TABLE_EXTENSIONS = ["xlsx", "csv"]
+
+
+def format_row(row: tuple) -> str:
+    return "\t".join(str(cell) if cell is not None else "" for cell in row)
+
+
+def open_text(file_source: str | bytes) -> TextIO:
+    if isinstance(file_source, str):
+        return open(file_source, encoding="utf-8-sig", errors="replace", newline="")
+    return io.TextIOWrapper(
+        io.BytesIO(file_source), encoding="utf-8-sig", errors="replace", newline=""
+    )
+
+
+def iter_sheets(
+    file_source: str | bytes, extension: str
+) -> Iterator[tuple[str, Iterator[tuple]]]:
+    """Yield the name and a row iterator of every sheet, rows are read one at a time.
+    CSV files have a single sheet without name.
+    """
+    if extension == "xlsx":
+        if load_workbook is None:
+            raise Exception("openpyxl is required to read XLSX files")
+        source = (
+            file_source if isinstance(file_source, str) else io.BytesIO(file_source)
+        )
+        # Read-only workbooks load rows lazily instead of the whole sheet
+        workbook = load_workbook(source, read_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                yield sheet.title, sheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        with open_text(file_source) as f:
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+            except csv.Error:
+                dialect = csv.excel
+            yield "", csv.reader(f, dialect)
+
+
+def iter_table_chunks(
+    file_source: str | bytes, extension: str, rows_per_chunk: int
+) -> Iterator[str]:
+    """Yield chunks of rows_per_chunk rows, each starting with the header row of its sheet.
+    Only one chunk is held in memory, the sheet is never joined into one string.
+    """
+    for sheet_name, rows in iter_sheets(file_source, extension):
+        prefix = f"Sheet: {sheet_name}\n" if sheet_name else ""
+        header = None
+        batch = []
+        chunks = 0
+        for row in rows:
+            line = format_row(row)
+            if not line.strip():
+                continue
+            if header is None:
+                header = line
+                continue
+            batch.append(line)
+            if len(batch) >= rows_per_chunk:
+                yield prefix + "\n".join([header, *batch])
+                chunks += 1
+                batch = []
+        if batch or (header is not None and chunks == 0):
+            yield prefix + "\n".join([header, *batch])
+
+
+def hash_file(file_source: str | bytes) -> str:
+    """sha256 of a file, read in blocks"""
+    if isinstance(file_source, bytes):
+        return hashlib.sha256(file_source).hexdigest()
+    sha = hashlib.sha256()
+    with open(file_source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def preview_table(file_source: str | bytes, extension: str, rows_per_chunk: int) -> str:
+    """First chunk of a table, used as the content of its document"""
+    chunks = iter_table_chunks(file_source, extension, rows_per_chunk)
+    try:
+        return next(chunks, "")
+    finally:
+        chunks.close()
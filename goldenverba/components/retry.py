@@ -0,0 +1,92 @@
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+# Statuses of throttled or temporarily unavailable providers
+RETRY_STATUSES = [408, 409, 425, 429, 500, 502, 503, 504]
+
+
+class RetryableError(Exception):
+    """A request that can be sent again, retry_after is the delay requested by the provider in seconds"""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds of a Retry-After header, given as seconds or as HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_after(error: Exception) -> float | None:
+    if isinstance(error, RetryableError):
+        return error.retry_after
+    if isinstance(error, aiohttp.ClientResponseError) and error.headers:
+        return parse_retry_after(error.headers.get("Retry-After"))
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, RetryableError):
+        return True
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(
+        error,
+        (
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+        ),
+    )
+
+
+def wrap_client_error(error: aiohttp.ClientError, message: str) -> Exception:
+    """Exception raised by embedders for a failed request, throttling and server errors stay retryable"""
+    if isinstance(error, aiohttp.ClientResponseError) and error.status == 429:
+        return RetryableError(
+            f"Rate limit exceeded: {message}", retry_after=get_retry_after(error)
+        )
+    if is_retryable(error):
+        return RetryableError(message, retry_after=get_retry_after(error))
+    return Exception(message)
+
+
+def get_backoff(attempt: int, retry_after: float | None = None) -> float:
+    """Delay before retry number attempt (starting at 0): full jitter exponential backoff,
+    but never shorter than the Retry-After of the provider
+    """
+    base = float(os.getenv("VERBA_EMBED_RETRY_BASE", 1))
+    max_delay = float(os.getenv("VERBA_EMBED_RETRY_MAX_DELAY", 60))
+    delay = random.uniform(0, min(max_delay, base * 2**attempt))
+    if retry_after is not None:
+        # Spread the batches that were throttled at the same time
+        delay = retry_after + random.uniform(0, base)
+    return delay
+
+
+class RetryBudget:
+    """Retries left for one import, so a provider that is down fails the import instead of retrying every batch"""
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+
+    def spend(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
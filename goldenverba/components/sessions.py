@@ -0,0 +1,72 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+import aiohttp
+from wasabi import msg
+
+
+def get_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class SessionPool:
+    """
+    One aiohttp session per base URL, shared by all requests to that API.
+    Connections are kept alive between embedding batches, so an import doesn't pay the TCP and TLS handshake per request.
+    Sessions belong to the event loop that created them and are closed by close() (in the FastAPI lifespan or at the end of a CLI command).
+    """
+
+    def __init__(self):
+        self.sessions: dict[
+            str, tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]
+        ] = {}
+
+    def create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=int(os.getenv("VERBA_HTTP_CONNECTIONS", 100)),
+            limit_per_host=int(os.getenv("VERBA_HTTP_CONNECTIONS_PER_HOST", 32)),
+            keepalive_timeout=float(os.getenv("VERBA_HTTP_KEEPALIVE", 30)),
+            ttl_dns_cache=int(os.getenv("VERBA_HTTP_DNS_TTL", 300)),
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=float(os.getenv("VERBA_HTTP_TIMEOUT", 300)),
+            sock_connect=float(os.getenv("VERBA_HTTP_CONNECT_TIMEOUT", 10)),
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    def get(self, url: str) -> aiohttp.ClientSession:
+        """Session for the origin of url, created on first use in the running event loop"""
+        origin = get_origin(url)
+        loop = asyncio.get_running_loop()
+        entry = self.sessions.get(origin)
+        if entry is not None and entry[0] is loop and not entry[1].closed:
+            return entry[1]
+        session = self.create_session()
+        self.sessions[origin] = (loop, session)
+        return session
+
+    async def close(self):
+        """Close the sessions of the running event loop, sessions of finished loops are dropped"""
+        loop = asyncio.get_running_loop()
+        sessions = self.sessions
+        self.sessions = {}
+        for origin, (session_loop, session) in sessions.items():
+            if session_loop is not loop:
+                continue
+            try:
+                await session.close()
+            except Exception as e:
+                msg.warn(f"Failed to close HTTP session of {origin}: {str(e)}")
+
+
+session_pool = SessionPool()
+
+
+@asynccontextmanager
+async def http_session(url: str) -> AsyncIterator[aiohttp.ClientSession]:
+    """Borrow the shared session of url's base URL, it stays open when the block exits"""
+    yield session_pool.get(url)
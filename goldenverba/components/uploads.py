@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import io
+import os
+import re
+import uuid
+from typing import AsyncIterable, BinaryIO
+
+from goldenverba.components.util import get_data_dir
+from goldenverba.server.types import FileConfig
+
+UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadStore:
+    """
+    Uploaded files, streamed to disk inside the Verba data dir.
+    Files are referenced by a server generated upload id, the client never chooses a path.
+    """
+
+    def __init__(self, path: str = None):
+        self.directory = path or get_data_dir("uploads")
+        os.makedirs(self.directory, exist_ok=True)
+        # Bytes written so far by the uploads in progress
+        self.in_progress: dict[str, int] = {}
+
+    def get_path(self, upload_id: str) -> str:
+        if not UPLOAD_ID.match(upload_id):
+            raise Exception(f"Invalid upload id {upload_id}")
+        return os.path.join(self.directory, upload_id)
+
+    def exists(self, upload_id: str) -> bool:
+        return os.path.exists(self.get_path(upload_id))
+
+    def stored_size(self) -> int:
+        """Bytes of the completed uploads on disk"""
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if UPLOAD_ID.match(entry.name)
+        )
+
+    async def save(
+        self, stream: AsyncIterable[bytes], max_size: int = 0, max_total: int = 0
+    ) -> tuple[str, int]:
+        """Write a stream of bytes to a new upload, only one chunk is held in memory at a time
+        @parameter: max_size : int - Maximum size in bytes, 0 for no limit
+        @parameter: max_total : int - Maximum size in bytes of all pending uploads including this one, 0 for no limit
+        @returns tuple[str, int] - The upload id and the size of the file
+        """
+        upload_id = uuid.uuid4().hex
+        path = self.get_path(upload_id)
+        # Incomplete uploads never show up under their upload id
+        partial_path = path + ".part"
+        stored = await asyncio.to_thread(self.stored_size) if max_total else 0
+        size = 0
+        self.in_progress[upload_id] = 0
+        try:
+            with open(partial_path, "wb") as f:
+                async for chunk in stream:
+                    size += len(chunk)
+                    self.in_progress[upload_id] = size
+                    if max_size and size > max_size:
+                        raise Exception(
+                            f"Upload exceeds the maximum size of {max_size} bytes"
+                        )
+                    if (
+                        max_total
+                        and stored + sum(self.in_progress.values()) > max_total
+                    ):
+                        raise Exception(
+                            f"Pending uploads exceed the maximum of {max_total} bytes"
+                        )
+                    await asyncio.to_thread(f.write, chunk)
+            os.replace(partial_path, path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        finally:
+            self.in_progress.pop(upload_id, None)
+        return upload_id, size
+
+    def delete(self, upload_id: str):
+        path = self.get_path(upload_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def delete_older_than(self, older_than: float, keep: set[str] = set()):
+        """Remove uploads and incomplete uploads last modified before the given timestamp, except the ones in keep"""
+        for name in os.listdir(self.directory):
+            upload_id = name.removesuffix(".part")
+            path = os.path.join(self.directory, name)
+            if upload_id in keep or not UPLOAD_ID.match(upload_id):
+                continue
+            if os.path.getmtime(path) < older_than:
+                os.remove(path)
+
+
+def get_file_source(fileConfig: FileConfig) -> str | bytes:
+    """Path of the uploaded file of a FileConfig, or its decoded base64 content"""
+    if fileConfig.upload_id:
+        path = UploadStore().get_path(fileConfig.upload_id)
+        if not os.path.exists(path):
+            raise Exception(f"Upload of {fileConfig.filename} not found")
+        return path
+    return base64.b64decode(fileConfig.content)
+
+
+def open_file(fileConfig: FileConfig) -> BinaryIO:
+    """Open the file of a FileConfig, from disk for uploads"""
+    source = get_file_source(fileConfig)
+    return open(source, "rb") if isinstance(source, str) else io.BytesIO(source)
+
+
+def read_file(source: str | bytes) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def get_upload_id(file_config: str) -> str:
+    """Upload id of a serialized FileConfig, empty if it has none"""
+    return FileConfig.model_validate_json(file_config).upload_id
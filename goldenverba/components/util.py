@@ -58,4 +58,14 @@ def get_environment(config, value: str, env: str, error_msg: str) -> str:
 def get_token(env: str, default: str = None) -> str:
     # return token, but treat empty string als None
     token = tok if bool(tok := os.getenv(env, None)) else default
-    return token
\ No newline at end of file
+    return token
+
+
+def get_data_dir(*parts: str) -> str:
+    # return (and create) a directory inside the local Verba data dir, configurable with VERBA_DATA_DIR
+    base = os.getenv("VERBA_DATA_DIR") or os.path.join(
+        os.path.expanduser("~"), ".verba"
+    )
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -4,8 +4,15 @@ from fastapi.responses import FileResponse, JSONResponse
 from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 import asyncio
-
-from goldenverba.server.helpers import LoggerManager, BatchManager
+import time
+
+from goldenverba.server.helpers import BatchManager, ImportQueue
+from goldenverba.components.jobs import JobStore, JobStatus, credentials_match
+from goldenverba.components.uploads import UploadStore, get_upload_id
+from goldenverba.components.executor import shutdown_executor
+from goldenverba.components.models import get_warm_models
+from goldenverba.components.sessions import session_pool
+from goldenverba.components.embedding.SentenceTransformersEmbedder import warm_up
 from weaviate.client import WeaviateAsyncClient
 
 import os
@@ -56,13 +63,76 @@ manager = verba_manager.VerbaManager()
 
 client_manager = verba_manager.ClientManager()
 
+job_store = JobStore()
+manager.job_store = job_store
+upload_store = UploadStore()
+max_upload_size = int(float(os.getenv("VERBA_MAX_UPLOAD_MB", 512)) * 1024 * 1024)
+max_pending_uploads_size = int(
+    float(os.getenv("VERBA_MAX_PENDING_UPLOADS_MB", 2048)) * 1024 * 1024
+)
+import_queue = ImportQueue(
+    manager,
+    client_manager,
+    job_store,
+    workers=int(os.getenv("VERBA_IMPORT_WORKERS", 2)),
+    upload_store=upload_store,
+)
+
 ### Lifespan
 
 
+def prune_uploads(older_than: float):
+    """Remove old uploads that no unfinished job refers to"""
+    keep = set()
+    for job in job_store.get_jobs([JobStatus.QUEUED, JobStatus.RUNNING]):
+        file_config = job_store.get_file_config(job["job_id"])
+        if file_config is not None:
+            keep.add(get_upload_id(file_config))
+    upload_store.delete_older_than(older_than, keep)
+
+
+async def prune_periodically():
+    """Remove finished jobs and orphaned uploads on startup and then every VERBA_PRUNE_INTERVAL seconds"""
+    retention_days = float(os.getenv("VERBA_JOB_RETENTION_DAYS", 7))
+    upload_retention_hours = float(os.getenv("VERBA_UPLOAD_RETENTION_HOURS", 24))
+    interval = float(os.getenv("VERBA_PRUNE_INTERVAL", 3600))
+    while True:
+        try:
+            await asyncio.to_thread(
+                job_store.delete_finished_jobs, time.time() - retention_days * 86400
+            )
+            # Uploads that were never imported, uploads of jobs are deleted when the job finishes
+            await asyncio.to_thread(
+                prune_uploads, time.time() - upload_retention_hours * 3600
+            )
+        except Exception as e:
+            msg.warn(f"Pruning jobs and uploads failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Local embedding models listed in VERBA_WARM_MODELS are loaded in the background
+    warm_models = get_warm_models()
+    warm_task = (
+        asyncio.create_task(asyncio.to_thread(warm_up, warm_models))
+        if warm_models
+        else None
+    )
+    prune_task = None
+    if production != "Demo":
+        prune_task = asyncio.create_task(prune_periodically())
+        await import_queue.start()
     yield
+    if prune_task is not None:
+        prune_task.cancel()
+        await asyncio.gather(prune_task, return_exceptions=True)
+    if warm_task is not None:
+        await warm_task
+    await import_queue.stop()
     await client_manager.disconnect()
+    await session_pool.close()
+    shutdown_executor()
 
 
 # FastAPI App
@@ -248,25 +318,30 @@ async def websocket_import_files(websocket: WebSocket):
         return
 
     await websocket.accept()
-    logger = LoggerManager(websocket)
     batcher = BatchManager()
+    attached = False
 
     while True:
         try:
             data = await websocket.receive_text()
             batch_data = DataBatchPayload.model_validate_json(data)
+            if not attached:
+                # Reattach to the imports of the same credentials that are still running
+                import_queue.attach(websocket, batch_data.credentials)
+                attached = True
             fileConfig = batcher.add_batch(batch_data)
             if fileConfig is not None:
-                client = await client_manager.connect(batch_data.credentials)
-                await asyncio.create_task(
-                    manager.import_document(client, fileConfig, logger)
+                await import_queue.enqueue(
+                    fileConfig, batch_data.credentials, websocket
                 )
 
         except WebSocketDisconnect:
             msg.warn("Import WebSocket connection closed by client.")
+            import_queue.detach(websocket)
             break
         except Exception as e:
             msg.fail(f"Import WebSocket Error: {str(e)}")
+            import_queue.detach(websocket)
             break
 
 
@@ -684,6 +759,66 @@ async def delete_document(payload: GetDocumentPayload):
         return JSONResponse(status_code=400, content={})
 
 
+# Stream a file to disk, its upload_id replaces the base64 content of the FileConfig sent to /ws/import_files
+@app.post("/api/upload")
+async def upload_file(request: Request):
+    if production == "Demo":
+        return JSONResponse(
+            status_code=403,
+            content={"upload_id": "", "file_size": 0, "error": "Uploads are disabled"},
+        )
+
+    try:
+        upload_id, size = await upload_store.save(
+            request.stream(), max_upload_size, max_pending_uploads_size
+        )
+        msg.good(f"Received upload {upload_id} with {size} bytes")
+        return JSONResponse(
+            status_code=200,
+            content={"upload_id": upload_id, "file_size": size, "error": ""},
+        )
+
+    except Exception as e:
+        msg.fail(f"Upload failed: {str(e)}")
+        return JSONResponse(
+            status_code=400,
+            content={
+                "upload_id": "",
+                "file_size": 0,
+                "error": f"Upload failed: {str(e)}",
+            },
+        )
+
+
+# Get the progress of import jobs, including jobs of previous sessions
+@app.post("/api/get_import_jobs")
+async def get_import_jobs(payload: Credentials):
+    if production == "Demo":
+        return JSONResponse(status_code=200, content={"jobs": [], "error": ""})
+
+    try:
+        # Interrupted jobs of these credentials waited for their API key
+        import_queue.resume(payload)
+        jobs = await asyncio.to_thread(job_store.get_jobs)
+        content = []
+        for job in jobs:
+            credentials = job.pop("credentials")
+            if not credentials_match(credentials, payload.model_dump()):
+                continue
+            job["reports"] = await asyncio.to_thread(
+                job_store.get_reports, job["job_id"]
+            )
+            content.append(job)
+        return JSONResponse(status_code=200, content={"jobs": content, "error": ""})
+
+    except Exception as e:
+        msg.fail(f"Retrieving import jobs failed: {str(e)}")
+        return JSONResponse(
+            status_code=400,
+            content={"jobs": [], "error": f"Retrieving import jobs failed: {str(e)}"},
+        )
+
+
 ### ADMIN
 
 
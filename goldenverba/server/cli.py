@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 
 from goldenverba import verba_manager
+from goldenverba.components.sessions import session_pool
 from goldenverba.server.types import Credentials
 
 load_dotenv()
@@ -79,24 +80,7 @@ def reset(url, api_key, deployment, full_reset):
     manager = verba_manager.VerbaManager()
 
     async def async_reset():
-        if url is not None and api_key is not None:
-            if deployment == "" or deployment == "Weaviate":
-                client = await manager.connect(
-                    Credentials(deployment="Weaviate", url=url, key=api_key)
-                )
-            elif deployment == "Docker":
-                client = await manager.connect(
-                    Credentials(deployment="Docker", url=url, key=api_key)
-                )
-            else:
-                raise ValueError("Invalid deployment")
-        else:
-            if deployment == "" or deployment == "Local":
-                client = await manager.connect(
-                    Credentials(deployment="Local", url="", key="")
-                )
-            else:
-                raise ValueError("Invalid deployment")
+        client = await connect(manager, url, api_key, deployment)
 
         if not full_reset:
             await manager.reset_rag_config(client)
@@ -110,5 +94,231 @@ def reset(url, api_key, deployment, full_reset):
     asyncio.run(async_reset())
 
 
+@cli.command()
+@click.argument("paths", nargs=-1, required=True)
+@click.option(
+    "--url",
+    default=os.getenv("WEAVIATE_URL_VERBA"),
+    help="Weaviate URL",
+)
+@click.option(
+    "--api_key",
+    default=os.getenv("WEAVIATE_API_KEY_VERBA"),
+    help="Weaviate API Key",
+)
+@click.option(
+    "--deployment",
+    default="",
+    help="Deployment (Local, Weaviate, Docker)",
+)
+@click.option(
+    "--reader", default=None, help="Reader to use, defaults to the saved RAG config"
+)
+@click.option(
+    "--chunker", default=None, help="Chunker to use, defaults to the saved RAG config"
+)
+@click.option(
+    "--embedder", default=None, help="Embedder to use, defaults to the saved RAG config"
+)
+@click.option("--label", "labels", multiple=True, help="Label to add to every document")
+@click.option(
+    "--overwrite/--no-overwrite",
+    default=False,
+    help="Overwrite documents that already exist",
+)
+@click.option(
+    "--processes",
+    default=os.cpu_count() or 1,
+    help="Processes to read and chunk files with",
+)
+@click.option(
+    "--verbose/--no-verbose",
+    default=False,
+    help="Print the status of every document",
+)
+def ingest(
+    paths,
+    url,
+    api_key,
+    deployment,
+    reader,
+    chunker,
+    embedder,
+    labels,
+    overwrite,
+    processes,
+    verbose,
+):
+    """
+    Import files, directories, glob patterns and zip/tar archives into Verba.
+    """
+    import asyncio
+    from goldenverba.server.ingest import ingest as ingest_files, IngestLogger
+    from goldenverba.server.types import RAGComponentClass
+
+    manager = verba_manager.VerbaManager()
+
+    async def async_ingest():
+        client = await connect(manager, url, api_key, deployment)
+        try:
+            config = await manager.load_rag_config(client)
+            for component, selected in [
+                ("Reader", reader),
+                ("Chunker", chunker),
+                ("Embedder", embedder),
+            ]:
+                if selected is None:
+                    continue
+                if selected not in config[component]["components"]:
+                    raise click.BadParameter(f"{component} {selected} not found")
+                config[component]["selected"] = selected
+            rag_config = {
+                component: RAGComponentClass(**config[component])
+                for component in config
+            }
+
+            stats = await ingest_files(
+                manager,
+                client,
+                list(paths),
+                rag_config,
+                list(labels),
+                overwrite,
+                processes,
+                IngestLogger(verbose),
+            )
+            stats.report()
+        finally:
+            await client.close()
+            await session_pool.close()
+
+    asyncio.run(async_ingest())
+
+
+@cli.command()
+@click.argument("urls", nargs=-1, required=True)
+@click.option(
+    "--url",
+    default=os.getenv("WEAVIATE_URL_VERBA"),
+    help="Weaviate URL",
+)
+@click.option(
+    "--api_key",
+    default=os.getenv("WEAVIATE_API_KEY_VERBA"),
+    help="Weaviate API Key",
+)
+@click.option(
+    "--deployment",
+    default="",
+    help="Deployment (Local, Weaviate, Docker)",
+)
+@click.option(
+    "--interval",
+    default=0.0,
+    help="Seconds between crawls, 0 to crawl once",
+)
+@click.option(
+    "--recursive/--no-recursive",
+    default=True,
+    help="Follow links to other pages of the site",
+)
+@click.option("--max_depth", default=3, help="Maximum depth of followed links")
+@click.option("--max_pages", default=1000, help="Maximum number of pages per crawl")
+@click.option(
+    "--sitemap/--no-sitemap",
+    default=False,
+    help="Also crawl the pages listed in the sitemap.xml",
+)
+@click.option(
+    "--markdown/--no-markdown",
+    default=False,
+    help="Convert pages to Markdown",
+)
+@click.option("--label", "labels", multiple=True, help="Label to add to every document")
+@click.option(
+    "--verbose/--no-verbose",
+    default=False,
+    help="Print the status of every document",
+)
+def recrawl(
+    urls,
+    url,
+    api_key,
+    deployment,
+    interval,
+    recursive,
+    max_depth,
+    max_pages,
+    sitemap,
+    markdown,
+    labels,
+    verbose,
+):
+    """
+    Crawl websites with the HTML Reader, optionally again on an interval. Recrawls only import new and changed pages.
+    """
+    import asyncio
+    from goldenverba.server.ingest import recrawl as recrawl_urls, IngestLogger
+    from goldenverba.server.types import RAGComponentClass
+
+    manager = verba_manager.VerbaManager()
+
+    async def async_recrawl():
+        client = await connect(manager, url, api_key, deployment)
+        try:
+            config = await manager.load_rag_config(client)
+            config["Reader"]["selected"] = "HTML"
+            reader_config = config["Reader"]["components"]["HTML"]["config"]
+            reader_config["URLs"]["values"] = list(urls)
+            for name, value in [
+                ("Recursive", recursive),
+                ("Max Depth", max_depth),
+                ("Max Pages", max_pages),
+                ("Use Sitemap", sitemap),
+                ("Convert To Markdown", markdown),
+            ]:
+                if name in reader_config:
+                    reader_config[name]["value"] = value
+            rag_config = {
+                component: RAGComponentClass(**config[component])
+                for component in config
+            }
+            await recrawl_urls(
+                manager,
+                client,
+                list(urls),
+                rag_config,
+                list(labels),
+                interval,
+                IngestLogger(verbose),
+            )
+        finally:
+            await client.close()
+            await session_pool.close()
+
+    asyncio.run(async_recrawl())
+
+
+async def connect(manager, url, api_key, deployment):
+    if url is not None and api_key is not None:
+        if deployment == "" or deployment == "Weaviate":
+            return await manager.connect(
+                Credentials(deployment="Weaviate", url=url, key=api_key)
+            )
+        elif deployment == "Docker":
+            return await manager.connect(
+                Credentials(deployment="Docker", url=url, key=api_key)
+            )
+        else:
+            raise ValueError("Invalid deployment")
+    else:
+        if deployment == "" or deployment == "Local":
+            return await manager.connect(
+                Credentials(deployment="Local", url="", key="")
+            )
+        else:
+            raise ValueError("Invalid deployment")
+
+
 if __name__ == "__main__":
     cli()
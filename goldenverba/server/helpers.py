@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import WebSocket
 from goldenverba.server.types import (
     FileStatus,
@@ -5,7 +7,18 @@ from goldenverba.server.types import (
     DataBatchPayload,
     FileConfig,
     CreateNewDocument,
+    Credentials,
+)
+from goldenverba.components.jobs import (
+    JobStore,
+    JobStatus,
+    config_secrets,
+    credentials_match,
+    hash_key,
+    restore_secrets,
+    strip_secrets,
 )
+from goldenverba.components.uploads import UploadStore
 from wasabi import msg
 
 
@@ -41,6 +54,222 @@ class LoggerManager:
             await self.socket.send_json(payload)
 
 
+class JobLogger(LoggerManager):
+    """LoggerManager for a persisted import job. Reports are recorded in the JobStore and the import keeps running if the websocket goes away"""
+
+    def __init__(
+        self, job_store: JobStore, job_id: str, filename: str, socket: WebSocket = None
+    ):
+        super().__init__(socket)
+        self.job_store = job_store
+        self.job_id = job_id
+        self.filenames = {job_id: filename}
+        self.status: FileStatus | None = None
+
+    async def send_report(
+        self, file_Id: str, status: FileStatus, message: str, took: float
+    ):
+        if file_Id == self.job_id:
+            self.status = status
+        await asyncio.to_thread(
+            self.job_store.set_report,
+            self.job_id,
+            file_Id,
+            self.filenames.get(file_Id, ""),
+            status.value if isinstance(status, FileStatus) else status,
+            message,
+            took,
+        )
+        try:
+            await super().send_report(file_Id, status, message, took)
+        except Exception as e:
+            msg.warn(f"Detaching import job {self.job_id} from websocket: {str(e)}")
+            self.socket = None
+
+    async def create_new_document(
+        self, new_file_id: str, document_name: str, original_file_id: str
+    ):
+        self.filenames[new_file_id] = document_name
+        try:
+            await super().create_new_document(
+                new_file_id, document_name, original_file_id
+            )
+        except Exception as e:
+            msg.warn(f"Detaching import job {self.job_id} from websocket: {str(e)}")
+            self.socket = None
+
+
+class ImportQueue:
+    """Runs persisted import jobs on a fixed number of workers. Unfinished jobs are resumed on start,
+    jobs of deployments with an API key wait until the key is presented again"""
+
+    def __init__(
+        self,
+        manager,
+        client_manager,
+        job_store: JobStore,
+        workers: int = 2,
+        upload_store: UploadStore = None,
+    ):
+        self.manager = manager
+        self.client_manager = client_manager
+        self.job_store = job_store
+        self.upload_store = upload_store
+        self.worker_count = workers
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.loggers: dict[str, JobLogger] = {}
+        # Stored credentials (without API key) of every unfinished job
+        self.owners: dict[str, dict] = {}
+        # Credentials of queued jobs, only kept in memory
+        self.credentials: dict[str, Credentials] = {}
+        # Password settings of the FileConfig of queued jobs, only kept in memory
+        self.secrets: dict[str, dict] = {}
+        # Interrupted jobs waiting for their API key, with whether they were running
+        self.waiting: dict[str, bool] = {}
+        self.workers: list[asyncio.Task] = []
+
+    async def start(self):
+        jobs = await asyncio.to_thread(
+            self.job_store.get_jobs, [JobStatus.QUEUED, JobStatus.RUNNING]
+        )
+        for job in jobs:
+            self.loggers[job["job_id"]] = JobLogger(
+                self.job_store, job["job_id"], job["filename"]
+            )
+            self.owners[job["job_id"]] = job["credentials"]
+            # Running jobs were interrupted, their documents may be partially imported
+            self.waiting[job["job_id"]] = job["status"] == JobStatus.RUNNING
+            if job["credentials"]["key_hash"] == hash_key(""):
+                msg.info(f"Resuming import of {job['filename']}")
+                self.resume(
+                    Credentials(
+                        deployment=job["credentials"]["deployment"],
+                        url=job["credentials"]["url"],
+                        key="",
+                    )
+                )
+            else:
+                msg.info(
+                    f"Import of {job['filename']} resumes once its API key is sent again"
+                )
+        self.workers = [
+            asyncio.create_task(self.work()) for _ in range(self.worker_count)
+        ]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def enqueue(
+        self, fileConfig: FileConfig, credentials: Credentials, socket: WebSocket = None
+    ):
+        stored_config = fileConfig.model_copy(deep=True)
+        secrets = strip_secrets(stored_config.rag_config)
+        await asyncio.to_thread(
+            self.job_store.add_job,
+            fileConfig.fileID,
+            fileConfig.filename,
+            stored_config.model_dump_json(),
+            credentials.model_dump(),
+        )
+        self.secrets[fileConfig.fileID] = secrets
+        self.loggers[fileConfig.fileID] = JobLogger(
+            self.job_store, fileConfig.fileID, fileConfig.filename, socket
+        )
+        self.owners[fileConfig.fileID] = credentials.model_dump()
+        self.credentials[fileConfig.fileID] = credentials
+        await self.queue.put((fileConfig.fileID, False))
+
+    def resume(self, credentials: Credentials) -> int:
+        """Queue the interrupted jobs of the given credentials, returns the number of resumed jobs"""
+        resumed = [
+            job_id
+            for job_id in self.waiting
+            if credentials_match(self.owners[job_id], credentials.model_dump())
+        ]
+        for job_id in resumed:
+            self.credentials[job_id] = credentials
+            self.queue.put_nowait((job_id, self.waiting.pop(job_id)))
+        return len(resumed)
+
+    def attach(self, socket: WebSocket, credentials: Credentials):
+        """Send the progress of the unfinished jobs of the given credentials to a new websocket"""
+        self.resume(credentials)
+        for job_id, logger in self.loggers.items():
+            if credentials_match(self.owners[job_id], credentials.model_dump()):
+                logger.socket = socket
+
+    def detach(self, socket: WebSocket):
+        """Keep jobs running without reporting to a closed websocket"""
+        for logger in self.loggers.values():
+            if logger.socket is socket:
+                logger.socket = None
+
+    async def work(self):
+        while True:
+            job_id, resume = await self.queue.get()
+            try:
+                await self.run(job_id, resume)
+            except Exception as e:
+                msg.fail(f"Import job {job_id} failed: {str(e)}")
+                await asyncio.to_thread(
+                    self.job_store.set_job_status, job_id, JobStatus.FAILED
+                )
+            finally:
+                self.loggers.pop(job_id, None)
+                self.owners.pop(job_id, None)
+                self.credentials.pop(job_id, None)
+                self.secrets.pop(job_id, None)
+                self.queue.task_done()
+
+    async def run(self, job_id: str, resume: bool):
+        job = await asyncio.to_thread(self.job_store.get_job, job_id)
+        file_config = await asyncio.to_thread(self.job_store.get_file_config, job_id)
+        credentials = self.credentials.get(job_id)
+        if job is None or file_config is None:
+            raise Exception("Job content not found")
+        if credentials is None:
+            raise Exception("Job credentials not found")
+        fileConfig = FileConfig.model_validate_json(file_config)
+        logger = self.loggers.get(job_id) or JobLogger(
+            self.job_store, job_id, job["filename"]
+        )
+
+        await asyncio.to_thread(
+            self.job_store.set_job_status, job_id, JobStatus.RUNNING
+        )
+        try:
+            client = await self.client_manager.connect(credentials)
+            secrets = self.secrets.get(job_id)
+            if secrets is None:
+                # Jobs of a previous run use the keys of the stored RAG config of their deployment
+                secrets = config_secrets(await self.manager.load_rag_config(client))
+            restore_secrets(fileConfig.rag_config, secrets)
+            await self.manager.import_document(
+                client, fileConfig, logger, resume=resume
+            )
+            await asyncio.to_thread(
+                self.job_store.set_job_status,
+                job_id,
+                (
+                    JobStatus.FAILED
+                    if logger.status == FileStatus.ERROR
+                    else JobStatus.DONE
+                ),
+            )
+        except Exception:
+            await self.delete_upload(fileConfig)
+            raise
+        await self.delete_upload(fileConfig)
+
+    async def delete_upload(self, fileConfig: FileConfig):
+        # Uploads are kept until their job finished, so interrupted jobs can resume
+        if fileConfig.upload_id and self.upload_store is not None:
+            await asyncio.to_thread(self.upload_store.delete, fileConfig.upload_id)
+
+
 class BatchManager:
     def __init__(self):
         self.batches = {}
@@ -0,0 +1,388 @@
+import asyncio
+import base64
+import glob
+import multiprocessing
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from wasabi import msg
+
+from goldenverba.components.document import Document
+from goldenverba.components.reader.BasicReader import BasicReader
+from goldenverba.components.sessions import session_pool
+from goldenverba.server.helpers import LoggerManager
+from goldenverba.server.types import FileConfig, FileStatus, RAGComponentClass
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Managers of a worker process, created once by init_worker
+worker_state = {}
+
+
+class IngestSource:
+    """A file to ingest, either a path on disk or a member of an archive"""
+
+    def __init__(self, filename: str, path: str = None, data: bytes = None):
+        self.filename = filename
+        self.path = path
+        self.data = data
+
+    @property
+    def extension(self) -> str:
+        name = os.path.basename(self.filename)
+        return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+    @property
+    def size(self) -> int:
+        if self.data is not None:
+            return len(self.data)
+        return os.path.getsize(self.path)
+
+    def read(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class IngestLogger(LoggerManager):
+    """Only prints failed documents, unless verbose"""
+
+    def __init__(self, verbose: bool = False):
+        super().__init__()
+        self.verbose = verbose
+
+    async def send_report(
+        self, file_Id: str, status: FileStatus, message: str, took: float
+    ):
+        if self.verbose:
+            await super().send_report(file_Id, status, message, took)
+        elif status == FileStatus.ERROR:
+            msg.fail(message)
+
+    async def create_new_document(
+        self, new_file_id: str, document_name: str, original_file_id: str
+    ):
+        if self.verbose:
+            await super().create_new_document(
+                new_file_id, document_name, original_file_id
+            )
+
+
+class IngestStats:
+    def __init__(self):
+        self.files = 0
+        self.failed_files = 0
+        self.documents = 0
+        self.unchanged_documents = 0
+        self.failed_documents = 0
+        self.chunks = 0
+        self.tokens = 0
+        self.elapsed = 0.0
+
+    def report(self):
+        elapsed = max(self.elapsed, 1e-9)
+        msg.divider("Ingestion finished")
+        msg.info(
+            f"Read {self.files} files ({self.failed_files} failed) with {self.documents} documents in {self.elapsed:.2f}s"
+        )
+        msg.info(
+            f"Imported {self.documents - self.unchanged_documents - self.failed_documents} documents, "
+            f"{self.unchanged_documents} unchanged, {self.failed_documents} failed"
+        )
+        msg.good(
+            f"{self.files / elapsed:.2f} files/s | {self.chunks / elapsed:.2f} chunks/s | {self.tokens / elapsed:.2f} tokens/s"
+        )
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def display_name(path: str) -> str:
+    relative = os.path.relpath(path)
+    return os.path.basename(path) if relative.startswith("..") else relative
+
+
+def expand_file(path: str, name: str, extensions: list[str]):
+    """Yield the file itself or the matching members of an archive"""
+    if is_archive(path):
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    source = IngestSource(f"{name}/{info.filename}")
+                    if not info.is_dir() and matches(source, extensions):
+                        source.data = archive.read(info)
+                        yield source
+        else:
+            with tarfile.open(path) as archive:
+                for member in archive:
+                    source = IngestSource(f"{name}/{member.name}")
+                    if member.isfile() and matches(source, extensions):
+                        source.data = archive.extractfile(member).read()
+                        yield source
+        return
+
+    source = IngestSource(name, path=path)
+    if matches(source, extensions):
+        yield source
+
+
+def matches(source: IngestSource, extensions: list[str]) -> bool:
+    return not extensions or source.extension in extensions
+
+
+def discover_files(paths: list[str], extensions: list[str]):
+    """Yield IngestSources for all files in the given files, directories, glob patterns and archives with a supported extension
+    @parameter: extensions : list[str] - Supported extensions without dot, empty to accept all files
+    """
+    for path in paths:
+        candidates = (
+            sorted(glob.glob(path, recursive=True)) if glob.has_magic(path) else [path]
+        )
+        if not candidates or not any(os.path.exists(c) for c in candidates):
+            msg.warn(f"No files found for {path}")
+        for candidate in candidates:
+            if os.path.isdir(candidate):
+                # Titles are relative to the parent of the directory, e.g. docs/guide/setup.md
+                base = os.path.dirname(os.path.abspath(candidate))
+                for root, dirs, files in os.walk(candidate):
+                    dirs.sort()
+                    for file in sorted(files):
+                        full_path = os.path.join(root, file)
+                        yield from expand_file(
+                            full_path,
+                            os.path.relpath(os.path.abspath(full_path), base),
+                            extensions,
+                        )
+            elif os.path.isfile(candidate):
+                yield from expand_file(candidate, display_name(candidate), extensions)
+
+
+def create_file_config(
+    source: IngestSource,
+    rag_config: dict[str, RAGComponentClass],
+    labels: list[str],
+    overwrite: bool,
+    content: str = "",
+) -> FileConfig:
+    return FileConfig(
+        fileID=source.filename,
+        filename=source.filename,
+        isURL=False,
+        overwrite=overwrite,
+        extension=source.extension,
+        source=os.path.abspath(source.path) if source.path else "",
+        content=content,
+        labels=labels,
+        rag_config=rag_config,
+        file_size=source.size,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def init_worker():
+    from goldenverba.components.managers import (
+        ReaderManager,
+        ChunkerManager,
+        EmbeddingManager,
+    )
+
+    worker_state["reader_manager"] = ReaderManager()
+    worker_state["chunker_manager"] = ChunkerManager()
+    worker_state["embedder_manager"] = EmbeddingManager()
+    try:
+        import tiktoken
+
+        worker_state["encoding"] = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        worker_state["encoding"] = None
+
+
+def count_tokens(text: str) -> int:
+    encoding = worker_state.get("encoding")
+    if encoding is None:
+        return len(text.split())
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def read_and_chunk(
+    source: IngestSource,
+    rag_config: dict[str, RAGComponentClass],
+    labels: list[str],
+    overwrite: bool,
+) -> tuple[list[Document], int]:
+    """Runs in a worker process: loads and chunks a single file, returns the chunked documents and their number of tokens"""
+    return asyncio.run(load_and_chunk(source, rag_config, labels, overwrite))
+
+
+async def load_and_chunk(
+    source: IngestSource,
+    rag_config: dict[str, RAGComponentClass],
+    labels: list[str],
+    overwrite: bool,
+) -> tuple[list[Document], int]:
+    logger = IngestLogger()
+    reader = rag_config["Reader"].selected
+    try:
+        if isinstance(worker_state["reader_manager"].readers.get(reader), BasicReader):
+            # The Default reader reads the file from its path or bytes
+            fileConfig = create_file_config(source, rag_config, labels, overwrite)
+            documents = await worker_state["reader_manager"].load(
+                reader,
+                fileConfig,
+                logger,
+                file_source=source.data if source.data is not None else source.path,
+            )
+        else:
+            # Readers of external APIs send the content of the FileConfig
+            fileConfig = create_file_config(
+                source,
+                rag_config,
+                labels,
+                overwrite,
+                content=base64.b64encode(source.read()).decode("utf-8"),
+            )
+            documents = await worker_state["reader_manager"].load(
+                reader, fileConfig, logger
+            )
+        embedder = worker_state["embedder_manager"].embedders[
+            rag_config["Embedder"].selected
+        ]
+        documents = await worker_state["chunker_manager"].chunk(
+            rag_config["Chunker"].selected, fileConfig, documents, embedder, logger
+        )
+    finally:
+        # HTTP sessions (e.g. of the Semantic Chunker's embedder) belong to this file's event loop
+        await session_pool.close()
+    tokens = sum(count_tokens(document.content) for document in documents)
+    # Documents are pickled without their spaCy parse
+    return documents, tokens
+
+
+async def ingest(
+    manager,
+    client,
+    paths: list[str],
+    rag_config: dict[str, RAGComponentClass],
+    labels: list[str],
+    overwrite: bool,
+    processes: int,
+    logger: LoggerManager,
+) -> IngestStats:
+    """Read and chunk files on a process pool and run the chunked documents through the embedding and ingestion pipeline of the VerbaManager"""
+    from goldenverba.verba_manager import ImportTask
+
+    reader = manager.reader_manager.readers.get(rag_config["Reader"].selected)
+    if reader is None:
+        raise Exception(f"{rag_config['Reader'].selected} Reader not found")
+    if reader.type != "FILE":
+        raise Exception(f"{reader.name} Reader does not read files")
+    extensions = [extension.lstrip(".").lower() for extension in reader.extension]
+
+    stats = IngestStats()
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    sources = discover_files(paths, extensions)
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+    ) as pool:
+
+        async def tasks():
+            pending = {}
+            exhausted = False
+            while True:
+                # Keep every process busy without reading all files into memory
+                while not exhausted and len(pending) < processes * 2:
+                    source = await asyncio.to_thread(next, sources, None)
+                    if source is None:
+                        exhausted = True
+                        break
+                    future = loop.run_in_executor(
+                        pool, read_and_chunk, source, rag_config, labels, overwrite
+                    )
+                    pending[future] = source
+                if not pending:
+                    return
+
+                done, _ = await asyncio.wait(
+                    pending.keys(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        documents, tokens = future.result()
+                    except Exception as e:
+                        stats.failed_files += 1
+                        msg.fail(f"Failed to read {source.filename}: {str(e)}")
+                        continue
+                    stats.files += 1
+                    stats.tokens += tokens
+                    fileConfig = create_file_config(
+                        source, rag_config, labels, overwrite
+                    )
+                    source.data = None
+                    for document in documents:
+                        stats.documents += 1
+                        yield ImportTask(document, fileConfig)
+
+        results = await manager.create_pipeline(client, logger).run(tasks())
+
+    for result in results:
+        if isinstance(result, Exception):
+            stats.failed_documents += 1
+        elif result is None:
+            stats.unchanged_documents += 1
+        else:
+            stats.chunks += result
+    stats.elapsed = loop.time() - start_time
+    return stats
+
+
+async def recrawl(
+    manager,
+    client,
+    urls: list[str],
+    rag_config: dict[str, RAGComponentClass],
+    labels: list[str],
+    interval: float,
+    logger: LoggerManager,
+):
+    """Import URLs with the selected URL Reader and import them again every interval seconds.
+    Synced sources only load new and changed pages, pages removed from the site are deleted.
+    @parameter: interval : float - Seconds between the start of two crawls, 0 to crawl once
+    """
+    fileConfig = FileConfig(
+        fileID=f"recrawl-{urls[0]}",
+        filename=urls[0] if len(urls) == 1 else f"{urls[0]} and {len(urls) - 1} more",
+        isURL=True,
+        overwrite=False,
+        extension="URL",
+        source="",
+        content="",
+        labels=labels,
+        rag_config=rag_config,
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+    while True:
+        started = time.monotonic()
+        msg.info(f"Crawling {fileConfig.filename}")
+        await manager.import_document(client, fileConfig, logger)
+        if not interval:
+            return
+        elapsed = time.monotonic() - started
+        msg.info(
+            f"Crawled in {elapsed:.2f}s, next crawl in {max(interval - elapsed, 0):.0f}s"
+        )
+        await asyncio.sleep(max(interval - elapsed, 0))
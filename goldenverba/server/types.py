@@ -149,6 +149,9 @@ class FileConfig(BaseModel):
     status: FileStatus
     metadata: str
     status_report: dict
+    language: str = ""
+    # Set for files uploaded to /api/upload instead of sending their content
+    upload_id: str = ""
 
 
 class ImportStreamPayload(BaseModel):
@@ -1,6 +1,26 @@
+import asyncio
+
 import pytest
-from goldenverba.components.document import Document, create_document
-from goldenverba.server.types import FileConfig
+from goldenverba.components.document import (
+    Document,
+    create_document,
+    load_nlp_for_language,
+    parse_content,
+    parse_documents,
+    language_cache,
+    resolve_language,
+    sample_text,
+    segment_content,
+)
+from goldenverba.server.types import FileConfig, FileStatus
+from goldenverba.tests.fakes import (
+    FakeEmbedder,
+    RecordingLogger,
+    get_stored_chunks,
+    make_file_config,
+    setup_manager,
+)
+from goldenverba.verba_manager import VerbaManager
 
 
 def test_document_initialization():
@@ -55,6 +75,21 @@ def test_document_json_serialization():
     assert restored_doc.metadata == original_doc.metadata
 
 
+def test_document_json_hashes():
+    """Test that import fingerprints are stored and restored"""
+    doc = Document(title="Test Doc", content="Test content")
+    doc.content_hash = "content"
+    doc.config_hash = "config"
+
+    json_dict = Document.to_json(doc)
+    assert json_dict["content_hash"] == "content"
+    assert json_dict["config_hash"] == "config"
+
+    restored_doc = Document.from_json(json_dict, None)
+    assert restored_doc.content_hash == "content"
+    assert restored_doc.config_hash == "config"
+
+
 def test_create_document_from_file_config():
     """Test document creation from FileConfig"""
     # TODO: Add test
@@ -97,3 +132,182 @@ def test_arabic_in_content():
     assert doc.content == content
     assert doc.spacy_doc.text == content
     assert doc.spacy_doc.sents is not None
+
+
+def test_document_spacy_doc_is_lazy():
+    """Test that the spaCy parse only runs on first access and is not pickled"""
+    import pickle
+
+    doc = Document(title="Test Doc", content="First sentence. Second sentence.")
+    assert doc._spacy_doc is None
+
+    assert len(list(doc.spacy_doc.sents)) == 2
+    assert doc._spacy_doc is not None
+
+    restored = pickle.loads(pickle.dumps(doc))
+    assert restored._spacy_doc is None
+    assert restored.content == doc.content
+
+    doc.spacy_doc = None
+    assert doc._spacy_doc is None
+
+
+def test_spacy_pipelines_are_shared_and_batched():
+    """Test that pipelines are cached per language and documents are parsed in one batch"""
+    assert load_nlp_for_language("en") is load_nlp_for_language("unknown")
+    assert load_nlp_for_language("zh-hant") is load_nlp_for_language("zh")
+
+    documents = [
+        Document(title=f"Doc {i}", content=f"Sentence {i}. Another one.")
+        for i in range(3)
+    ]
+    parse_documents(documents)
+    assert all(document.is_parsed for document in documents)
+    assert [len(list(document.spacy_doc.sents)) for document in documents] == [2] * 3
+
+
+def test_long_content_is_segmented_at_whitespace():
+    """Test that long contents are parsed in segments without splitting tokens"""
+    content = "word " * 30 + "end."
+    segments = list(segment_content(content, max_length=12))
+    assert "".join(segments) == content
+    assert all(segment.endswith(" ") for segment in segments[:-1])
+
+    long_content = "This is a sentence. " * 6000
+    assert parse_content(long_content).text == long_content
+
+
+def test_language_detection_samples_and_overrides():
+    """Test that long texts are sampled and languages can be given or cached per source"""
+    text = "a" * 10000 + "b" * 10000
+    sample = sample_text(text, windows=4, window_size=100)
+    assert len(sample) == 4 * 100 + 3
+    assert sample.startswith("a") and sample.endswith("b")
+    assert sample_text("short text") == "short text"
+
+    assert Document(content="Hallo", labels=["lang:DE"]).language == "de"
+    assert Document(content="Hallo", language="nl").language == "nl"
+
+    english = "This is a document written in plain English for testing."
+    assert resolve_language(english, source="test-source") == "en"
+    # The detected language is reused for the same text of the same source only
+    key = next(key for key in language_cache if key.startswith("test-source:"))
+    language_cache[key] = "nl"
+    assert resolve_language(english, source="test-source") == "nl"
+    french = "Ceci est un document écrit en français pour les tests."
+    assert resolve_language(french, source="test-source") == "fr"
+    assert resolve_language(english, language="fr", source="test-source") == "fr"
+
+
+def test_document_hashes_separate_content_and_config():
+    """Test that the content hash only follows the content and the config hash the Chunker, Embedder and document properties"""
+    manager = VerbaManager()
+    setup_manager(manager)
+    file_config = make_file_config(manager, "Alpha one.")
+    other_chunker = make_file_config(
+        manager, "Alpha one.", chunker_config={"Sentences": 2}
+    )
+
+    def hashes(content: str, labels: list[str], fileConfig: FileConfig):
+        return manager.get_document_hashes(
+            Document(content=content, labels=labels), fileConfig
+        )
+
+    content_hash, config_hash = hashes("Alpha one.", ["a"], file_config)
+    assert hashes("Alpha one.", ["a"], file_config) == (content_hash, config_hash)
+
+    changed_content = hashes("Alpha two.", ["a"], file_config)
+    assert changed_content[0] != content_hash and changed_content[1] == config_hash
+
+    for changed_config in [
+        hashes("Alpha one.", ["b"], file_config),
+        hashes("Alpha one.", ["a"], other_chunker),
+    ]:
+        assert changed_config[0] == content_hash and changed_config[1] != config_hash
+
+
+def import_text(
+    manager, client, content: str, chunker_config: dict = None
+) -> RecordingLogger:
+    logger = RecordingLogger()
+    file_config = make_file_config(
+        manager,
+        content,
+        chunker_config=chunker_config or {"Sentences": 1, "Overlap": 0},
+        overwrite=True,
+    )
+    asyncio.run(manager.import_document(client, file_config, logger))
+    return logger
+
+
+def get_stored_document(client) -> dict:
+    documents = client.collections.get("VERBA_DOCUMENTS").objects
+    assert len(documents) == 1
+    return list(documents.values())[0]
+
+
+def test_unchanged_document_is_skipped():
+    """Test that importing a document with the same content and config again leaves it untouched"""
+    manager = VerbaManager()
+    embedder = FakeEmbedder()
+    client = setup_manager(manager, embedder)
+    import_text(manager, client, "Alpha one. Beta two.")
+    stored_document = dict(get_stored_document(client))
+    stored_chunks = get_stored_chunks(client)
+    embedder.received.clear()
+
+    logger = import_text(manager, client, "Alpha one. Beta two.")
+
+    assert ("test.txt", FileStatus.DONE, "test.txt is unchanged, skipped import") in (
+        logger.reports
+    )
+    assert embedder.received == []
+    assert get_stored_document(client) == stored_document
+    assert get_stored_chunks(client) == stored_chunks
+
+
+def test_changed_content_is_imported_again():
+    """Test that a document whose content changed replaces the stored version"""
+    manager = VerbaManager()
+    client = setup_manager(manager)
+    import_text(manager, client, "Alpha one. Beta two.")
+    previous_hash = get_stored_document(client)["content_hash"]
+
+    logger = import_text(manager, client, "Alpha one. Beta two. Gamma three.")
+
+    assert logger.reports[-1][1] == FileStatus.DONE
+    assert "test.txt is unchanged, skipped import" not in [
+        message for _, _, message in logger.reports
+    ]
+    assert get_stored_document(client)["content_hash"] not in ["", previous_hash]
+    assert [chunk["content"].strip() for chunk in get_stored_chunks(client)] == [
+        "Alpha one.",
+        "Beta two.",
+        "Gamma three.",
+    ]
+
+
+def test_changed_config_is_imported_again():
+    """Test that the same content imported with other Chunker settings is chunked again"""
+    manager = VerbaManager()
+    embedder = FakeEmbedder()
+    client = setup_manager(manager, embedder)
+    import_text(manager, client, "Alpha one. Beta two. Gamma three. Delta four.")
+    previous = get_stored_document(client)
+    previous_hashes = (previous["content_hash"], previous["config_hash"])
+    embedder.received.clear()
+
+    logger = import_text(
+        manager,
+        client,
+        "Alpha one. Beta two. Gamma three. Delta four.",
+        chunker_config={"Sentences": 2, "Overlap": 0},
+    )
+
+    assert logger.reports[-1][1] == FileStatus.DONE
+    stored = get_stored_document(client)
+    assert stored["content_hash"] == previous_hashes[0]
+    assert stored["config_hash"] not in ["", previous_hashes[1]]
+    # No vectors are reused across Chunker settings
+    assert len(embedder.received) == 2
+    assert len(get_stored_chunks(client)) == 2
@@ -0,0 +1,100 @@
+import asyncio
+
+from goldenverba.components import batching
+from goldenverba.components.cache import EmbeddingCache
+from goldenverba.components.managers import EmbeddingManager
+
+
+class WordEncoding:
+    """Stand-in for a tiktoken encoding with one token per word"""
+
+    def encode_ordinary(self, text: str) -> list[str]:
+        return text.split()
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[str]]:
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+class LimitedEmbedder:
+    """Rejects requests above its token budget and inputs above its context"""
+
+    name = "Limited"
+    max_batch_size = 3
+    max_batch_tokens = 6
+    max_tokens = 4
+
+    def __init__(self):
+        self.requests = []
+
+    async def vectorize(self, config, content):
+        tokens = [len(text.split()) for text in content]
+        assert len(content) <= self.max_batch_size
+        assert sum(tokens) <= self.max_batch_tokens
+        assert max(tokens) <= self.max_tokens
+        self.requests.append(content)
+        return [[float(count), 1.0] for count in tokens]
+
+
+def make_manager(embedder, tmp_path, monkeypatch) -> EmbeddingManager:
+    monkeypatch.setattr(batching, "encoding", WordEncoding())
+    monkeypatch.setattr(batching, "encoding_loaded", True)
+    manager = EmbeddingManager()
+    manager.cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    manager.embedders = {embedder.name: embedder}
+    return manager
+
+
+def test_pack_batches_respects_token_and_item_budget():
+    assert batching.pack_batches([3, 3, 1, 1, 1, 1, 5], 6, 3) == [
+        [0, 1],
+        [2, 3, 4],
+        [5, 6],
+    ]
+    # Inputs above the token budget are sent alone
+    assert batching.pack_batches([2, 9, 2], 6, 3) == [[0], [1], [2]]
+    assert batching.pack_batches([1] * 5, None, 2) == [[0, 1], [2, 3], [4]]
+
+
+def test_batch_vectorize_packs_by_tokens_and_truncates_long_inputs(
+    tmp_path, monkeypatch
+):
+    embedder = LimitedEmbedder()
+    manager = make_manager(embedder, tmp_path, monkeypatch)
+
+    content = ["a b c", "d e", "f", "g", "h i j k l m", "n"]
+    vectors = asyncio.run(manager.batch_vectorize("Limited", {}, content))
+
+    assert vectors == [
+        [3.0, 1.0],
+        [2.0, 1.0],
+        [1.0, 1.0],
+        [1.0, 1.0],
+        [4.0, 1.0],
+        [1.0, 1.0],
+    ]
+    assert embedder.requests == [["a b c", "d e", "f"], ["g", "h i j k", "n"]]
+
+
+def test_batch_vectorize_averages_windows_of_long_inputs(tmp_path, monkeypatch):
+    monkeypatch.setenv("VERBA_EMBED_OVERSIZED", "average")
+    embedder = LimitedEmbedder()
+    manager = make_manager(embedder, tmp_path, monkeypatch)
+
+    vectors = asyncio.run(manager.batch_vectorize("Limited", {}, ["a b c d e f", "g"]))
+
+    assert embedder.requests == [["a b c d", "e f"], ["g"]]
+    # Windows of 4 and 2 tokens are weighted by their length
+    average = (4 * 4.0 + 2 * 2.0) / 6
+    assert vectors[0][0] < 4.0 and vectors[0][1] < 1.0
+    assert abs(vectors[0][0] / vectors[0][1] - average) < 1e-9
+    assert vectors[1] == [1.0, 1.0]
+
+    # The windows are cached, importing again doesn't send them
+    embedder.requests = []
+    assert asyncio.run(manager.batch_vectorize("Limited", {}, ["a b c d e f"])) == [
+        vectors[0]
+    ]
+    assert embedder.requests == []
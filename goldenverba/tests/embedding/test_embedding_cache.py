@@ -0,0 +1,112 @@
+import asyncio
+
+from goldenverba.components.cache import EmbeddingCache
+from goldenverba.components.managers import EmbeddingManager
+from goldenverba.components.types import InputConfig
+
+
+class CountingEmbedder:
+    name = "Counting"
+    max_batch_size = 2
+
+    def __init__(self):
+        self.received = []
+
+    async def vectorize(self, config, content):
+        self.received.extend(content)
+        return [[float(len(text)), 0.5, 1.0] for text in content]
+
+
+def test_cache_roundtrip_and_normalization(tmp_path):
+    """Test that vectors survive a roundtrip and whitespace does not change the key"""
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+
+    asyncio.run(cache.store("E", "m", ["hello  world"], [[0.25, 0.5, 0.75]]))
+    vectors = asyncio.run(cache.lookup("E", "m", ["hello world\n", "other"]))
+    assert vectors == [[0.25, 0.5, 0.75], None]
+    assert asyncio.run(cache.lookup("E", "other-model", ["hello world"])) == [None]
+    assert cache.hits == 1 and cache.misses == 2
+
+    # Reopening the cache keeps the stored vectors
+    cache.close()
+    reopened = EmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    assert asyncio.run(reopened.lookup("E", "m", ["hello world"])) == [
+        [0.25, 0.5, 0.75]
+    ]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache stays below its size limit by dropping old entries"""
+    # One vector of 256 float32 values takes 1KB
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"), max_size_mb=3 / 1024)
+    vector = [0.0] * 256
+
+    cache.put_many({"a": vector, "b": vector, "c": vector})
+    cache.get_many(["a"])
+    cache.put_many({"d": vector})
+
+    assert cache.stats()["size_bytes"] <= 3 * 1024
+    assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "d"}
+
+
+def test_cache_keeps_a_running_total_size(tmp_path):
+    """Test that inserts track the cache size without summing the whole table"""
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"), max_size_mb=1)
+    vector = [0.0] * 256
+    cache.put_many({"a": vector})
+
+    statements = []
+    cache.connection.set_trace_callback(statements.append)
+    cache.put_many({"a": [0.0] * 128, "b": vector, "c": vector})
+    cache.connection.set_trace_callback(None)
+
+    assert cache.total_size == 512 + 2 * 1024 == cache.stats()["size_bytes"]
+    assert not [
+        statement
+        for statement in statements
+        if "SUM(size)" in statement and "WHERE" not in statement
+    ]
+
+    # Reopening the cache sums the stored vectors once
+    cache.close()
+    reopened = EmbeddingCache(path=str(tmp_path / "cache.sqlite"), max_size_mb=1)
+    reopened.connect()
+    assert reopened.total_size == 512 + 2 * 1024
+
+
+def test_batch_vectorize_only_embeds_misses(tmp_path):
+    """Test that cached and duplicate content is not sent to the embedder"""
+    manager = EmbeddingManager()
+    manager.cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    embedder = CountingEmbedder()
+    manager.embedders = {embedder.name: embedder}
+
+    first = asyncio.run(manager.batch_vectorize("Counting", {}, ["a", "bb", "a"]))
+    assert first == [[1.0, 0.5, 1.0], [2.0, 0.5, 1.0], [1.0, 0.5, 1.0]]
+    assert embedder.received == ["a", "bb"]
+
+    second = asyncio.run(manager.batch_vectorize("Counting", {}, ["bb", "ccc"]))
+    assert second == [[2.0, 0.5, 1.0], [3.0, 0.5, 1.0]]
+    assert embedder.received == ["a", "bb", "ccc"]
+
+
+def test_batch_vectorize_caches_per_backend(tmp_path):
+    """Test that vectors of one local backend are not served for another"""
+    manager = EmbeddingManager()
+    manager.cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    embedder = CountingEmbedder()
+    manager.embedders = {embedder.name: embedder}
+
+    def config(backend: str) -> dict:
+        return {
+            "Model": InputConfig(type="dropdown", value="m", description="", values=[]),
+            "Backend": InputConfig(
+                type="dropdown", value=backend, description="", values=[]
+            ),
+        }
+
+    asyncio.run(manager.batch_vectorize("Counting", config("torch"), ["a"]))
+    asyncio.run(manager.batch_vectorize("Counting", config("int8"), ["a"]))
+    asyncio.run(manager.batch_vectorize("Counting", config("torch"), ["a"]))
+
+    assert embedder.received == ["a", "a"]
@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from goldenverba.components.embedding.SentenceTransformersEmbedder import (
+    encode_batched,
+)
+from goldenverba.components.models import ModelRegistry, length_sorted_batches
+
+
+class FakeModel:
+    """Stand-in for a SentenceTransformer that fails if two threads encode at once"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = threading.Lock()
+
+    def encode(self, content: list[str]) -> list[str]:
+        assert self.busy.acquire(blocking=False), "Model used by two threads"
+        try:
+            time.sleep(0.01)
+            return [f"{self.name}:{text}" for text in content]
+        finally:
+            self.busy.release()
+
+
+def make_registry(loads: list, max_size_mb: float = 0) -> ModelRegistry:
+    def loader(name: str) -> FakeModel:
+        loads.append(name)
+        time.sleep(0.05)
+        return FakeModel(name)
+
+    # Every fake model is 1MB
+    return ModelRegistry(loader, max_size_mb, size_of=lambda model: 1024 * 1024)
+
+
+def test_model_registry_loads_once_and_serializes_use():
+    loads = []
+    registry = make_registry(loads)
+
+    def encode(i: int) -> list[str]:
+        with registry.use("mini") as model:
+            return model.encode([str(i)])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(encode, range(16)))
+
+    assert loads == ["mini"]
+    assert results == [[f"mini:{i}"] for i in range(16)]
+
+
+def test_model_registry_evicts_idle_models_least_recently_used():
+    loads = []
+    registry = make_registry(loads, max_size_mb=2)
+
+    with registry.use("a"):
+        pass
+    with registry.use("b"):
+        pass
+    with registry.use("a"):
+        pass
+    with registry.use("c"):
+        pass
+    # "b" was used least recently
+    assert registry.loaded() == ["a", "c"]
+
+    # Models in use are never evicted, the registry may exceed its limit meanwhile
+    with registry.use("a"), registry.use("c"), registry.use("d"):
+        assert registry.loaded() == ["a", "c", "d"]
+    # "d" is released first and is the only idle model at that time
+    assert registry.loaded() == ["a", "c"]
+    assert loads == ["a", "b", "c", "d"]
+
+
+def test_length_sorted_batches_limit_padded_tokens():
+    lengths = [10, 200, 12, 190, 11, 50]
+    batches = length_sorted_batches(lengths, max_tokens=400, max_batch_size=3)
+    assert batches == [[1, 3], [5, 2, 4], [0]]
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 400
+
+
+def test_encode_batched_restores_input_order(monkeypatch):
+    monkeypatch.setenv("VERBA_EMBEDDING_BATCH_TOKENS", "64")
+
+    class LengthModel:
+        max_seq_length = 32
+
+        def __init__(self):
+            self.batches = []
+
+        def encode(self, texts, batch_size, convert_to_numpy):
+            assert batch_size == len(texts)
+            self.batches.append(texts)
+            return np.array([[float(len(text))] for text in texts])
+
+    model = LengthModel()
+    content = ["a" * length for length in [4, 400, 40, 8, 120, 4]]
+    assert encode_batched(model, content) == [
+        [4.0],
+        [400.0],
+        [40.0],
+        [8.0],
+        [120.0],
+        [4.0],
+    ]
+    # Texts are capped at max_seq_length tokens, two of them fill a batch of 64 tokens
+    assert [[len(text) for text in batch] for batch in model.batches] == [
+        [400, 120],
+        [40, 8, 4, 4],
+    ]
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import aiohttp
+import pytest
+from yarl import URL
+
+from goldenverba.components.cache import EmbeddingCache
+from goldenverba.components.managers import EmbeddingManager
+from goldenverba.components.retry import RetryableError, parse_retry_after
+
+
+class FlakyEmbedder:
+    """Fails every batch with the given errors before answering it"""
+
+    name = "Flaky"
+    max_batch_size = 2
+
+    def __init__(self, errors: dict[str, list[Exception]]):
+        self.errors = errors
+        self.calls = []
+
+    async def vectorize(self, config, content):
+        self.calls.append(list(content))
+        for text in content:
+            if self.errors.get(text):
+                raise self.errors[text].pop(0)
+        return [[float(len(text)), 1.0] for text in content]
+
+
+def make_manager(embedder, tmp_path, monkeypatch) -> EmbeddingManager:
+    monkeypatch.setenv("VERBA_EMBED_RETRY_BASE", "0.01")
+    manager = EmbeddingManager()
+    manager.cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite"))
+    manager.embedders = {embedder.name: embedder}
+    return manager
+
+
+def service_unavailable() -> aiohttp.ClientResponseError:
+    url = URL("http://embedder/embed")
+    return aiohttp.ClientResponseError(
+        aiohttp.RequestInfo(url, "POST", {}, url), (), status=503, message="Unavailable"
+    )
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None
+    assert 8 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+
+def test_batch_vectorize_retries_only_failed_batches(tmp_path, monkeypatch):
+    embedder = FlakyEmbedder(
+        {
+            "bb": [RetryableError("Rate limit exceeded", retry_after=0.05)],
+            "dddd": [service_unavailable(), asyncio.TimeoutError()],
+        }
+    )
+    manager = make_manager(embedder, tmp_path, monkeypatch)
+
+    start = time.monotonic()
+    vectors = asyncio.run(
+        manager.batch_vectorize("Flaky", {}, ["a", "bb", "ccc", "dddd", "e"])
+    )
+    assert vectors == [[float(i), 1.0] for i in [1, 2, 3, 4, 1]]
+    # The Retry-After of the provider was honored
+    assert time.monotonic() - start >= 0.05
+    assert sorted(map(tuple, embedder.calls)) == [
+        ("a", "bb"),
+        ("a", "bb"),
+        ("ccc", "dddd"),
+        ("ccc", "dddd"),
+        ("ccc", "dddd"),
+        ("e",),
+    ]
+
+
+def test_batch_vectorize_keeps_batches_of_a_failed_import(tmp_path, monkeypatch):
+    embedder = FlakyEmbedder({"bb": [Exception("Invalid input")]})
+    manager = make_manager(embedder, tmp_path, monkeypatch)
+
+    # Errors that are not transient are not retried
+    with pytest.raises(Exception, match="Invalid input"):
+        asyncio.run(manager.batch_vectorize("Flaky", {}, ["a", "bb", "ccc", "dddd"]))
+    assert sorted(map(tuple, embedder.calls)) == [("a", "bb"), ("ccc", "dddd")]
+
+    # Importing again only sends the batch that failed
+    embedder.calls = []
+    asyncio.run(manager.batch_vectorize("Flaky", {}, ["a", "bb", "ccc", "dddd"]))
+    assert embedder.calls == [["a", "bb"]]
+
+
+def test_batch_vectorize_stops_when_the_retry_budget_is_spent(tmp_path, monkeypatch):
+    embedder = FlakyEmbedder({"a": [service_unavailable() for _ in range(10)]})
+    manager = make_manager(embedder, tmp_path, monkeypatch)
+    manager.max_retries = 2
+
+    with pytest.raises(Exception, match="503"):
+        asyncio.run(manager.batch_vectorize("Flaky", {}, ["a"]))
+    assert len(embedder.calls) == 3
@@ -0,0 +1,67 @@
+import asyncio
+
+from aiohttp import web
+
+from goldenverba.components.embedding.OllamaEmbedder import OllamaEmbedder
+from goldenverba.components.sessions import SessionPool, session_pool
+
+
+def test_embedder_batches_reuse_one_connection(monkeypatch):
+    """Every batch of an import is sent over the same kept-alive connection"""
+    peers = []
+
+    async def embed(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        data = await request.json()
+        return web.json_response({"embeddings": [[1.0, 0.0] for _ in data["input"]]})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/api/embed", embed)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            embedder = OllamaEmbedder()
+            embedder.url = f"http://127.0.0.1:{port}"
+            config = {"Model": embedder.config["Model"]}
+            for _ in range(5):
+                assert await embedder.vectorize(config, ["a", "b"]) == [[1.0, 0.0]] * 2
+        finally:
+            await session_pool.close()
+            await runner.cleanup()
+
+    monkeypatch.setenv("OLLAMA_URL", "http://127.0.0.1:9")
+    asyncio.run(run())
+    assert len(peers) == 5
+    assert len(set(peers)) == 1
+
+
+def test_session_pool_shares_sessions_per_origin_and_loop():
+    pool = SessionPool()
+
+    async def get_sessions():
+        first = pool.get("https://api.example.com/v1")
+        assert pool.get("https://API.example.com/v2/embeddings") is first
+        assert pool.get("https://other.example.com/v1") is not first
+        return first
+
+    async def run():
+        first = await get_sessions()
+        await pool.close()
+        assert first.closed
+        # Sessions are recreated after close
+        assert await get_sessions() is not first
+        await pool.close()
+        return first
+
+    async def run_in_new_loop():
+        session = await get_sessions()
+        await pool.close()
+        return session
+
+    first = asyncio.run(run())
+    # A new event loop gets its own session
+    assert asyncio.run(run_in_new_loop()) is not first
@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+from goldenverba.components import executor
+from goldenverba.components.executor import run_cpu
+
+
+def current_thread_name(value: int) -> tuple[str, int]:
+    return threading.current_thread().name, value * 2
+
+
+def test_run_cpu_offloads_to_thread_pool(monkeypatch):
+    """Test that CPU-bound work does not run on the event loop thread"""
+    monkeypatch.setattr(executor, "executor_type", "thread")
+    monkeypatch.setattr(executor, "executor", None)
+
+    name, result = asyncio.run(run_cpu(current_thread_name, 21))
+
+    assert result == 42
+    assert name.startswith("verba-cpu")
+    executor.shutdown_executor()
+
+
+def test_run_cpu_inline(monkeypatch):
+    """Test that work runs on the calling thread when offloading is disabled"""
+    monkeypatch.setattr(executor, "executor_type", "none")
+    monkeypatch.setattr(executor, "executor", None)
+
+    name, result = asyncio.run(run_cpu(current_thread_name, 1))
+
+    assert result == 2
+    assert name == threading.current_thread().name
@@ -0,0 +1,340 @@
+"""Stand-ins for running imports in tests: an in-memory async Weaviate client covering the calls of the WeaviateManager,
+an embedder that records what it embeds and helpers to import text through the VerbaManager.
+
+Collections are created on first use like with the auto-schema of Weaviate: properties are added when objects
+are inserted and text properties use word tokenization, so an equal filter on a text property matches every
+object whose value contains all words of the filter value.
+"""
+
+import base64
+import re
+import uuid as uuidlib
+from types import SimpleNamespace
+
+from weaviate.collections.classes.filters import _FilterAnd, _FilterOr, _Operator
+
+from goldenverba.components.interfaces import Embedding
+from goldenverba.components.types import InputConfig
+from goldenverba.server.helpers import LoggerManager
+from goldenverba.server.types import FileConfig, FileStatus, RAGComponentClass
+
+
+def tokenize(value: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", value.lower())
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.objects: dict[str, dict] = {}
+        self.vectors: dict[str, list[float]] = {}
+        self.properties: dict[str, str] = {}
+        self.data = FakeData(self)
+        self.query = FakeQuery(self)
+        self.aggregate = FakeAggregate(self)
+        self.config = FakeConfig(self)
+        # Raised by the next write, used to simulate failed imports
+        self.fail_writes: Exception | None = None
+
+    def add_properties(self, properties: dict):
+        for key, value in properties.items():
+            if key not in self.properties:
+                self.properties[key] = "text" if isinstance(value, str) else "other"
+
+    def matches(self, obj_uuid: str, where) -> bool:
+        if where is None:
+            return True
+        if isinstance(where, _FilterAnd):
+            return all(self.matches(obj_uuid, f) for f in where.filters)
+        if isinstance(where, _FilterOr):
+            return any(self.matches(obj_uuid, f) for f in where.filters)
+        if where.target == "_id":
+            value = obj_uuid
+            expected = where.value
+        else:
+            if where.target not in self.properties:
+                raise Exception(f"no such prop with name '{where.target}' found")
+            value = self.objects[obj_uuid].get(where.target)
+            expected = where.value
+        if where.operator == _Operator.EQUAL:
+            if where.target != "_id" and self.properties[where.target] == "text":
+                return value is not None and set(tokenize(expected)) <= set(
+                    tokenize(value)
+                )
+            return str(value) == str(expected)
+        if where.operator == _Operator.GREATER_THAN:
+            return value is not None and value > expected
+        if where.operator == _Operator.CONTAINS_ANY:
+            return str(value) in [str(v) for v in expected]
+        raise Exception(f"Unsupported operator {where.operator}")
+
+    def check_write(self):
+        if self.fail_writes is not None:
+            raise self.fail_writes
+
+    def to_object(self, obj_uuid: str, return_properties=None, include_vector=False):
+        properties = self.objects[obj_uuid]
+        if return_properties is not None:
+            for prop in return_properties:
+                if prop not in self.properties:
+                    raise Exception(f"no such prop with name '{prop}' found")
+            properties = {key: properties.get(key) for key in return_properties}
+        return SimpleNamespace(
+            uuid=uuidlib.UUID(obj_uuid),
+            properties=dict(properties),
+            vector={"default": self.vectors.get(obj_uuid)} if include_vector else {},
+        )
+
+    async def iterator(
+        self, return_properties=None, include_vector=False, cache_size=100
+    ):
+        after = None
+        while True:
+            response = await self.query.fetch_objects(
+                limit=cache_size,
+                after=after,
+                return_properties=return_properties,
+                include_vector=include_vector,
+            )
+            for obj in response.objects:
+                yield obj
+            if len(response.objects) < cache_size:
+                return
+            after = response.objects[-1].uuid
+
+
+class FakeData:
+    def __init__(self, collection: FakeCollection):
+        self.collection = collection
+
+    async def insert(self, properties: dict, uuid=None, vector=None):
+        self.collection.check_write()
+        obj_uuid = str(uuid or uuidlib.uuid4())
+        self.collection.add_properties(properties)
+        self.collection.objects[obj_uuid] = dict(properties)
+        self.collection.vectors[obj_uuid] = vector
+        return uuidlib.UUID(obj_uuid)
+
+    async def insert_many(self, objects: list):
+        uuids = {}
+        for i, obj in enumerate(objects):
+            obj_uuid = str(obj.uuid or uuidlib.uuid4())
+            self.collection.add_properties(obj.properties)
+            self.collection.objects[obj_uuid] = dict(obj.properties)
+            self.collection.vectors[obj_uuid] = obj.vector
+            uuids[i] = uuidlib.UUID(obj_uuid)
+        if self.collection.fail_writes is not None:
+            # Batches fail per object, the other objects of the batch are stored
+            errors = {len(objects) - 1: str(self.collection.fail_writes)}
+            return SimpleNamespace(has_errors=True, errors=errors, uuids=uuids)
+        return SimpleNamespace(has_errors=False, errors={}, uuids=uuids)
+
+    async def replace(self, uuid, properties: dict, vector=None):
+        self.collection.check_write()
+        self.collection.add_properties(properties)
+        self.collection.objects[str(uuid)] = dict(properties)
+
+    async def update(self, uuid, properties: dict):
+        self.collection.check_write()
+        self.collection.add_properties(properties)
+        self.collection.objects[str(uuid)].update(properties)
+
+    async def exists(self, uuid) -> bool:
+        return str(uuid) in self.collection.objects
+
+    async def delete_by_id(self, uuid) -> bool:
+        self.collection.vectors.pop(str(uuid), None)
+        return self.collection.objects.pop(str(uuid), None) is not None
+
+    async def delete_many(self, where):
+        for obj_uuid in [
+            obj_uuid
+            for obj_uuid in self.collection.objects
+            if self.collection.matches(obj_uuid, where)
+        ]:
+            await self.delete_by_id(obj_uuid)
+
+
+class FakeQuery:
+    def __init__(self, collection: FakeCollection):
+        self.collection = collection
+        self.calls = []
+
+    async def fetch_objects(
+        self,
+        filters=None,
+        sort=None,
+        limit=None,
+        offset=None,
+        after=None,
+        include_vector=False,
+        return_properties=None,
+    ):
+        self.calls.append({"filters": filters, "offset": offset, "after": after})
+        if after is not None and (filters is not None or sort is not None):
+            raise Exception("cursor api is not supported with filters or sort")
+        if offset is not None and limit is not None and offset + limit > 10000:
+            raise Exception("query maximum results exceeded")
+        obj_uuids = [
+            obj_uuid
+            for obj_uuid in self.collection.objects
+            if self.collection.matches(obj_uuid, filters)
+        ]
+        if sort is not None:
+            for order in reversed(sort.sorts):
+                obj_uuids.sort(
+                    key=lambda obj_uuid: self.collection.objects[obj_uuid].get(
+                        order.prop
+                    ),
+                    reverse=not order.ascending,
+                )
+        else:
+            obj_uuids.sort()
+        if after is not None:
+            obj_uuids = [obj_uuid for obj_uuid in obj_uuids if obj_uuid > str(after)]
+        obj_uuids = obj_uuids[offset or 0 :]
+        if limit is not None:
+            obj_uuids = obj_uuids[:limit]
+        return SimpleNamespace(
+            objects=[
+                self.collection.to_object(obj_uuid, return_properties, include_vector)
+                for obj_uuid in obj_uuids
+            ]
+        )
+
+    async def fetch_object_by_id(self, uuid, return_properties=None):
+        if str(uuid) not in self.collection.objects:
+            return None
+        return self.collection.to_object(str(uuid), return_properties)
+
+
+class FakeAggregate:
+    def __init__(self, collection: FakeCollection):
+        self.collection = collection
+
+    async def over_all(self, filters=None, total_count=True, group_by=None):
+        return SimpleNamespace(
+            total_count=sum(
+                1
+                for obj_uuid in self.collection.objects
+                if self.collection.matches(obj_uuid, filters)
+            )
+        )
+
+
+class FakeConfig:
+    def __init__(self, collection: FakeCollection):
+        self.collection = collection
+
+    async def get(self):
+        return SimpleNamespace(
+            name=self.collection.name,
+            properties=[
+                SimpleNamespace(name=name) for name in self.collection.properties
+            ],
+        )
+
+
+class FakeCollections:
+    def __init__(self):
+        self.collections: dict[str, FakeCollection] = {}
+
+    async def exists(self, name: str) -> bool:
+        return name in self.collections
+
+    async def create(self, name: str, **kwargs) -> FakeCollection:
+        self.collections[name] = FakeCollection(name)
+        return self.collections[name]
+
+    def get(self, name: str) -> FakeCollection:
+        return self.collections.setdefault(name, FakeCollection(name))
+
+
+class FakeWeaviateClient:
+    def __init__(self):
+        self.collections = FakeCollections()
+
+
+class FakeEmbedder(Embedding):
+    """Embeds every text as its length and records the texts it received"""
+
+    def __init__(self):
+        super().__init__()
+        self.name = "Fake"
+        self.config = {
+            "Model": InputConfig(
+                type="dropdown",
+                value="fake-model",
+                description="",
+                values=["fake-model"],
+            )
+        }
+        self.received: list[str] = []
+        self.batches: list[int] = []
+
+    async def vectorize(self, config: dict, content: list[str]) -> list[list[float]]:
+        self.received.extend(content)
+        self.batches.append(len(content))
+        return [[float(len(text)), 1.0, 0.5, 0.25] for text in content]
+
+
+class RecordingLogger(LoggerManager):
+    def __init__(self):
+        super().__init__()
+        self.reports: list[tuple[str, str, str]] = []
+
+    async def send_report(
+        self, file_Id: str, status: FileStatus, message: str, took: float
+    ):
+        self.reports.append((file_Id, status, message))
+
+
+def setup_manager(manager, embedder: FakeEmbedder = None):
+    """Import into a FakeWeaviateClient with the FakeEmbedder and without embedding cache"""
+    manager.embedder_manager.embedders["Fake"] = embedder or FakeEmbedder()
+    manager.embedder_manager.cache = None
+    return FakeWeaviateClient()
+
+
+def make_file_config(
+    manager,
+    content: str,
+    filename: str = "test.txt",
+    chunker: str = "Sentence",
+    chunker_config: dict = None,
+    overwrite: bool = False,
+) -> FileConfig:
+    """FileConfig of a text file imported with the Default reader and the FakeEmbedder"""
+    config = manager.create_config()
+    config["Embedder"]["selected"] = "Fake"
+    config["Chunker"]["selected"] = chunker
+    config["Reader"]["selected"] = "Default"
+    for name, value in (chunker_config or {}).items():
+        config["Chunker"]["components"][chunker]["config"][name]["value"] = value
+    return FileConfig(
+        fileID=filename,
+        filename=filename,
+        isURL=False,
+        overwrite=overwrite,
+        extension=filename.rsplit(".", 1)[-1],
+        source="",
+        content=base64.b64encode(content.encode("utf-8")).decode("utf-8"),
+        labels=[],
+        rag_config={key: RAGComponentClass(**value) for key, value in config.items()},
+        file_size=len(content),
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def get_stored_chunks(client: FakeWeaviateClient) -> list[dict]:
+    """Stored chunks of the FakeEmbedder ordered by chunk_id, with their uuid"""
+    collection = client.collections.get("VERBA_Embedding_fake_model")
+    return sorted(
+        (
+            {**properties, "uuid": obj_uuid}
+            for obj_uuid, properties in collection.objects.items()
+        ),
+        key=lambda chunk: chunk["chunk_id"],
+    )
@@ -0,0 +1,261 @@
+import asyncio
+import threading
+
+import pytest
+
+from goldenverba import verba_manager
+from goldenverba.components import executor
+from goldenverba.components.document import Document, parse_contents
+
+from goldenverba.verba_manager import VerbaManager
+from goldenverba.server.types import FileStatus
+from goldenverba.tests.fakes import (
+    FakeEmbedder,
+    RecordingLogger,
+    get_stored_chunks,
+    make_file_config,
+    setup_manager,
+)
+
+ONE_SENTENCE_CHUNKS = {"Sentences": 1, "Overlap": 0}
+
+
+def import_text(
+    manager, client, content: str, overwrite: bool = False
+) -> RecordingLogger:
+    logger = RecordingLogger()
+    asyncio.run(
+        manager.import_document(
+            client,
+            make_file_config(
+                manager,
+                content,
+                chunker_config=ONE_SENTENCE_CHUNKS,
+                overwrite=overwrite,
+            ),
+            logger,
+        )
+    )
+    return logger
+
+
+def test_overwrite_reuses_unchanged_chunks():
+    """Test that an overwrite only embeds edited and inserted chunks, keeps unchanged chunks and deletes removed ones"""
+    manager = VerbaManager()
+    embedder = FakeEmbedder()
+    client = setup_manager(manager, embedder)
+    import_text(manager, client, "Alpha one. Beta two. Gamma three. Delta four.")
+    previous = {
+        chunk["content"].strip(): chunk["uuid"] for chunk in get_stored_chunks(client)
+    }
+    documents = client.collections.get("VERBA_DOCUMENTS").objects
+    doc_uuid = list(documents)[0]
+    embedder.received.clear()
+
+    logger = import_text(
+        manager,
+        client,
+        "Alpha one. Inserted here. Beta changed. Gamma three.",
+        overwrite=True,
+    )
+
+    assert logger.reports[-1][1] == FileStatus.DONE
+    assert ("test.txt", FileStatus.EMBEDDING, "Reusing 2 of 4 chunks, removing 2") in (
+        logger.reports
+    )
+    # Only edited and inserted chunks are embedded
+    assert [text.strip() for text in embedder.received] == [
+        "Inserted here.",
+        "Beta changed.",
+    ]
+    chunks = get_stored_chunks(client)
+    assert [(chunk["chunk_id"], chunk["content"].strip()) for chunk in chunks] == [
+        (0, "Alpha one."),
+        (1, "Inserted here."),
+        (2, "Beta changed."),
+        (3, "Gamma three."),
+    ]
+    # Unchanged chunks keep their uuid, the document is updated in place
+    assert chunks[0]["uuid"] == previous["Alpha one."]
+    assert chunks[3]["uuid"] == previous["Gamma three."]
+    assert set(previous.values()) & {chunk["uuid"] for chunk in chunks} == {
+        previous["Alpha one."],
+        previous["Gamma three."],
+    }
+    assert list(documents) == [doc_uuid]
+    assert documents[doc_uuid]["content_hash"]
+
+
+def test_failed_overwrite_keeps_previous_document():
+    """Test that an update whose new chunks can't be written leaves the stored document untouched"""
+    manager = VerbaManager()
+    client = setup_manager(manager)
+    import_text(manager, client, "Alpha one. Beta two. Gamma three.")
+    documents = client.collections.get("VERBA_DOCUMENTS").objects
+    stored_document = dict(list(documents.values())[0])
+    stored_chunks = get_stored_chunks(client)
+
+    chunk_collection = client.collections.get("VERBA_Embedding_fake_model")
+    chunk_collection.fail_writes = Exception("Weaviate is unavailable")
+    logger = import_text(manager, client, "Alpha one. Beta changed.", overwrite=True)
+    chunk_collection.fail_writes = None
+
+    assert logger.reports[-1][1] == FileStatus.ERROR
+    assert list(documents.values()) == [stored_document]
+    assert get_stored_chunks(client) == stored_chunks
+
+    # The previous version is still complete, importing it again is skipped
+    logger = import_text(
+        manager, client, "Alpha one. Beta two. Gamma three.", overwrite=True
+    )
+    assert ("test.txt", FileStatus.DONE, "test.txt is unchanged, skipped import") in (
+        logger.reports
+    )
+
+
+@pytest.mark.parametrize(
+    "chunker, chunker_config",
+    [("Sentence", ONE_SENTENCE_CHUNKS), ("Token", {"Tokens": 8, "Overlap": 2})],
+)
+def test_streamed_import_matches_whole_import(chunker, chunker_config):
+    """Test that a document above the streaming threshold is stored with the same chunks and chunk ids,
+    and that chunk batches are embedded and inserted one at a time while the chunker is still running
+    """
+    content = " ".join(f"Sentence number {i} of the document." for i in range(60))
+
+    def import_document(streaming_threshold: int, events: list) -> list[dict]:
+        manager = VerbaManager()
+        embedder = FakeEmbedder()
+        embedder.max_batch_size = 4
+        client = setup_manager(manager, embedder)
+        manager.streaming_threshold = streaming_threshold
+
+        chunk_stream = manager.chunker_manager.chunk_stream
+        insert_chunks = manager.weaviate_manager.insert_chunks
+
+        async def record_batches(batches):
+            async for chunks in batches:
+                events.append(("chunked", len(chunks)))
+                yield chunks
+
+        async def record_inserts(client, document, chunks, doc_uuid, embedder):
+            events.append(("inserted", len(chunks)))
+            return await insert_chunks(client, document, chunks, doc_uuid, embedder)
+
+        manager.chunker_manager.chunk_stream = lambda *args, **kwargs: record_batches(
+            chunk_stream(*args, **kwargs)
+        )
+        manager.weaviate_manager.insert_chunks = record_inserts
+        logger = RecordingLogger()
+        asyncio.run(
+            manager.import_document(
+                client,
+                make_file_config(
+                    manager, content, chunker=chunker, chunker_config=chunker_config
+                ),
+                logger,
+            )
+        )
+        assert logger.reports[-1][1] == FileStatus.DONE
+        return [
+            {
+                key: chunk[key]
+                for key in ["chunk_id", "content", "start_i", "end_i", "pca"]
+            }
+            for chunk in get_stored_chunks(client)
+        ]
+
+    whole_events = []
+    whole = import_document(len(content) + 1, whole_events)
+    streamed_events = []
+    streamed = import_document(len(content), streamed_events)
+
+    assert len(whole) > 8
+    # PCA is fitted on every vector of the document, so only compare it once all batches are stored
+    assert [{**chunk, "pca": None} for chunk in streamed] == [
+        {**chunk, "pca": None} for chunk in whole
+    ]
+    assert whole_events == [("inserted", len(whole))]
+    # Every batch is inserted on its own while the chunker is still running,
+    # at most the pending embedding batches are chunked ahead of the inserts
+    inserts = [size for event, size in streamed_events if event == "inserted"]
+    assert max(inserts) <= 4 and sum(inserts) == len(whole)
+    ahead = 0
+    for event, size in streamed_events:
+        ahead += size if event == "chunked" else -size
+        assert ahead <= 6 * 4
+    assert streamed_events[-1][0] == "inserted"
+    assert streamed_events.index(("inserted", 4)) < len(streamed_events) // 2
+
+
+def test_streamed_import_offloads_chunkers_without_chunk_stream(monkeypatch):
+    """Test that chunkers that can't split incrementally chunk streamed documents on the CPU executor"""
+    monkeypatch.setattr(executor, "executor_type", "thread")
+    monkeypatch.setattr(executor, "executor", None)
+    manager = VerbaManager()
+    client = setup_manager(manager)
+    manager.streaming_threshold = 100
+    recursive = manager.chunker_manager.chunkers["Recursive"]
+    chunk = recursive.chunk
+    threads = []
+
+    async def record_thread(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return await chunk(*args, **kwargs)
+
+    monkeypatch.setattr(recursive, "chunk", record_thread)
+    content = " ".join(f"Sentence number {i} of the document." for i in range(60))
+    logger = RecordingLogger()
+    asyncio.run(
+        manager.import_document(
+            client,
+            make_file_config(
+                manager, content, chunker="Recursive", chunker_config={"Overlap": 0}
+            ),
+            logger,
+        )
+    )
+    executor.shutdown_executor()
+
+    assert logger.reports[-1][1] == FileStatus.DONE
+    assert len(threads) == 1 and threads[0].startswith("verba-cpu")
+    chunks = get_stored_chunks(client)
+    assert len(chunks) > 1
+    assert "".join(chunk["content"] for chunk in chunks).replace(" ", "") == (
+        content.replace(" ", "")
+    )
+
+
+def test_documents_of_an_import_are_parsed_in_batches(monkeypatch):
+    """Test that the documents of one file are parsed by spaCy together instead of one per chunk call"""
+    manager = VerbaManager()
+    client = setup_manager(manager)
+    parsed = []
+
+    def record_parse(contents, languages=None, sources=None):
+        parsed.append(len(contents))
+        return parse_contents(contents, languages, sources)
+
+    async def load_stream(reader, fileConfig, logger, sync=None):
+        for i in range(6):
+            yield Document(
+                title=f"part{i}.txt",
+                content=f"Part {i} of the file. It has two sentences.",
+                labels=[],
+                meta={},
+            )
+
+    monkeypatch.setattr(verba_manager, "parse_contents", record_parse)
+    monkeypatch.setattr(manager.reader_manager, "load_stream", load_stream)
+    logger = RecordingLogger()
+    asyncio.run(
+        manager.import_document(
+            client,
+            make_file_config(manager, "", chunker_config=ONE_SENTENCE_CHUNKS),
+            logger,
+        )
+    )
+
+    assert logger.reports[-1][1] == FileStatus.DONE
+    assert sum(parsed) == 6 and max(parsed) > 1
+    assert len(get_stored_chunks(client)) == 12
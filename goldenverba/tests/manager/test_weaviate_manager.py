@@ -0,0 +1,114 @@
+import asyncio
+
+from goldenverba.components.managers import WeaviateManager
+from goldenverba.tests.fakes import FakeWeaviateClient
+
+
+def store_synced_document(
+    client: FakeWeaviateClient, title: str, sync_key: str, content_hash: str = "hash"
+) -> str:
+    collection = client.collections.get("VERBA_DOCUMENTS")
+    return str(
+        asyncio.run(
+            collection.data.insert(
+                {
+                    "title": title,
+                    "sync_key": sync_key,
+                    "sync_version": "v1",
+                    "content_hash": content_hash,
+                }
+            )
+        )
+    )
+
+
+def test_synced_documents_match_sync_key_exactly():
+    client = FakeWeaviateClient()
+    asyncio.run(client.collections.create("VERBA_DOCUMENTS"))
+    verba_uuid = store_synced_document(client, "README.md", "git:owner/verba:main")
+    store_synced_document(client, "ui/README.md", "git:owner/verba-ui:main")
+    store_synced_document(client, "docs/index.md", "git:owner/verba:main:docs")
+
+    # The word tokenized equal filter of Weaviate matches all three documents
+    documents = asyncio.run(
+        WeaviateManager().get_synced_documents(client, "git:owner/verba:main")
+    )
+
+    assert documents == {"README.md": (verba_uuid, "v1")}
+
+
+def test_synced_documents_are_filtered_by_sync_key():
+    client = FakeWeaviateClient()
+    asyncio.run(client.collections.create("VERBA_DOCUMENTS"))
+    for i in range(25):
+        store_synced_document(client, f"doc{i}.md", "html:abc")
+    # Interrupted imports are loaded again
+    store_synced_document(client, "partial.md", "html:abc", content_hash="")
+    for i in range(30):
+        store_synced_document(client, f"other{i}.md", "html:def")
+
+    documents = asyncio.run(
+        WeaviateManager().get_synced_documents(client, "html:abc", page_size=10)
+    )
+
+    assert sorted(documents) == sorted(f"doc{i}.md" for i in range(25))
+    calls = client.collections.get("VERBA_DOCUMENTS").query.calls
+    assert len(calls) == 3
+    assert all(call["filters"] is not None and call["after"] is None for call in calls)
+
+
+def test_synced_documents_above_the_query_limit_page_with_cursor():
+    client = FakeWeaviateClient()
+    asyncio.run(client.collections.create("VERBA_DOCUMENTS"))
+    for i in range(25):
+        store_synced_document(client, f"doc{i}.md", "html:abc")
+    store_synced_document(client, "other.md", "html:def")
+    manager = WeaviateManager()
+    manager.query_maximum_results = 20
+
+    documents = asyncio.run(
+        manager.get_synced_documents(client, "html:abc", page_size=10)
+    )
+
+    assert sorted(documents) == sorted(f"doc{i}.md" for i in range(25))
+    calls = client.collections.get("VERBA_DOCUMENTS").query.calls
+    assert all(call["filters"] is None and call["offset"] is None for call in calls)
+
+
+def test_synced_documents_without_sync_properties():
+    client = FakeWeaviateClient()
+    collection = asyncio.run(client.collections.create("VERBA_DOCUMENTS"))
+    asyncio.run(collection.data.insert({"title": "old.txt"}))
+
+    assert asyncio.run(WeaviateManager().get_synced_documents(client, "html:abc")) == {}
+
+
+def test_chunk_vectors_page_by_chunk_id():
+    client = FakeWeaviateClient()
+    manager = WeaviateManager()
+    asyncio.run(manager.verify_embedding_collection(client, "fake-model"))
+    collection = client.collections.get(manager.embedding_table["fake-model"])
+    for chunk_id in reversed(range(25)):
+        asyncio.run(
+            collection.data.insert(
+                {
+                    "doc_uuid": "doc",
+                    "content": f"chunk {chunk_id}",
+                    "chunk_id": chunk_id,
+                },
+                vector=[float(chunk_id)],
+            )
+        )
+    asyncio.run(
+        collection.data.insert({"doc_uuid": "other", "content": "", "chunk_id": 0})
+    )
+
+    chunks = asyncio.run(
+        manager.get_chunk_vectors(client, "doc", "fake-model", page_size=10)
+    )
+
+    assert [chunk.properties["chunk_id"] for chunk in chunks] == list(range(25))
+    assert [chunk.vector["default"] for chunk in chunks] == [
+        [float(chunk_id)] for chunk_id in range(25)
+    ]
+    assert len(collection.query.calls) == 3
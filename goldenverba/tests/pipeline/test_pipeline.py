@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+from goldenverba.components.pipeline import IngestionPipeline, PipelineStage
+
+
+def test_pipeline_preserves_order_and_results():
+    """Test that results are returned in source order"""
+
+    async def double(item):
+        await asyncio.sleep(0.001 * (5 - item))
+        return item * 2
+
+    async def increment(item):
+        return item + 1
+
+    pipeline = IngestionPipeline(
+        [PipelineStage("double", double, workers=3), PipelineStage("inc", increment)]
+    )
+    results = asyncio.run(pipeline.run(range(5)))
+
+    assert results == [1, 3, 5, 7, 9]
+
+
+def test_pipeline_collects_stage_errors():
+    """Test that a failing item does not stop the other items"""
+
+    async def fail_on_two(item):
+        if item == 2:
+            raise ValueError("two")
+        return item
+
+    pipeline = IngestionPipeline([PipelineStage("check", fail_on_two, workers=2)])
+    results = asyncio.run(pipeline.run([1, 2, 3]))
+
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 3
+
+
+def test_pipeline_early_finish():
+    """Test that returning None skips the remaining stages"""
+    seen = []
+
+    async def skip_odd(item):
+        return None if item % 2 else item
+
+    async def record(item):
+        seen.append(item)
+        return item
+
+    pipeline = IngestionPipeline(
+        [PipelineStage("skip", skip_odd), PipelineStage("record", record)]
+    )
+    results = asyncio.run(pipeline.run(range(4)))
+
+    assert results == [0, None, 2, None]
+    assert seen == [0, 2]
+
+
+def test_pipeline_backpressure():
+    """Test that a slow stage limits how far the source runs ahead"""
+    pulled = []
+    in_flight_max = 0
+
+    async def source():
+        for i in range(20):
+            pulled.append(i)
+            yield i
+
+    async def slow(item):
+        nonlocal in_flight_max
+        in_flight_max = max(in_flight_max, len(pulled) - item)
+        await asyncio.sleep(0.001)
+        return item
+
+    pipeline = IngestionPipeline([PipelineStage("slow", slow)], queue_size=2)
+    results = asyncio.run(pipeline.run(source()))
+
+    assert results == list(range(20))
+    # queue size + one item being handled + one item waiting on put
+    assert in_flight_max <= 4
+
+
+def test_pipeline_source_error():
+    """Test that a failing source propagates its exception"""
+
+    async def source():
+        yield 1
+        raise RuntimeError("reader failed")
+
+    async def identity(item):
+        return item
+
+    pipeline = IngestionPipeline([PipelineStage("identity", identity)])
+    with pytest.raises(RuntimeError):
+        asyncio.run(pipeline.run(source()))
+
+
+def test_pipeline_batched_stage():
+    """Test that a batched stage receives the queued items together and returns a result per item"""
+    batches = []
+
+    async def slow(item):
+        await asyncio.sleep(0.001)
+        return item
+
+    async def check_batch(items):
+        batches.append(items)
+        return [ValueError("three") if item == 3 else item * 10 for item in items]
+
+    pipeline = IngestionPipeline(
+        [
+            PipelineStage("slow", slow),
+            PipelineStage("batch", check_batch, batch_size=4),
+            PipelineStage("inc", slow),
+        ],
+        queue_size=1,
+    )
+    results = asyncio.run(pipeline.run(range(10)))
+
+    assert [item for batch in batches for item in batch] == list(range(10))
+    assert all(len(batch) <= 4 for batch in batches)
+    assert results[:3] == [0, 10, 20] and results[4:] == [40, 50, 60, 70, 80, 90]
+    assert isinstance(results[3], ValueError)
+
+    async def fast(item):
+        return item
+
+    pipeline = IngestionPipeline(
+        [PipelineStage("fast", fast), PipelineStage("batch", check_batch, batch_size=4)]
+    )
+    batches.clear()
+    asyncio.run(pipeline.run(range(10)))
+    # Queued items are not handled one by one
+    assert max(len(batch) for batch in batches) > 1
@@ -0,0 +1,105 @@
+import asyncio
+import base64
+
+from aiohttp import web
+
+from goldenverba.components.reader.AssemblyAIAPI import AssemblyAIReader
+from goldenverba.server.types import FileConfig, FileStatus
+
+
+def make_app(state: dict) -> web.Application:
+    """Stand-in for the AssemblyAI API, a transcript is processing for its first two polls"""
+
+    async def upload(request):
+        assert request.headers["authorization"] == "test-key"
+        audio = await request.read()
+        state["uploads"].append(audio)
+        return web.json_response({"upload_url": f"audio/{audio.decode()}"})
+
+    async def submit(request):
+        body = await request.json()
+        transcript_id = body["audio_url"].removeprefix("audio/")
+        state["polls"][transcript_id] = 0
+        state["running"] += 1
+        state["max_running"] = max(state["max_running"], state["running"])
+        return web.json_response({"id": transcript_id, "status": "queued"})
+
+    async def poll(request):
+        transcript_id = request.match_info["id"]
+        state["polls"][transcript_id] += 1
+        if state["polls"][transcript_id] < 3:
+            return web.json_response({"id": transcript_id, "status": "processing"})
+        state["running"] -= 1
+        if transcript_id == "broken":
+            return web.json_response(
+                {"id": transcript_id, "status": "error", "error": "Unsupported audio"}
+            )
+        return web.json_response(
+            {
+                "id": transcript_id,
+                "status": "completed",
+                "text": f"Said {transcript_id}",
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/v2/upload", upload)
+    app.router.add_post("/v2/transcript", submit)
+    app.router.add_get("/v2/transcript/{id}", poll)
+    return app
+
+
+def make_file_config(name: str) -> FileConfig:
+    return FileConfig(
+        fileID=name,
+        filename=f"{name}.mp3",
+        isURL=False,
+        overwrite=False,
+        extension="mp3",
+        source="",
+        content=base64.b64encode(name.encode()).decode(),
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def test_assemblyai_reader_transcribes_files_concurrently(monkeypatch):
+    state = {"uploads": [], "polls": {}, "running": 0, "max_running": 0}
+    monkeypatch.setenv("ASSEMBLYAI_API_KEY", "test-key")
+    monkeypatch.setenv("VERBA_ASSEMBLYAI_CONCURRENCY", "2")
+    monkeypatch.setenv("VERBA_ASSEMBLYAI_POLL_INTERVAL", "0.01")
+
+    async def run():
+        runner = web.AppRunner(make_app(state))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        monkeypatch.setenv("ASSEMBLYAI_API_URL", f"http://127.0.0.1:{port}")
+        try:
+            reader = AssemblyAIReader()
+            return await asyncio.gather(
+                *[
+                    reader.load(reader.config, make_file_config(name))
+                    for name in ["one", "two", "three", "broken"]
+                ],
+                return_exceptions=True,
+            )
+        finally:
+            await runner.cleanup()
+
+    one, two, three, broken = asyncio.run(run())
+
+    assert [one[0].content, two[0].content, three[0].content] == [
+        "Said one",
+        "Said two",
+        "Said three",
+    ]
+    assert "Unsupported audio" in str(broken)
+    assert sorted(state["uploads"]) == [b"broken", b"one", b"three", b"two"]
+    # Transcriptions overlap, but never more than the configured limit
+    assert state["max_running"] == 2
@@ -0,0 +1,159 @@
+import asyncio
+import io
+
+from goldenverba.components.reader.BasicReader import BasicReader, file_config_for
+from goldenverba.server.types import FileConfig, FileStatus, RAGComponentClass
+
+
+def test_readers_hand_over_raw_bytes():
+    """Test that downloaded files are loaded from bytes and share the rag_config of the original FileConfig"""
+    rag_config = {
+        "Reader": RAGComponentClass(selected="HTML", components={}),
+    }
+    fileConfig = FileConfig(
+        fileID="crawl",
+        filename="https://example.com",
+        isURL=True,
+        overwrite=False,
+        extension="URL",
+        source="",
+        content="",
+        labels=["Web"],
+        rag_config=rag_config,
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+    page_config = file_config_for(
+        fileConfig, "https://example.com/page", "md", "https://example.com/page", 11
+    )
+    assert page_config.rag_config is fileConfig.rag_config
+    assert page_config.extension == "md" and not page_config.isURL
+
+    documents = asyncio.run(BasicReader().load_file(page_config, b"# Page\nText"))
+    assert documents[0].title == "https://example.com/page"
+    assert documents[0].content == "# Page\nText"
+    assert documents[0].labels == ["Web"]
+
+
+def make_pdf(pages: int) -> bytes:
+    """PDF with a heading, the same logo and a paragraph on every page"""
+    import fitz
+
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+    logo.clear_with(200)
+    logo_bytes = logo.tobytes("png")
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1}")
+        page.insert_image(fitz.Rect(72, 100, 136, 164), stream=logo_bytes)
+        page.insert_text((72, 200), f"Text below the logo {number + 1}")
+    return doc.tobytes()
+
+
+def test_pdf_pages_are_extracted_in_parallel_with_content_addressed_images(
+    monkeypatch, tmp_path
+):
+    from goldenverba.components import executor
+    from goldenverba.components.reader import BasicReader as basic_reader
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(executor, "executor_type", "thread")
+    monkeypatch.setattr(executor, "cpu_workers", 2)
+    monkeypatch.setattr(basic_reader, "PDF_PARALLEL_PAGES", 2)
+    monkeypatch.setattr(basic_reader, "PDF_PAGES_PER_TASK", 2)
+
+    fileConfig = FileConfig(
+        fileID="manual",
+        filename="manual.pdf",
+        isURL=False,
+        overwrite=False,
+        extension="pdf",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+    try:
+        content = asyncio.run(BasicReader().load_file(fileConfig, make_pdf(5)))[
+            0
+        ].content
+        skipped = asyncio.run(
+            BasicReader().load_file(fileConfig, make_pdf(1), images=False)
+        )[0].content
+    finally:
+        executor.shutdown_executor()
+
+    lines = [line.strip() for line in content.split("\n") if line.strip()]
+    assert lines[:4] == ["Page 1", "Imagen 1:", lines[2], "Text below the logo 1"]
+    assert lines[-4:] == ["Page 5", "Imagen 5:", lines[2], "Text below the logo 5"]
+    # The logo of every page is stored once
+    assert len(list((tmp_path / "img").iterdir())) == 1
+    assert "Imagen" not in skipped and "Text below the logo 1" in skipped
+
+
+def test_tables_are_streamed_in_row_batches_with_header():
+    from openpyxl import Workbook
+
+    from goldenverba.components.managers import stream_source_chunks
+
+    def table_config(filename: str, extension: str) -> FileConfig:
+        return FileConfig(
+            fileID=filename,
+            filename=filename,
+            isURL=False,
+            overwrite=False,
+            extension=extension,
+            source="",
+            content="",
+            labels=[],
+            rag_config={},
+            file_size=0,
+            status=FileStatus.READY,
+            metadata="",
+            status_report={},
+        )
+
+    async def load_batches(fileConfig: FileConfig, file_source: bytes):
+        document = (
+            await BasicReader().load_file(fileConfig, file_source, rows_per_chunk=2)
+        )[0]
+        batches = [
+            [chunk.content for chunk in chunks]
+            async for chunks in stream_source_chunks(document, batch_size=2)
+        ]
+        return document, batches
+
+    csv_file = b"name;price\nApple;1\nPear;2\n\nPlum;3\n"
+    document, batches = asyncio.run(
+        load_batches(table_config("fruit.csv", "csv"), csv_file)
+    )
+    assert document.content == "name\tprice\nApple\t1\nPear\t2"
+    assert batches == [
+        ["name\tprice\nApple\t1\nPear\t2", "name\tprice\nPlum\t3"],
+    ]
+
+    workbook = Workbook()
+    workbook.active.title = "Prices"
+    for row in [("name", "price"), ("Apple", 1), ("Pear", 2), ("Plum", 3)]:
+        workbook.active.append(row)
+    workbook.create_sheet("Empty")
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    document, batches = asyncio.run(
+        load_batches(table_config("fruit.xlsx", "xlsx"), buffer.getvalue())
+    )
+    assert batches == [
+        [
+            "Sheet: Prices\nname\tprice\nApple\t1\nPear\t2",
+            "Sheet: Prices\nname\tprice\nPlum\t3",
+        ]
+    ]
+    assert document.content_hash
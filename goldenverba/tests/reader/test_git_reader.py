@@ -0,0 +1,253 @@
+import asyncio
+import io
+import tarfile
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from goldenverba.components.interfaces import SyncState
+from goldenverba.components.reader.GitReader import (
+    GitReader,
+    RateLimit,
+    get_blob_sha,
+)
+from goldenverba.server.types import FileConfig, FileStatus
+
+FILES = {
+    "docs/guide.md": b"# Guide",
+    "docs/setup.txt": b"Setup",
+    "src/image.bin": b"\x00",
+}
+
+
+def make_tarball() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for path, content in FILES.items():
+            info = tarfile.TarInfo(f"owner-repo-abc123/{path}")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def make_app(requests: list, truncated: bool = False) -> web.Application:
+    """Stand-in for the GitHub API, rate limits the first file request.
+    With truncated the recursive tree of the branch is cut off like the listing of a very large repository.
+    """
+
+    async def tree(request):
+        requests.append(request.path_qs)
+        if truncated:
+            if "recursive" in request.query:
+                return web.json_response({"tree": [], "truncated": True})
+            return web.json_response(
+                {
+                    "tree": [
+                        {"path": "docs", "type": "tree", "sha": "docs-sha"},
+                        {"path": "src", "type": "tree", "sha": "src-sha"},
+                    ],
+                    "truncated": False,
+                }
+            )
+        return web.json_response(
+            {
+                "tree": [
+                    {"path": path, "type": "blob", "sha": get_blob_sha(content)}
+                    for path, content in FILES.items()
+                ]
+                + [{"path": "docs", "type": "tree", "sha": "docs"}]
+            }
+        )
+
+    async def contents(request):
+        requests.append(request.path)
+        if len([path for path in requests if "/contents/" in path]) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.Response(body=FILES[request.match_info["path"]])
+
+    async def tarball(request):
+        requests.append(request.path)
+        assert request.headers["Authorization"] == "token test-token"
+        return web.Response(body=make_tarball())
+
+    async def subtree(request):
+        requests.append(request.path_qs)
+        assert request.match_info["sha"] == "docs-sha"
+        return web.json_response(
+            {
+                "tree": [
+                    {
+                        "path": path.removeprefix("docs/"),
+                        "type": "blob",
+                        "sha": get_blob_sha(content),
+                    }
+                    for path, content in FILES.items()
+                    if path.startswith("docs/")
+                ],
+                "truncated": False,
+            }
+        )
+
+    app = web.Application()
+    app.router.add_get("/repos/owner/repo/git/trees/main", tree)
+    app.router.add_get("/repos/owner/repo/git/trees/{sha}", subtree)
+    app.router.add_get("/repos/owner/repo/contents/{path:.*}", contents)
+    app.router.add_get("/repos/owner/repo/tarball/main", tarball)
+    return app
+
+
+def make_file_config() -> FileConfig:
+    return FileConfig(
+        fileID="repo",
+        filename="owner/repo",
+        isURL=True,
+        overwrite=False,
+        extension="URL",
+        source="",
+        content="",
+        labels=["Code"],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def load_repo(
+    mode: str,
+    requests: list,
+    monkeypatch,
+    sync: SyncState = None,
+    truncated: bool = False,
+) -> list:
+    async def run():
+        runner = web.AppRunner(make_app(requests, truncated))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        monkeypatch.setenv("GITHUB_API_URL", f"http://127.0.0.1:{port}")
+        try:
+            reader = GitReader()
+            config = reader.config
+            config["Owner"].value = "owner"
+            config["Name"].value = "repo"
+            config["Path"].value = "docs"
+            config["Download Mode"].value = mode
+            return [
+                document
+                async for document in reader.load_stream(
+                    config, make_file_config(), sync
+                )
+            ]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_git_reader_downloads_archive(monkeypatch):
+    """Test that the archive mode downloads the branch once and filters its files"""
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    requests = []
+    documents = load_repo("Archive", requests, monkeypatch)
+
+    assert requests == ["/repos/owner/repo/tarball/main"]
+    assert sorted((document.title, document.content) for document in documents) == [
+        ("docs/guide.md", "# Guide"),
+        ("docs/setup.txt", "Setup"),
+    ]
+    assert documents[0].labels == ["Code"]
+
+
+def test_git_reader_downloads_files_and_retries_rate_limits(monkeypatch):
+    """Test that the file mode downloads matching files and retries after Retry-After"""
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    requests = []
+    documents = load_repo("Files", requests, monkeypatch)
+
+    assert sorted(document.title for document in documents) == [
+        "docs/guide.md",
+        "docs/setup.txt",
+    ]
+    # One file request was rate limited and retried
+    assert len([path for path in requests if "/contents/" in path]) == 3
+    assert documents[0].source.startswith("http://127.0.0.1:")
+
+
+def test_git_reader_only_loads_changed_blobs(monkeypatch):
+    """Test that a sync downloads only changed files and reports removed ones"""
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    requests = []
+    sync = SyncState(
+        "sync-key",
+        {
+            "docs/guide.md": get_blob_sha(b"# Guide"),
+            "docs/setup.txt": "outdated",
+            "docs/removed.md": "removed",
+        },
+    )
+    documents = load_repo("Files", requests, monkeypatch, sync)
+
+    assert [document.title for document in documents] == ["docs/setup.txt"]
+    assert documents[0].sync_key == "sync-key"
+    assert documents[0].sync_version == get_blob_sha(b"Setup")
+    assert sync.removed() == ["docs/removed.md"]
+    assert "/repos/owner/repo/contents/docs/guide.md" not in requests
+
+
+def test_git_reader_lists_subtrees_of_truncated_trees(monkeypatch):
+    """Test that a truncated tree is listed subtree by subtree, so the sync doesn't remove unlisted files"""
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    requests = []
+    sync = SyncState(
+        "sync-key",
+        {
+            "docs/guide.md": get_blob_sha(b"# Guide"),
+            "docs/setup.txt": "outdated",
+            "docs/removed.md": "removed",
+        },
+    )
+    documents = load_repo("Files", requests, monkeypatch, sync, truncated=True)
+
+    assert [document.title for document in documents] == ["docs/setup.txt"]
+    assert sync.removed() == ["docs/removed.md"]
+    # Only the subtree of the Path is listed
+    assert [path for path in requests if "/git/trees/" in path] == [
+        "/repos/owner/repo/git/trees/main?recursive=1",
+        "/repos/owner/repo/git/trees/main",
+        "/repos/owner/repo/git/trees/docs-sha?recursive=1",
+    ]
+
+
+def test_rate_limit_accepts_http_date_retry_after():
+    """Test that Retry-After given as HTTP date pauses requests and malformed values fall back to the reset header"""
+
+    def response(status: int, **headers) -> SimpleNamespace:
+        return SimpleNamespace(
+            status=status,
+            headers={name.replace("_", "-"): value for name, value in headers.items()},
+        )
+
+    rate_limit = RateLimit(max_wait=300)
+    assert rate_limit.update(
+        response(429, Retry_After=formatdate(time.time() + 120, usegmt=True))
+    )
+    assert 100 < rate_limit.resume_at - time.time() <= 120
+
+    rate_limit = RateLimit(max_wait=300)
+    reset = str(int(time.time() + 30))
+    assert rate_limit.update(
+        response(
+            403,
+            Retry_After="soon",
+            X_RateLimit_Remaining="0",
+            X_RateLimit_Reset=reset,
+        )
+    )
+    assert 20 < rate_limit.resume_at - time.time() <= 30
+
+    assert not RateLimit(max_wait=300).update(response(403, Retry_After="soon"))
@@ -0,0 +1,242 @@
+import asyncio
+
+from aiohttp import web
+
+from goldenverba.components.interfaces import SyncState
+import pytest
+
+from goldenverba.components.reader.HTMLReader import (
+    HTMLReader,
+    MAX_SITEMAP_BYTES,
+    normalize_url,
+    parse_sitemap,
+)
+from goldenverba.server.types import FileConfig, FileStatus
+
+PAGES = {
+    "/": '<a href="/a">A</a><a href="/b/#top">B</a><a href="https://example.com/">X</a>',
+    "/a": '<a href="/a/">A</a><a href="/c?utm_source=x">C</a><a href="/file.pdf">PDF</a>',
+    "/b": '<a href="/">Home</a><a href="/c">C</a>',
+    "/c": '<a href="/d">D</a>',
+    "/d": "Too deep",
+    "/only-in-sitemap": "Listed in the sitemap",
+}
+
+
+def make_app(requests: list) -> web.Application:
+    """Stand-in for a website, answers conditional requests for unchanged pages with 304"""
+
+    async def page(request):
+        conditional = "If-None-Match" in request.headers
+        requests.append(
+            f"{request.path} (conditional)" if conditional else request.path
+        )
+        path = request.path.rstrip("/") or "/"
+        etag = f'"{hash(PAGES[path])}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(
+            text=PAGES[path], content_type="text/html", headers={"ETag": etag}
+        )
+
+    async def sitemap(request):
+        base = f"http://{request.host}"
+        return web.Response(
+            text='<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"<url><loc>{base}/only-in-sitemap</loc></url>"
+            f"<url><loc>{base}/a</loc></url>"
+            "</urlset>",
+            content_type="application/xml",
+        )
+
+    app = web.Application()
+    app.router.add_get("/sitemap.xml", sitemap)
+    app.router.add_get("/{path:.*}", page)
+    return app
+
+
+def make_file_config() -> FileConfig:
+    return FileConfig(
+        fileID="site",
+        filename="site",
+        isURL=True,
+        overwrite=False,
+        extension="URL",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def crawl(requests: list, monkeypatch, tmp_path, recrawl=None, **options) -> list:
+    """Crawl the stand-in, recrawl is called with the documents and returns the SyncState of a second crawl"""
+    monkeypatch.setenv("VERBA_DATA_DIR", str(tmp_path))
+
+    async def run():
+        runner = web.AppRunner(make_app(requests))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            reader = HTMLReader()
+            config = reader.config
+            config["URLs"].values = [f"http://127.0.0.1:{port}/"]
+            config["Recursive"].value = True
+            config["Max Depth"].value = 2
+            for name, value in options.items():
+                config[name].value = value
+            documents = await reader.load(config, make_file_config())
+            if recrawl is not None:
+                sync = recrawl(documents)
+                documents = [
+                    document
+                    async for document in reader.load_stream(
+                        config, make_file_config(), sync
+                    )
+                ]
+            for document in documents:
+                document.title = document.title.removeprefix(f"http://127.0.0.1:{port}")
+            return documents
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_normalize_url():
+    assert (
+        normalize_url("HTTP://Example.com:80/docs/#intro") == "http://example.com/docs"
+    )
+    assert normalize_url("https://example.com/?b=2&utm_source=x&a=1") == (
+        "https://example.com/?a=1&b=2"
+    )
+
+
+def test_html_reader_sync_key_is_opaque():
+    reader = HTMLReader()
+
+    def sync_key(urls: list[str]) -> str:
+        reader.config["URLs"].values = urls
+        return reader.get_sync_key(reader.config, None)
+
+    key = sync_key(["https://example.com/docs", "https://example.com/blog/"])
+    assert key.startswith("html:")
+    assert " " not in key and "example" not in key
+    # Order, spelling and duplicates of the start URLs don't change the key
+    assert key == sync_key(
+        [
+            "HTTPS://example.com/blog",
+            "https://example.com/docs#intro",
+            "https://example.com/docs",
+        ]
+    )
+    # Overlapping crawl roots are different sources
+    assert sync_key(["https://example.com/docs"]) != key
+    assert sync_key([]) == ""
+
+
+def test_html_reader_crawls_breadth_first_once_per_page(monkeypatch, tmp_path):
+    requests = []
+    titles = [document.title for document in crawl(requests, monkeypatch, tmp_path)]
+
+    # /d is beyond the maximum depth, the PDF and the external link are never requested
+    # Pages are titled by their normalized URL, whichever link to them is found first
+    assert sorted(titles) == ["/", "/a", "/b", "/c"]
+    assert sorted(requests) == ["/", "/a", "/b/", "/c"]
+    assert titles[0] == "/"
+
+
+def test_html_reader_seeds_from_sitemap_and_limits_pages(monkeypatch, tmp_path):
+    requests = []
+    documents = crawl(
+        requests, monkeypatch, tmp_path, **{"Use Sitemap": True, "Recursive": False}
+    )
+    assert sorted(document.title for document in documents) == [
+        "/",
+        "/a",
+        "/only-in-sitemap",
+    ]
+
+    requests = []
+    assert len(crawl(requests, monkeypatch, tmp_path, **{"Max Pages": 2})) == 2
+    assert len(requests) == 2
+
+
+def test_html_reader_recrawl_skips_unchanged_pages(monkeypatch, tmp_path):
+    requests = []
+    syncs = []
+
+    def recrawl(documents):
+        sync = SyncState(
+            documents[0].sync_key,
+            {document.title: document.sync_version for document in documents},
+        )
+        syncs.append(sync)
+        requests.clear()
+        PAGES["/c"] = '<a href="/d">D, changed</a>'
+        return sync
+
+    try:
+        documents = crawl(requests, monkeypatch, tmp_path, recrawl=recrawl)
+    finally:
+        PAGES["/c"] = '<a href="/d">D</a>'
+
+    # Unchanged pages are answered with 304 and their cached links are still followed
+    assert [document.title for document in documents] == ["/c"]
+    assert sorted(requests) == [
+        "/ (conditional)",
+        "/a (conditional)",
+        "/b/ (conditional)",
+        "/c (conditional)",
+    ]
+    assert syncs[0].removed() == []
+
+
+def test_recrawl_replaces_pages_stored_under_unnormalized_titles(monkeypatch, tmp_path):
+    """Test that pages synced under the raw URL of earlier versions are imported under their normalized title and the old document is removed"""
+    requests = []
+    syncs = []
+    legacy_titles = []
+
+    def recrawl(documents):
+        versions = {document.title: document.sync_version for document in documents}
+        title = next(title for title in versions if title.endswith("/b"))
+        legacy_titles.append(title + "/")
+        versions[title + "/"] = versions.pop(title)
+        sync = SyncState(documents[0].sync_key, versions)
+        syncs.append(sync)
+        return sync
+
+    documents = crawl(requests, monkeypatch, tmp_path, recrawl=recrawl)
+
+    assert [document.title for document in documents] == ["/b"]
+    assert syncs[0].removed() == legacy_titles
+
+
+def test_parse_sitemap_rejects_dtds_and_oversized_responses():
+    sitemap = (
+        b'<?xml version="1.0" encoding="UTF-8"?>'
+        b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        b"<url><loc>https://example.com/a</loc></url></urlset>"
+    )
+    assert [
+        element.text for element in parse_sitemap(sitemap).iter() if element.text
+    ] == ["https://example.com/a"]
+
+    entity_expansion = (
+        b'<?xml version="1.0"?><!DOCTYPE lolz [<!ENTITY lol "lol">'
+        b'<!ENTITY lol2 "&lol;&lol;&lol;&lol;">]><urlset><url><loc>&lol2;</loc></url></urlset>'
+    )
+    with pytest.raises(Exception, match="DTD"):
+        parse_sitemap(entity_expansion)
+    with pytest.raises(Exception, match="UTF-8"):
+        parse_sitemap(sitemap.decode("utf-8").encode("utf-16"))
+    with pytest.raises(Exception, match="exceeds"):
+        parse_sitemap(b" " * (MAX_SITEMAP_BYTES + 1))
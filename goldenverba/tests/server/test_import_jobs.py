@@ -0,0 +1,275 @@
+import asyncio
+
+from goldenverba.components.jobs import (
+    JobStore,
+    JobStatus,
+    DocumentStage,
+    credentials_match,
+    hash_key,
+)
+from goldenverba.server.helpers import ImportQueue
+from goldenverba.server.types import (
+    ConfigSetting,
+    Credentials,
+    FileConfig,
+    FileStatus,
+    RAGComponentClass,
+    RAGComponentConfig,
+)
+
+CREDENTIALS = {"deployment": "Local", "url": "", "key": ""}
+
+
+def make_file_config(file_id: str) -> FileConfig:
+    return FileConfig(
+        fileID=file_id,
+        filename="test.txt",
+        isURL=False,
+        overwrite=False,
+        extension="txt",
+        source="",
+        content="",
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+    )
+
+
+def make_embedder_config(api_key: str) -> dict[str, RAGComponentClass]:
+    return {
+        "Embedder": RAGComponentClass(
+            selected="OpenAI",
+            components={
+                "OpenAI": RAGComponentConfig(
+                    name="OpenAI",
+                    variables=[],
+                    library=[],
+                    description="",
+                    type="",
+                    available=True,
+                    config={
+                        "API Key": ConfigSetting(
+                            type="password", value=api_key, description="", values=[]
+                        ),
+                        "Model": ConfigSetting(
+                            type="dropdown", value="model", description="", values=[]
+                        ),
+                    },
+                )
+            },
+        )
+    }
+
+
+class FakeManager:
+    def __init__(self, rag_config: dict = None):
+        self.imports = []
+        self.api_keys = []
+        self.rag_config = rag_config or {}
+
+    async def load_rag_config(self, client):
+        return self.rag_config
+
+    async def import_document(self, client, fileConfig, logger, resume=False):
+        self.imports.append((fileConfig.fileID, resume))
+        if "Embedder" in fileConfig.rag_config:
+            self.api_keys.append(
+                fileConfig.rag_config["Embedder"]
+                .components["OpenAI"]
+                .config["API Key"]
+                .value
+            )
+        await logger.send_report(fileConfig.fileID, FileStatus.DONE, "done", took=0)
+
+
+class FakeClientManager:
+    async def connect(self, credentials):
+        return None
+
+
+def test_job_store_tracks_jobs_and_stages(tmp_path):
+    """Test that jobs, document stages and reports are persisted"""
+    store = JobStore(path=str(tmp_path / "jobs.sqlite"))
+    store.add_job("../file-1", "test.txt", '{"fileID": "../file-1"}', CREDENTIALS)
+
+    # Client chosen ids are never used as a path
+    assert store.content_path("../file-1").startswith(str(tmp_path / "jobs"))
+    assert store.get_file_config("../file-1") == '{"fileID": "../file-1"}'
+
+    store.set_document_stage("../file-1", "doc", DocumentStage.CHUNKED)
+    store.set_document_stage("../file-1", "doc", DocumentStage.VECTORIZED)
+    store.set_report("../file-1", "../file-1", "test.txt", "CHUNKING", "", 0)
+    store.set_report("../file-1", "../file-1", "test.txt", "EMBEDDING", "x", 1.5)
+    store.close()
+
+    reopened = JobStore(path=str(tmp_path / "jobs.sqlite"))
+    assert reopened.get_document_stages("../file-1") == {
+        "doc": DocumentStage.VECTORIZED
+    }
+    assert reopened.get_reports("../file-1")[0]["status"] == "EMBEDDING"
+    assert [job["job_id"] for job in reopened.get_jobs([JobStatus.QUEUED])] == [
+        "../file-1"
+    ]
+
+    reopened.set_job_status("../file-1", JobStatus.DONE)
+    assert reopened.get_file_config("../file-1") is None
+    reopened.delete_finished_jobs(older_than=float("inf"))
+    assert reopened.get_jobs() == []
+
+
+def test_import_queue_resumes_unfinished_jobs(tmp_path):
+    """Test that queued and interrupted jobs are picked up on start"""
+    store = JobStore(path=str(tmp_path / "jobs.sqlite"))
+    for job_id in ["queued", "running", "done"]:
+        store.add_job(
+            job_id, "test.txt", make_file_config(job_id).model_dump_json(), CREDENTIALS
+        )
+    store.set_job_status("running", JobStatus.RUNNING)
+    store.set_job_status("done", JobStatus.DONE)
+
+    async def run():
+        manager = FakeManager()
+        queue = ImportQueue(manager, FakeClientManager(), store, workers=1)
+        await queue.start()
+        await queue.enqueue(
+            make_file_config("new"), Credentials(**CREDENTIALS), socket=None
+        )
+        await queue.queue.join()
+        await queue.stop()
+        return manager.imports
+
+    imports = asyncio.run(run())
+
+    assert imports == [("queued", False), ("running", True), ("new", False)]
+    assert {job["job_id"]: job["status"] for job in store.get_jobs()} == {
+        "queued": JobStatus.DONE,
+        "running": JobStatus.DONE,
+        "done": JobStatus.DONE,
+        "new": JobStatus.DONE,
+    }
+
+
+def test_job_store_never_stores_api_keys(tmp_path):
+    """Test that jobs keep a hash of the API key instead of the key itself"""
+    path = tmp_path / "jobs.sqlite"
+    store = JobStore(path=str(path))
+    credentials = {"deployment": "Weaviate", "url": "https://cluster", "key": "secret"}
+    store.add_job("file-1", "test.txt", "{}", credentials)
+    # Jobs of earlier versions stored the key in plaintext
+    store.connect().execute(
+        "INSERT INTO jobs VALUES ('legacy', 'old.txt', 'QUEUED', ?, 0, 0)",
+        ('{"deployment": "Weaviate", "url": "https://cluster", "key": "secret"}',),
+    )
+    store.connect().commit()
+    store.close()
+
+    reopened = JobStore(path=str(path))
+    jobs = reopened.get_jobs()
+    reopened.close()
+
+    assert b"secret" not in path.read_bytes()
+    assert [job["credentials"] for job in jobs] == [
+        {
+            "deployment": "Weaviate",
+            "url": "https://cluster",
+            "key_hash": hash_key("secret"),
+        }
+    ] * 2
+    assert credentials_match(jobs[0]["credentials"], credentials)
+    assert not credentials_match(
+        jobs[0]["credentials"], {**credentials, "key": "other"}
+    )
+
+
+def test_import_queue_waits_for_api_key(tmp_path):
+    """Test that interrupted jobs with an API key resume once the key is sent again
+    and that websockets only receive the progress of jobs of their credentials"""
+    store = JobStore(path=str(tmp_path / "jobs.sqlite"))
+    credentials = Credentials(
+        deployment="Weaviate", url="https://cluster", key="secret"
+    )
+    store.add_job(
+        "cloud",
+        "test.txt",
+        make_file_config("cloud").model_dump_json(),
+        credentials.model_dump(),
+    )
+    store.set_job_status("cloud", JobStatus.RUNNING)
+    store.add_job(
+        "local", "test.txt", make_file_config("local").model_dump_json(), CREDENTIALS
+    )
+
+    async def run():
+        manager = FakeManager()
+        queue = ImportQueue(manager, FakeClientManager(), store, workers=1)
+        await queue.start()
+        await queue.queue.join()
+        imports = list(manager.imports)
+
+        socket = object()
+        queue.attach(socket, credentials.model_copy(update={"key": "wrong"}))
+        assert queue.loggers["cloud"].socket is None
+        assert queue.resume(credentials.model_copy(update={"key": "wrong"})) == 0
+
+        queue.attach(socket, credentials)
+        assert queue.loggers["cloud"].socket is socket
+        await queue.queue.join()
+        await queue.stop()
+        return imports, manager.imports
+
+    waiting, imports = asyncio.run(run())
+
+    assert waiting == [("local", False)]
+    assert imports == [("local", False), ("cloud", True)]
+    assert store.get_job("cloud")["status"] == JobStatus.DONE
+
+
+def test_job_files_never_contain_secrets(tmp_path):
+    """Test that password settings are blanked on disk and restored from memory or the stored RAG config"""
+    store = JobStore(path=str(tmp_path / "jobs.sqlite"))
+    file_config = make_file_config("queued")
+    file_config.rag_config = make_embedder_config("sk-secret")
+
+    async def run():
+        manager = FakeManager()
+        queue = ImportQueue(manager, FakeClientManager(), store, workers=1)
+        await queue.enqueue(file_config, Credentials(**CREDENTIALS), socket=None)
+        written = [path.read_text() for path in (tmp_path / "jobs").iterdir()]
+        await queue.start()
+        await queue.queue.join()
+        await queue.stop()
+        return written, manager.api_keys
+
+    written, api_keys = asyncio.run(run())
+
+    assert len(written) == 1 and "sk-secret" not in written[0]
+    assert '"model"' in written[0]
+    assert api_keys == ["sk-secret"]
+    # The FileConfig of the client is not changed
+    assert (
+        file_config.rag_config["Embedder"].components["OpenAI"].config["API Key"].value
+        == "sk-secret"
+    )
+
+    # After a restart the key is taken from the stored RAG config
+    interrupted = make_file_config("interrupted")
+    interrupted.rag_config = make_embedder_config("")
+    store.add_job("interrupted", "test.txt", interrupted.model_dump_json(), CREDENTIALS)
+    stored_config = {
+        name: component.model_dump()
+        for name, component in make_embedder_config("sk-stored").items()
+    }
+
+    async def resume():
+        manager = FakeManager(stored_config)
+        queue = ImportQueue(manager, FakeClientManager(), store, workers=1)
+        await queue.start()
+        await queue.queue.join()
+        await queue.stop()
+        return manager.api_keys
+
+    assert asyncio.run(resume()) == ["sk-stored"]
+    assert b"sk-" not in (tmp_path / "jobs.sqlite").read_bytes()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tarfile
+import zipfile
+
+from goldenverba.server import ingest
+from goldenverba.server.ingest import (
+    IngestSource,
+    discover_files,
+    init_worker,
+    load_and_chunk,
+)
+from goldenverba.server.types import RAGComponentClass
+from goldenverba.verba_manager import VerbaManager
+
+
+def test_discover_files_walks_directories_globs_and_archives(tmp_path, monkeypatch):
+    """Test that files are found in directories, glob patterns and archives"""
+    docs = tmp_path / "docs"
+    (docs / "guide").mkdir(parents=True)
+    (docs / "guide" / "setup.md").write_text("setup")
+    (docs / "readme.txt").write_text("readme")
+    (docs / "image.bin").write_bytes(b"\x00")
+
+    with zipfile.ZipFile(tmp_path / "bundle.zip", "w") as archive:
+        archive.writestr("a/notes.md", "notes")
+        archive.writestr("a/skip.bin", "skip")
+    with tarfile.open(tmp_path / "bundle.tar.gz", "w:gz") as archive:
+        archive.add(docs / "readme.txt", arcname="readme.txt")
+
+    monkeypatch.chdir(tmp_path)
+    sources = list(
+        discover_files(["docs", "bundle.zip", "*.tar.gz", "missing"], ["md", "txt"])
+    )
+
+    assert [source.filename for source in sources] == [
+        os.path.join("docs", "readme.txt"),
+        os.path.join("docs", "guide", "setup.md"),
+        "bundle.zip/a/notes.md",
+        "bundle.tar.gz/readme.txt",
+    ]
+    assert sources[0].read() == b"readme"
+    assert sources[2].read() == b"notes"
+    assert sources[3].extension == "txt"
+
+
+def test_load_and_chunk_reads_files_without_base64(tmp_path, monkeypatch):
+    """Test that the Default reader loads files from their path or bytes instead of base64 content"""
+    (tmp_path / "readme.txt").write_text("First sentence. Second sentence.")
+    sources = [
+        IngestSource("readme.txt", path=str(tmp_path / "readme.txt")),
+        IngestSource("bundle.zip/notes.txt", data=b"Notes from an archive."),
+    ]
+    init_worker()
+    rag_config = {
+        key: RAGComponentClass(**value)
+        for key, value in VerbaManager().create_config().items()
+        if key in ["Reader", "Chunker", "Embedder"]
+    }
+    rag_config["Reader"].selected = "Default"
+    rag_config["Chunker"].selected = "Token"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The file was base64 encoded")
+
+    monkeypatch.setattr(ingest.base64, "b64encode", fail)
+
+    for source, content in zip(
+        sources, ["First sentence. Second sentence.", "Notes from an archive."]
+    ):
+        documents, tokens = asyncio.run(
+            load_and_chunk(source, rag_config, [], overwrite=False)
+        )
+        assert [document.content for document in documents] == [content]
+        assert documents[0].chunks and tokens > 0
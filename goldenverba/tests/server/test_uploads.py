@@ -0,0 +1,97 @@
+import asyncio
+import base64
+
+import pytest
+
+from goldenverba.components.reader.BasicReader import BasicReader
+from goldenverba.components.uploads import UploadStore
+from goldenverba.server.types import FileConfig, FileStatus
+
+
+def make_file_config(upload_id: str = "", content: str = "") -> FileConfig:
+    return FileConfig(
+        fileID="test.txt",
+        filename="test.txt",
+        isURL=False,
+        overwrite=False,
+        extension="txt",
+        source="",
+        content=content,
+        labels=[],
+        rag_config={},
+        file_size=0,
+        status=FileStatus.READY,
+        metadata="",
+        status_report={},
+        upload_id=upload_id,
+    )
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_upload_store_streams_to_disk(tmp_path):
+    """Test that uploads are written chunk by chunk and referenced by server generated ids"""
+    store = UploadStore(path=str(tmp_path))
+    upload_id, size = asyncio.run(store.save(stream(b"Hello ", b"world")))
+
+    assert size == 11
+    with open(store.get_path(upload_id), "rb") as f:
+        assert f.read() == b"Hello world"
+
+    with pytest.raises(Exception):
+        store.get_path("../jobs.sqlite")
+    with pytest.raises(Exception):
+        asyncio.run(store.save(stream(b"x" * 10, b"x" * 10), max_size=15))
+    assert list(tmp_path.iterdir()) == [tmp_path / upload_id]
+
+    store.delete_older_than(float("inf"), keep={upload_id})
+    assert store.exists(upload_id)
+    store.delete(upload_id)
+    assert not store.exists(upload_id)
+
+
+def test_upload_store_caps_pending_uploads(tmp_path):
+    """Test that uploads are rejected once all pending uploads together exceed max_total"""
+    store = UploadStore(path=str(tmp_path))
+    first, _ = asyncio.run(store.save(stream(b"x" * 10), max_total=25))
+
+    async def concurrent():
+        gate = asyncio.Event()
+
+        async def slow_stream():
+            yield b"x" * 8
+            await gate.wait()
+            yield b"x" * 2
+
+        second = asyncio.create_task(store.save(slow_stream(), max_total=25))
+        await asyncio.sleep(0.01)
+        # 10 stored and 8 in progress
+        with pytest.raises(Exception, match="Pending uploads"):
+            await store.save(stream(b"x" * 8), max_total=25)
+        gate.set()
+        return await second
+
+    second, size = asyncio.run(concurrent())
+
+    assert size == 10
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([first, second])
+    assert store.in_progress == {}
+    store.delete(first)
+    assert asyncio.run(store.save(stream(b"x" * 10), max_total=25))[1] == 10
+
+
+def test_reader_loads_uploaded_file(tmp_path, monkeypatch):
+    """Test that readers use the uploaded file instead of base64 content"""
+    monkeypatch.setenv("VERBA_DATA_DIR", str(tmp_path))
+    upload_id, _ = asyncio.run(UploadStore().save(stream(b"Uploaded content")))
+    reader = BasicReader()
+
+    documents = asyncio.run(reader.load({}, make_file_config(upload_id=upload_id)))
+    assert documents[0].content == "Uploaded content"
+
+    encoded = base64.b64encode(b"Inline content").decode("utf-8")
+    documents = asyncio.run(reader.load({}, make_file_config(content=encoded)))
+    assert documents[0].content == "Inline content"
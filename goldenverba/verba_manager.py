@@ -8,13 +8,21 @@ from dotenv import load_dotenv
 from wasabi import msg
 import asyncio
 
-from copy import deepcopy
+from contextlib import aclosing
 import hashlib
 
 from goldenverba.server.helpers import LoggerManager
 from weaviate.client import WeaviateAsyncClient
 
-from goldenverba.components.document import Document
+from goldenverba.components.document import (
+    Document,
+    language_inputs,
+    parse_content,
+    parse_contents,
+    spacy_batch_size,
+)
+from goldenverba.components.interfaces import Chunker, SyncState
+from goldenverba.components.executor import process_offload_enabled, run_cpu
 from goldenverba.server.types import (
     FileConfig,
     FileStatus,
@@ -22,6 +30,8 @@ from goldenverba.server.types import (
     Credentials,
 )
 
+from goldenverba.components.pipeline import IngestionPipeline, PipelineStage
+from goldenverba.components.jobs import JobStore, DocumentStage
 from goldenverba.components.managers import (
     ReaderManager,
     ChunkerManager,
@@ -34,6 +44,27 @@ from goldenverba.components.managers import (
 load_dotenv()
 
 
+class ImportTask:
+    """State of a single document while it moves through the ingestion pipeline"""
+
+    def __init__(
+        self, document: Document, fileConfig: FileConfig, resumed_stage: str = None
+    ):
+        self.document = document
+        self.title = document.title
+        self.fileConfig = fileConfig
+        self.jobID = fileConfig.fileID
+        self.parentFilename = fileConfig.filename
+        # Stage this document reached before the import was interrupted
+        self.resumed_stage = resumed_stage
+        self.documents: list[Document] = []
+        self.start_time = 0.0
+        self.streaming = False
+        # Set when an overwritten document is updated in place instead of re-imported
+        self.previous_uuid: str | None = None
+        self.removed_chunks: list[str] = []
+
+
 class VerbaManager:
     """Manages all Verba Components."""
 
@@ -49,6 +80,16 @@ class VerbaManager:
         self.user_config_uuid = "f53f7738-08be-4d5a-b003-13eb4bf03ac7"
         self.environment_variables = {}
         self.installed_libraries = {}
+        # Set by the server to persist the progress of imports
+        self.job_store: JobStore | None = None
+        self.chunk_workers = int(os.getenv("VERBA_CHUNK_WORKERS", 2))
+        self.embed_workers = int(os.getenv("VERBA_EMBED_WORKERS", 2))
+        self.ingest_workers = int(os.getenv("VERBA_INGEST_WORKERS", 2))
+        self.pipeline_queue_size = int(os.getenv("VERBA_PIPELINE_QUEUE_SIZE", 4))
+        self.streaming_threshold = int(os.getenv("VERBA_STREAMING_THRESHOLD", 500000))
+        self.incremental_overwrite = os.getenv(
+            "VERBA_INCREMENTAL_OVERWRITE", "True"
+        ).lower() not in ("false", "0")
 
         self.verify_installed_libraries()
         self.verify_variables()
@@ -95,19 +136,35 @@ class VerbaManager:
     # Import
 
     async def import_document(
-        self, client, fileConfig: FileConfig, logger: LoggerManager = LoggerManager()
+        self,
+        client,
+        fileConfig: FileConfig,
+        logger: LoggerManager = LoggerManager(),
+        resume: bool = False,
     ):
         try:
             loop = asyncio.get_running_loop()
             start_time = loop.time()
 
-            duplicate_uuid = await self.weaviate_manager.exist_document_name(
-                client, fileConfig.filename
+            stages = {}
+            if resume and self.job_store is not None:
+                stages = await asyncio.to_thread(
+                    self.job_store.get_document_stages, fileConfig.fileID
+                )
+
+            sync_key = self.reader_manager.get_sync_key(
+                fileConfig.rag_config["Reader"].selected, fileConfig
             )
-            if duplicate_uuid is not None and not fileConfig.overwrite:
+            # Synced sources replace their documents one by one
+            duplicate_uuid = None
+            if not sync_key:
+                duplicate_uuid = await self.weaviate_manager.exist_document_name(
+                    client, fileConfig.filename
+                )
+            if duplicate_uuid is not None and not fileConfig.overwrite and not resume:
                 raise Exception(f"{fileConfig.filename} already exists in Verba")
             elif duplicate_uuid is not None and fileConfig.overwrite:
-                await self.weaviate_manager.delete_document(client, duplicate_uuid)
+                # Deleting is deferred to the chunk stage, which skips documents that are unchanged
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.STARTING,
@@ -122,32 +179,86 @@ class VerbaManager:
                     took=0,
                 )
 
-            documents = await self.reader_manager.load(
-                fileConfig.rag_config["Reader"].selected, fileConfig, logger
+            sync = None
+            if sync_key:
+                synced_documents = await self.weaviate_manager.get_synced_documents(
+                    client, sync_key
+                )
+                sync = SyncState(
+                    sync_key,
+                    {
+                        title: sync_version
+                        for title, (_, sync_version) in synced_documents.items()
+                    },
+                    self.get_sync_fingerprint(fileConfig),
+                )
+
+            documents = self.reader_manager.load_stream(
+                fileConfig.rag_config["Reader"].selected, fileConfig, logger, sync
             )
 
-            tasks = [
-                self.process_single_document(client, doc, fileConfig, logger)
-                for doc in documents
-            ]
+            pipeline = self.create_pipeline(client, logger)
+
+            titles = set()
 
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            async def tasks():
+                async for document in documents:
+                    titles.add(document.title)
+                    yield ImportTask(document, fileConfig, stages.get(document.title))
+
+            results = await pipeline.run(tasks())
             successful_tasks = sum(
                 1 for result in results if not isinstance(result, Exception)
             )
+            unchanged_tasks = sum(1 for result in results if result is None)
+
+            if sync is not None:
+                # Documents the reader skipped because their version didn't change
+                skipped = len(sync.seen - titles)
+                unchanged_tasks += skipped
+                successful_tasks += skipped
+                removed = sync.removed()
+                for title in removed:
+                    await self.weaviate_manager.delete_document(
+                        client, synced_documents[title][0]
+                    )
+                await logger.send_report(
+                    fileConfig.fileID,
+                    status=FileStatus.INGESTING,
+                    message=f"Synced {fileConfig.filename}: {len(titles)} added or changed, {skipped} unchanged, {len(removed)} removed",
+                    took=round(loop.time() - start_time, 2),
+                )
+
+            if (
+                duplicate_uuid is not None
+                and fileConfig.overwrite
+                and fileConfig.filename not in titles
+            ):
+                # The previous import is not replaced by any of the loaded documents
+                await self.weaviate_manager.delete_document(client, duplicate_uuid)
 
             if successful_tasks > 1:
+                message = f"Imported {fileConfig.filename} and it's {successful_tasks} documents into Weaviate"
+                if unchanged_tasks > 0:
+                    message += f" ({unchanged_tasks} unchanged)"
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.INGESTING,
-                    message=f"Imported {fileConfig.filename} and it's {successful_tasks} documents into Weaviate",
+                    message=message,
+                    took=round(loop.time() - start_time, 2),
+                )
+            elif successful_tasks == 1 and unchanged_tasks == 1:
+                await logger.send_report(
+                    fileConfig.fileID,
+                    status=FileStatus.INGESTING,
+                    message=f"{fileConfig.filename} is unchanged, skipped import",
                     took=round(loop.time() - start_time, 2),
                 )
             elif successful_tasks == 1:
                 await logger.send_report(
                     fileConfig.fileID,
                     status=FileStatus.INGESTING,
-                    message=f"Imported {fileConfig.filename} and {len(documents[0].chunks)} chunks into Weaviate",
+                    message=f"Imported {fileConfig.filename} and {results[0]} chunks into Weaviate",
                     took=round(loop.time() - start_time, 2),
                 )
             elif (
@@ -180,6 +291,39 @@ class VerbaManager:
             )
             return
 
+    def create_pipeline(self, client, logger: LoggerManager) -> IngestionPipeline:
+        """Creates the chunk, embed and ingest pipeline that ImportTasks are run through"""
+        return IngestionPipeline(
+            [
+                PipelineStage(
+                    "resolve",
+                    lambda task: self.resolve_stage(client, task, logger),
+                    workers=self.chunk_workers,
+                ),
+                PipelineStage(
+                    "parse",
+                    lambda tasks: self.parse_stage(tasks),
+                    batch_size=spacy_batch_size,
+                ),
+                PipelineStage(
+                    "chunk",
+                    lambda task: self.chunk_stage(client, task, logger),
+                    workers=self.chunk_workers,
+                ),
+                PipelineStage(
+                    "embed",
+                    lambda task: self.embed_stage(client, task, logger),
+                    workers=self.embed_workers,
+                ),
+                PipelineStage(
+                    "ingest",
+                    lambda task: self.ingest_stage(client, task, logger),
+                    workers=self.ingest_workers,
+                ),
+            ],
+            queue_size=self.pipeline_queue_size,
+        )
+
     async def process_single_document(
         self,
         client,
@@ -187,88 +331,442 @@ class VerbaManager:
         fileConfig: FileConfig,
         logger: LoggerManager,
     ):
+        """Chunk, embed and ingest a single document without going through the pipeline"""
+        task = ImportTask(document, fileConfig)
+        task = await self.resolve_stage(client, task, logger)
+        if task is None:
+            return
+        [task] = await self.parse_stage([task])
+        for stage in [self.chunk_stage, self.embed_stage, self.ingest_stage]:
+            task = await stage(client, task, logger)
+            if task is None:
+                return
+
+    async def resolve_stage(self, client, task: "ImportTask", logger: LoggerManager):
+        """First pipeline stage: resolves duplicates and skips unchanged documents"""
         loop = asyncio.get_running_loop()
-        start_time = loop.time()
+        task.start_time = loop.time()
+        fileConfig = task.fileConfig
+        document = task.document
 
         if fileConfig.isURL:
-            currentFileConfig = deepcopy(fileConfig)
-            currentFileConfig.fileID = fileConfig.fileID + document.title
-            currentFileConfig.isURL = False
-            currentFileConfig.filename = document.title
+            # Shallow copy, the rag_config is shared by all documents of the URL
+            currentFileConfig = fileConfig.model_copy(
+                update={
+                    "fileID": fileConfig.fileID + document.title,
+                    "isURL": False,
+                    "filename": document.title,
+                    "content": "",
+                }
+            )
             await logger.create_new_document(
                 fileConfig.fileID + document.title,
                 document.title,
                 fileConfig.fileID,
             )
-        else:
-            currentFileConfig = fileConfig
+            task.fileConfig = currentFileConfig
+            task.parentFilename = fileConfig.filename
 
-        try:
-            duplicate_uuid = await self.weaviate_manager.exist_document_name(
+        async def resolve():
+            if task.resumed_stage == DocumentStage.INGESTED:
+                task.document = None
+                await logger.send_report(
+                    task.fileConfig.fileID,
+                    status=FileStatus.DONE,
+                    message=f"{document.title} was already imported",
+                    took=0,
+                )
+                return None
+
+            # Documents of an interrupted import may be partially stored and are replaced
+            overwrite = task.fileConfig.overwrite or task.resumed_stage is not None
+            document.content_hash, document.config_hash = self.get_document_hashes(
+                document, task.fileConfig
+            )
+            duplicate = await self.weaviate_manager.get_document_by_name(
                 client, document.title
             )
-            if duplicate_uuid is not None and not currentFileConfig.overwrite:
+            if duplicate is not None and (
+                duplicate.properties.get("content_hash") == document.content_hash
+                and duplicate.properties.get("config_hash") == document.config_hash
+            ):
+                task.document = None
+                await logger.send_report(
+                    task.fileConfig.fileID,
+                    status=FileStatus.DONE,
+                    message=f"{document.title} is unchanged, skipped import",
+                    took=round(loop.time() - task.start_time, 2),
+                )
+                await self.record_stage(task, DocumentStage.INGESTED)
+                return None
+            if (
+                duplicate is not None
+                and document.sync_key
+                and duplicate.properties.get("sync_key") == document.sync_key
+            ):
+                # A changed document of a synced source replaces its previous version
+                overwrite = True
+
+            if duplicate is not None and not overwrite:
                 raise Exception(f"{document.title} already exists in Verba")
-            elif duplicate_uuid is not None and currentFileConfig.overwrite:
-                await self.weaviate_manager.delete_document(client, duplicate_uuid)
+            elif duplicate is not None and overwrite:
+                if (
+                    self.incremental_overwrite
+                    and not self.is_streamed(document)
+                    and duplicate.properties.get("config_hash") == document.config_hash
+                ):
+                    # Same Chunker and Embedder, unchanged chunks can keep their vectors
+                    task.previous_uuid = str(duplicate.uuid)
+                else:
+                    await self.weaviate_manager.delete_document(client, duplicate.uuid)
+            return task
+
+        return await self.run_stage(task, resolve, logger)
+
+    def requires_parse(self, task: "ImportTask") -> bool:
+        """Whether the document of a task is parsed by spaCy before it is chunked"""
+        document = task.document
+        chunker = self.chunker_manager.chunkers.get(
+            task.fileConfig.rag_config["Chunker"].selected
+        )
+        if (
+            chunker is None
+            or not chunker.requires_spacy
+            or document.chunk_source is not None
+            or document.chunks
+            or document.is_parsed
+        ):
+            return False
+        if chunker.cpu_bound and process_offload_enabled():
+            # Worker processes parse the documents they chunk again, only streamed documents
+            # of chunkers with their own chunk_stream are split in this process
+            return (
+                self.is_streamed(document)
+                and type(chunker).chunk_stream is not Chunker.chunk_stream
+            )
+        return True
 
-            chunk_task = asyncio.create_task(
-                self.chunker_manager.chunk(
-                    currentFileConfig.rag_config["Chunker"].selected,
-                    currentFileConfig,
-                    [document],
-                    self.embedder_manager.embedders[
-                        currentFileConfig.rag_config["Embedder"].selected
-                    ],
-                    logger,
+    async def parse_stage(self, tasks: list["ImportTask"]) -> list["ImportTask"]:
+        """Second pipeline stage: parses the documents of all queued tasks that need spaCy
+        in one batch on the CPU executor, so nlp.pipe batches them by language"""
+        pending = [task.document for task in tasks if self.requires_parse(task)]
+        if pending:
+            try:
+                spacy_docs = await run_cpu(parse_contents, *language_inputs(pending))
+                for document, spacy_doc in zip(pending, spacy_docs):
+                    document.spacy_doc = spacy_doc
+            except Exception as e:
+                # Documents that are not parsed yet are parsed by the chunk stage
+                msg.warn(f"Parsing {len(pending)} documents failed: {str(e)}")
+        return tasks
+
+    async def chunk_stage(self, client, task: "ImportTask", logger: LoggerManager):
+        """Third pipeline stage: splits the document into chunks"""
+        document = task.document
+
+        async def chunk():
+            if self.is_streamed(document):
+                # Large documents are chunked, embedded and ingested in one overlapping pass
+                chunker = self.chunker_manager.chunkers.get(
+                    task.fileConfig.rag_config["Chunker"].selected
                 )
+                if (
+                    chunker is not None
+                    and chunker.requires_spacy
+                    and document.chunk_source is None
+                    and not document.is_parsed
+                ):
+                    # Parse up front on the CPU executor, splitting happens on the event loop
+                    document.spacy_doc = await run_cpu(
+                        parse_content,
+                        document.content,
+                        document.language,
+                        document.source,
+                    )
+                task.streaming = True
+                task.documents = [document]
+                task.document = None
+                await self.record_stage(task, DocumentStage.CHUNKED)
+                return task
+
+            task.documents = await self.chunker_manager.chunk(
+                task.fileConfig.rag_config["Chunker"].selected,
+                task.fileConfig,
+                [document],
+                self.embedder_manager.embedders[
+                    task.fileConfig.rag_config["Embedder"].selected
+                ],
+                logger,
             )
-            chunked_documents = await chunk_task
-
-            embedding_task = asyncio.create_task(
-                self.embedder_manager.vectorize(
-                    currentFileConfig.rag_config["Embedder"].selected,
-                    currentFileConfig,
-                    chunked_documents,
-                    logger,
-                )
+            task.document = None
+            await self.record_stage(task, DocumentStage.CHUNKED)
+            return task
+
+        return await self.run_stage(task, chunk, logger)
+
+    async def embed_stage(self, client, task: "ImportTask", logger: LoggerManager):
+        """Second pipeline stage: vectorizes all chunks of the document"""
+
+        async def embed():
+            if task.streaming:
+                return task
+            if task.previous_uuid is not None:
+                await self.reuse_chunks(client, task, logger)
+            task.documents = await self.embedder_manager.vectorize(
+                task.fileConfig.rag_config["Embedder"].selected,
+                task.fileConfig,
+                task.documents,
+                logger,
             )
-            vectorized_documents = await embedding_task
+            await self.record_stage(task, DocumentStage.VECTORIZED)
+            return task
+
+        return await self.run_stage(task, embed, logger)
+
+    async def ingest_stage(self, client, task: "ImportTask", logger: LoggerManager):
+        """Last pipeline stage: imports the document and its chunks into Weaviate, returns the number of ingested chunks"""
+        loop = asyncio.get_running_loop()
 
-            for document in vectorized_documents:
-                ingesting_task = asyncio.create_task(
-                    self.weaviate_manager.import_document(
+        async def ingest():
+            embedder = task.fileConfig.rag_config["Embedder"].selected
+            embedder_model = (
+                task.fileConfig.rag_config["Embedder"]
+                .components[embedder]
+                .config["Model"]
+                .value
+            )
+            chunk_count = 0
+            for document in task.documents:
+                if task.streaming:
+                    chunk_count += await self.stream_document(
+                        client, document, task.fileConfig, embedder_model, logger
+                    )
+                    continue
+                if task.previous_uuid is not None:
+                    await self.weaviate_manager.update_document(
                         client,
+                        task.previous_uuid,
                         document,
-                        currentFileConfig.rag_config["Embedder"]
-                        .components[fileConfig.rag_config["Embedder"].selected]
-                        .config["Model"]
-                        .value,
+                        embedder_model,
+                        task.removed_chunks,
                     )
-                )
-                await ingesting_task
+                else:
+                    await self.weaviate_manager.import_document(
+                        client, document, embedder_model
+                    )
+                chunk_count += len(document.chunks)
+            task.documents = []
+            await self.record_stage(task, DocumentStage.INGESTED)
 
             await logger.send_report(
-                currentFileConfig.fileID,
+                task.fileConfig.fileID,
                 status=FileStatus.INGESTING,
-                message=f"Imported {currentFileConfig.filename} into Weaviate",
-                took=round(loop.time() - start_time, 2),
+                message=f"Imported {task.fileConfig.filename} into Weaviate",
+                took=round(loop.time() - task.start_time, 2),
             )
 
             await logger.send_report(
-                currentFileConfig.fileID,
+                task.fileConfig.fileID,
                 status=FileStatus.DONE,
-                message=f"Import for {currentFileConfig.filename} completed successfully",
-                took=round(loop.time() - start_time, 2),
+                message=f"Import for {task.fileConfig.filename} completed successfully",
+                took=round(loop.time() - task.start_time, 2),
+            )
+            return chunk_count
+
+        return await self.run_stage(task, ingest, logger)
+
+    async def stream_document(
+        self,
+        client,
+        document: Document,
+        fileConfig: FileConfig,
+        embedder_model: str,
+        logger: LoggerManager,
+    ) -> int:
+        """Chunk, embed and ingest a document at the same time. Embedding batches are dispatched as soon as enough chunks exist
+        and inserted into Weaviate while later batches are still embedding. Returns the number of ingested chunks.
+        """
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        embedder = fileConfig.rag_config["Embedder"].selected
+        batch_size = self.embedder_manager.embedders[embedder].max_batch_size
+
+        chunk_batches = self.chunker_manager.chunk_stream(
+            fileConfig.rag_config["Chunker"].selected,
+            fileConfig,
+            document,
+            self.embedder_manager.embedders[embedder],
+            batch_size=batch_size,
+        )
+        vectorized_batches = self.embedder_manager.vectorize_stream(
+            embedder, fileConfig, document, chunk_batches
+        )
+
+        doc_uuid = await self.weaviate_manager.insert_document_object(
+            client, document, embedder_model
+        )
+        chunk_count = 0
+        try:
+            async with aclosing(vectorized_batches):
+                async for chunks in vectorized_batches:
+                    if chunk_count == 0:
+                        await logger.send_report(
+                            fileConfig.fileID,
+                            FileStatus.EMBEDDING,
+                            f"Streaming {fileConfig.filename} into Weaviate",
+                            took=round(loop.time() - start_time, 2),
+                        )
+                    await self.weaviate_manager.insert_chunks(
+                        client, document, chunks, doc_uuid, embedder_model
+                    )
+                    chunk_count += len(chunks)
+            await self.weaviate_manager.verify_chunk_count(
+                client, doc_uuid, chunk_count, embedder_model
             )
+            await self.weaviate_manager.set_document_hashes(client, doc_uuid, document)
+        except Exception as e:
+            await self.weaviate_manager.delete_document(client, doc_uuid)
+            raise Exception(f"Chunk import failed with : {str(e)}")
+
+        await logger.send_report(
+            fileConfig.fileID,
+            FileStatus.EMBEDDING,
+            f"Vectorized {chunk_count} chunks",
+            took=round(loop.time() - start_time, 2),
+        )
+        return chunk_count
+
+    async def record_stage(self, task: "ImportTask", stage: str):
+        """Persist the pipeline stage a document reached, used to resume interrupted imports"""
+        if self.job_store is not None:
+            await asyncio.to_thread(
+                self.job_store.set_document_stage, task.jobID, task.title, stage
+            )
+
+    async def reuse_chunks(self, client, task: "ImportTask", logger: LoggerManager):
+        """Match the new chunks of an overwritten document against its stored chunks by content hash.
+        Matching chunks keep their uuid and vector, stored chunks without a match are marked for deletion.
+        """
+        loop = asyncio.get_running_loop()
+        embedder = task.fileConfig.rag_config["Embedder"].selected
+        embedder_model = (
+            task.fileConfig.rag_config["Embedder"]
+            .components[embedder]
+            .config["Model"]
+            .value
+        )
+        stored_chunks = await self.weaviate_manager.get_chunk_vectors(
+            client, task.previous_uuid, embedder_model
+        )
+
+        available: dict[str, list] = {}
+        for stored_chunk in stored_chunks:
+            key = hashlib.sha256(
+                stored_chunk.properties["content"].encode("utf-8")
+            ).hexdigest()
+            available.setdefault(key, []).append(stored_chunk)
+
+        reused = 0
+        total = 0
+        for document in task.documents:
+            for chunk in document.chunks:
+                total += 1
+                key = hashlib.sha256(chunk.content.encode("utf-8")).hexdigest()
+                if available.get(key):
+                    stored_chunk = available[key].pop(0)
+                    vector = stored_chunk.vector
+                    chunk.uuid = str(stored_chunk.uuid)
+                    chunk.vector = (
+                        vector["default"] if isinstance(vector, dict) else vector
+                    )
+                    reused += 1
+
+        task.removed_chunks = [
+            str(stored_chunk.uuid)
+            for stored_chunks in available.values()
+            for stored_chunk in stored_chunks
+        ]
+        await logger.send_report(
+            task.fileConfig.fileID,
+            FileStatus.EMBEDDING,
+            f"Reusing {reused} of {total} chunks, removing {len(task.removed_chunks)}",
+            took=round(loop.time() - task.start_time, 2),
+        )
+
+    def is_streamed(self, document: Document) -> bool:
+        """Whether a document is chunked, embedded and ingested in one streaming pass instead of as a whole"""
+        if document.chunks:
+            return False
+        return (
+            document.chunk_source is not None
+            or len(document.content) >= self.streaming_threshold
+        )
+
+    def get_document_hashes(
+        self, document: Document, fileConfig: FileConfig
+    ) -> tuple[str, str]:
+        """Fingerprint a document before import
+        @returns tuple[str, str] - Hash of the document content and hash of everything else that changes the stored chunks (Chunker, Embedder and document properties)
+        """
+        if document.chunk_source is not None and document.content_hash:
+            # The content of documents split by their reader is only a preview, the reader fingerprints the source
+            content_hash = document.content_hash
+        else:
+            content_hash = hashlib.sha256(document.content.encode("utf-8")).hexdigest()
+        fingerprint = {
+            "labels": document.labels,
+            "metadata": document.metadata,
+            "source": document.source,
+            "extension": document.extension,
+        }
+        if fileConfig.language:
+            # Only part of the fingerprint when set, so existing hashes stay valid
+            fingerprint["language"] = fileConfig.language
+        for component in ["Chunker", "Embedder"]:
+            fingerprint[component] = self.get_component_settings(fileConfig, component)
+        config_hash = hashlib.sha256(
+            json.dumps(fingerprint, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return content_hash, config_hash
+
+    def get_sync_fingerprint(self, fileConfig: FileConfig) -> str:
+        """Fingerprint of the settings of a synced import, documents imported with other settings are loaded again"""
+        fingerprint = {
+            "labels": fileConfig.labels,
+            "language": fileConfig.language,
+        }
+        for component in ["Reader", "Chunker", "Embedder"]:
+            fingerprint[component] = self.get_component_settings(fileConfig, component)
+        return hashlib.sha256(
+            json.dumps(fingerprint, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def get_component_settings(self, fileConfig: FileConfig, component: str) -> dict:
+        selected = fileConfig.rag_config[component].selected
+        config = fileConfig.rag_config[component].components[selected].config
+        return {
+            "selected": selected,
+            # Rotating API keys should not trigger a re-import
+            "config": {
+                key: setting.value
+                for key, setting in config.items()
+                if setting.type != "password"
+            },
+        }
+
+    async def run_stage(self, task: "ImportTask", stage, logger: LoggerManager):
+        """Runs a pipeline stage and reports failures for the document"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await stage()
         except Exception as e:
             await logger.send_report(
-                currentFileConfig.fileID,
+                task.fileConfig.fileID,
                 status=FileStatus.ERROR,
-                message=f"Import for {fileConfig.filename} failed: {str(e)}",
-                took=round(loop.time() - start_time, 2),
+                message=f"Import for {task.parentFilename} failed: {str(e)}",
+                took=round(loop.time() - task.start_time, 2),
             )
-            raise Exception(f"Import for {fileConfig.filename} failed: {str(e)}")
+            raise Exception(f"Import for {task.parentFilename} failed: {str(e)}")
 
     # Configuration
 
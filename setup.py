@@ -42,7 +42,6 @@ setup(
         "aiohttp==3.9.5",
         "markdownify==0.13.1",
         "aiofiles==24.1.0",
-        "assemblyai==0.33.0",
         "beautifulsoup4==4.12.3",
         "langdetect==1.0.9",
         "openai==1.52.1",
@@ -57,7 +56,10 @@ setup(
             "vertexai==1.46.0",
         ],
         "huggingface": [
-            "sentence-transformers==3.0.1",
+            "sentence-transformers==3.2.1",
+        ],
+        "onnx": [
+            "sentence-transformers[onnx]==3.2.1",
         ],
     },
 )